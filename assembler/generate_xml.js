@@ -1,5 +1,5 @@
 import fs from "fs";
-import { buildBlockXML } from "./xml_builder.js";
+import { buildProgramXML } from "./xml_builder.js";
 
 // Input from Python compiler
 const blockTree = JSON.parse(
@@ -7,7 +7,7 @@ const blockTree = JSON.parse(
 );
 
 // Build XML body
-const xmlBody = buildBlockXML(blockTree);
+const xmlBody = buildProgramXML(blockTree);
 
 // Wrap with Blockly root
 const finalXML = `
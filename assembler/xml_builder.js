@@ -34,11 +34,83 @@ const COMPARE_OP_MAP = {
 };
 
 /**
- * Recursively converts a validated block tree into Blockly XML
+ * XML escaping, same as semantic/assembler.py: & < > in text, and " too
+ * in (always double-quoted) attribute values
+ * @param {*} value
+ * @returns {string}
+ */
+function escapeText(value) {
+  return String(value)
+    .replace(/&/g, "&amp;")
+    .replace(/</g, "&lt;")
+    .replace(/>/g, "&gt;");
+}
+
+function escapeAttr(value) {
+  return escapeText(value).replace(/"/g, "&quot;");
+}
+
+/**
+ * Converts a validated block tree into Blockly XML.
+ * Iterative (explicit stack) so deep trees and long `next` chains don't
+ * overflow the call stack; parts are joined once at the end.
+ * @param {Object} root
+ * @returns {string}
+ */
+export function buildBlockXML(root) {
+  const parts = [];
+  const stack = [root];
+
+  while (stack.length) {
+    const item = stack.pop();
+    if (typeof item === "string") {
+      parts.push(item);
+      continue;
+    }
+    parts.push(openBlockXML(item));
+
+    // Children are queued in document order, then pushed reversed
+    const pending = [];
+
+    // Value inputs
+    if (item.value_inputs) {
+      for (const [name, child] of Object.entries(item.value_inputs)) {
+        // Empty inputs are left out
+        if (child == null) continue;
+        pending.push(`<value name="${escapeAttr(name)}">`, child, `</value>`);
+      }
+    }
+
+    // Statement inputs
+    if (item.statement_inputs) {
+      for (const [name, child] of Object.entries(item.statement_inputs)) {
+        if (child == null) continue;
+        pending.push(
+          `<statement name="${escapeAttr(name === "THEN" ? "DO" : name)}">`,
+          child,
+          `</statement>`
+        );
+      }
+    }
+
+    // Sequential blocks
+    if (item.next) {
+      pending.push(`<next>`, item.next, `</next>`);
+    }
+
+    pending.push(`</block>`);
+    for (let i = pending.length - 1; i >= 0; i--) stack.push(pending[i]);
+  }
+
+  return parts.join("");
+}
+
+/**
+ * Opening tag, mutation and fields of one block
  * @param {Object} block
  * @returns {string}
  */
-export function buildBlockXML(block) {
+function openBlockXML(block) {
   if (!block || typeof block !== "object") {
     throw new Error("Invalid block node");
   }
@@ -50,11 +122,24 @@ export function buildBlockXML(block) {
   // Map block type
   const blockType = BLOCK_TYPE_MAP[block.type] ?? block.type;
 
-  let xml = `<block type="${blockType}">`;
+  let xml = `<block type="${escapeAttr(blockType)}">`;
+
+  // Mutation (controls_if else, lists_create_with items, procedure calls)
+  if (block.mutation && Object.keys(block.mutation).length) {
+    const attrs = Object.entries(block.mutation)
+      .map(([name, value]) => ` ${name}="${escapeAttr(value)}"`)
+      .join("");
+    xml += `<mutation${attrs}></mutation>`;
+  }
 
   // Fields
   if (block.fields) {
     for (let [name, value] of Object.entries(block.fields)) {
+      // An object here is an uncompiled expression: never print "[object Object]"
+      if (value !== null && typeof value === "object") {
+        throw new Error(`Field "${name}" of "${block.type}" is not a scalar`);
+      }
+
       // Arithmetic operator mapping
       if (block.type === "essentials_num_arithmetic" && name === "OP") {
         value = ARITHMETIC_OP_MAP[value] ?? value;
@@ -74,35 +159,20 @@ export function buildBlockXML(block) {
         value = block.type === "essentials_logic_and" ? "AND" : "OR";
       }
 
-      xml += `<field name="${name}">${String(value)}</field>`;
-    }
-  }
-
-  // Value inputs
-  if (block.value_inputs) {
-    for (const [name, child] of Object.entries(block.value_inputs)) {
-      xml += `<value name="${name}">`;
-      xml += buildBlockXML(child);
-      xml += `</value>`;
+      xml += `<field name="${escapeAttr(name)}">${escapeText(value)}</field>`;
     }
   }
 
-  // Statement inputs
-  if (block.statement_inputs) {
-    for (const [name, child] of Object.entries(block.statement_inputs)) {
-      xml += `<statement name="${name === "THEN" ? "DO" : name}">`;
-      xml += buildBlockXML(child);
-      xml += `</statement>`;
-    }
-  }
-
-  // Sequential blocks
-  if (block.next) {
-    xml += `<next>`;
-    xml += buildBlockXML(block.next);
-    xml += `</next>`;
-  }
-
-  xml += `</block>`;
   return xml;
 }
+
+/**
+ * Converts a program (one block tree, or a list of top-level trees:
+ * main chain + function definitions) into the XML body
+ * @param {Object|Object[]} program
+ * @returns {string}
+ */
+export function buildProgramXML(program) {
+  const roots = Array.isArray(program) ? program : [program];
+  return roots.map(buildBlockXML).join("\n");
+}
@@ -0,0 +1,51 @@
+"""
+Benchmark: fused validate+compile vs. the two-pass path
+
+Run from the repo root:
+    python -m bench.bench_fused
+"""
+
+import timeit
+from pathlib import Path
+
+from semantic.compiler import SemanticCompiler
+from semantic.fused import FusedCompiler
+from semantic.ir import SemanticPlan
+from semantic.validator import CapabilityValidator
+
+from bench.fixtures import SIZES
+
+ROOT = Path(__file__).resolve().parent.parent
+NORMALIZED_BLOCKS = ROOT / "data" / "normalized_blocks.json"
+
+
+def two_pass(validator, compiler, plan):
+    if validator.validate(plan)["status"] != "ok":
+        return None
+    return compiler.compile(plan)
+
+
+def main(repeat: int = 5):
+    validator = CapabilityValidator(str(NORMALIZED_BLOCKS))
+    compiler = SemanticCompiler()
+    fused = FusedCompiler(validator)
+
+    print(f"{'size':<8} {'input':<6} {'two-pass (ms)':>14} {'fused (ms)':>12} {'speedup':>8}")
+
+    for name, raw in SIZES.items():
+        # dict: what the planner returns; ir: already parsed (main.py)
+        for kind, plan in (("dict", raw), ("ir", SemanticPlan.from_json(raw))):
+            # Same output, or the comparison is meaningless
+            validation, tree = fused.validate_and_compile(plan)
+            assert validation == validator.validate(plan)
+            assert tree == two_pass(validator, compiler, plan)
+
+            number = max(1, 2000 // (len(raw["derived"]) + 1))
+            t_two = min(timeit.repeat(lambda: two_pass(validator, compiler, plan), number=number, repeat=repeat)) / number
+            t_fused = min(timeit.repeat(lambda: fused.validate_and_compile(plan), number=number, repeat=repeat)) / number
+
+            print(f"{name:<8} {kind:<6} {t_two * 1e3:>14.3f} {t_fused * 1e3:>12.3f} {t_two / t_fused:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: end-to-end main.py batch throughput, offline and repeatable
+
+- Starts bench/llm_stub.py in-process and points every LLM stage at it
+- The CodeAsthram runner (node + a browser against the live site) is
+  replayed from the same cassette, keyed by the program.xml it gets
+- Runs main.main() over problems.json; outputs go to a temp directory,
+  desktop notifications are off, model-routing stats are not persisted
+- Reports problems / second, the LLM usage ledger and cassette misses
+
+record: run once with network + OPENROUTER_API_KEY to fill the cassette
+(already recorded requests are not re-sent); replay: no network at all.
+
+Run from the repo root:
+    python -m bench.bench_main [replay|record]
+
+Latency knobs: STUB_LATENCY, STUB_LATENCY_SCALE, STUB_JITTER (LLM) and
+RUNNER_LATENCY_SCALE (x recorded runner time, default 1).
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench.cassette import Cassette
+from bench.llm_stub import StubServer, latency_from_env
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class RecordedRunner:
+    """Stands in for main.run(): runner_execute.js from the cassette."""
+
+    def __init__(self, cassette: Cassette, mode: str, real_run, xml_path: Path, result_path: Path, scale: float):
+        self.cassette = cassette
+        self.mode = mode
+        self.real_run = real_run
+        self.xml_path = xml_path
+        self.result_path = result_path
+        self.scale = scale
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, cmd, cwd):
+        if "runner_execute.js" not in cmd:
+            return self.real_run(cmd, cwd)
+
+        key = Cassette.runner_key(self.xml_path.read_text(encoding="utf-8"))
+        entry = self.cassette.get_runner(key)
+
+        if entry is None and self.mode == "record":
+            start = time.perf_counter()
+            self.real_run(cmd, cwd)
+            python = self.result_path.read_text(encoding="utf-8")
+            self.cassette.put_runner(key, python, time.perf_counter() - start)
+            return
+
+        if entry is None:
+            # Same as a runner crash: the problem goes to the fallback path
+            self.misses += 1
+            raise subprocess.CalledProcessError(1, cmd, "No cassette entry for this program.xml")
+
+        self.hits += 1
+        time.sleep(self.scale * entry["seconds"])
+        self.result_path.parent.mkdir(parents=True, exist_ok=True)
+        self.result_path.write_text(entry["python"], encoding="utf-8")
+
+
+def main(mode: str = "replay"):
+    cassette = Cassette()
+    stub = StubServer(cassette, mode, latency_from_env()).start()
+
+    # Before importing main: its clients read these when they are built
+    os.environ["OPENROUTER_BASE_URL"] = stub.url
+    if mode == "replay":
+        os.environ.setdefault("OPENROUTER_API_KEY", "replay")
+
+    import main as pipeline
+    from semantic.cascade import CASCADE
+    from semantic.llm_usage import LEDGER
+    from semantic.plan_library import PlanLibrary
+    from semantic.runner_cache import RunnerCache
+
+    CASCADE.stats.path = None
+    # Few-shot examples start empty and the runner cache is off on every
+    # run, so prompts (and cassette keys) and runner calls do not depend
+    # on earlier runs
+    pipeline.LIBRARY = PlanLibrary(None)
+    pipeline.RUNNER_CACHE = RunnerCache(max_entries=0)
+    pipeline.show_notification = lambda *args, **kwargs: None
+    pipeline.OUTPUTS = Path(tempfile.mkdtemp(prefix="bench_main_"))
+    runner = RecordedRunner(
+        cassette, mode, pipeline.run, pipeline.PROGRAM_XML_OUT,
+        ROOT / "runner" / "output" / "result.txt",
+        float(os.getenv("RUNNER_LATENCY_SCALE", "1"))
+    )
+    pipeline.run = runner
+
+    problems = json.loads((ROOT / "problems.json").read_text(encoding="utf-8"))["problems"]
+    print(f"Cassette: {len(cassette)} entries ({cassette.path}), mode {mode}")
+
+    start = time.perf_counter()
+    try:
+        pipeline.main()
+    finally:
+        elapsed = time.perf_counter() - start
+        stub.stop()
+        if mode == "record":
+            cassette.save()
+
+    usage = LEDGER.total()
+    print("\n=== bench_main ===")
+    print(f"{len(problems)} problem(s) in {elapsed:.2f} s ({len(problems) / elapsed:.2f} problems/s)")
+    print(f"LLM stub: {stub.stats().summary()}")
+    print(f"Runner:   {runner.hits} replayed, {runner.misses} missing from the cassette")
+    print(f"LLM:      {usage.summary()}")
+    print(f"Outputs:  {pipeline.OUTPUTS}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "replay")
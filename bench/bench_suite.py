@@ -0,0 +1,236 @@
+"""
+Benchmark suite: every pipeline stage, small and large inputs, plus a
+full batch against the stubbed LLM and runner
+
+Stages:
+- extract_json      semantic/json_utils.extract_json_from_text
+- validate          CapabilityValidator.validate
+- compile           SemanticCompiler.compile
+- assemble          semantic/assembler.build_program_xml
+- queue             tools/queue_manager/addqueue.build_queue_from_text
+- separate          fallback_llm/separate_xml_python.separate_xml_and_python
+- batch             main.process_problem per problem; the LLM is
+                    bench/llm_stub.py answering with synthetic plans
+                    (no latency), the runner writes a fixed program
+
+Results go to bench/results/<commit>.json (or the path given); compare
+two runs with `compare`. Synthetic inputs (bench/fixtures.py) keep the
+numbers comparable across commits.
+
+Run from the repo root:
+    python -m bench.bench_suite [results.json]
+    python -m bench.bench_suite compare before.json after.json
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from fallback_llm.separate_xml_python import separate_xml_and_python
+from semantic.assembler import build_program_xml
+from semantic.compiler import SemanticCompiler
+from semantic.ir import SemanticPlan
+from semantic.json_utils import extract_json_from_text
+from semantic.validator import CapabilityValidator
+from tools.queue_manager.addqueue import build_queue_from_text
+
+from bench.cassette import Cassette, Latency
+from bench.fixtures import (
+    SIZES, assignment_email, chat_completion, fallback_response, planner_response
+)
+from bench.llm_stub import StubServer
+
+ROOT = Path(__file__).resolve().parent.parent
+NORMALIZED_BLOCKS = ROOT / "data" / "normalized_blocks.json"
+RESULTS = ROOT / "bench" / "results"
+
+BATCH_PROBLEMS = 6
+
+# The runner's stand-in output: reads one line, like generated programs do
+RUNNER_PROGRAM = "n = input()\nprint('yes')\n"
+
+
+# -----------------------------
+# Stage cases
+# -----------------------------
+def stage_cases() -> List[Tuple[str, str, Callable[[], object]]]:
+    """(stage, size, fn) for every stage, small + large."""
+    validator = CapabilityValidator(str(NORMALIZED_BLOCKS))
+    compiler = SemanticCompiler(validator.dispatch)
+
+    plans = {"small": SIZES["small"], "large": SIZES["large"]}
+    ir = {size: SemanticPlan.from_json(plan) for size, plan in plans.items()}
+    trees = {size: compiler.compile(plan) for size, plan in ir.items()}
+    answers = {"small": planner_response(plans["small"]), "large": planner_response(plans["large"], 200)}
+    emails = {"small": assignment_email(5), "large": assignment_email(500)}
+    fallbacks = {"small": fallback_response(5), "large": fallback_response(500)}
+
+    cases = []
+    for size in ("small", "large"):
+        cases += [
+            ("extract_json", size, lambda s=size: extract_json_from_text(answers[s])),
+            ("validate", size, lambda s=size: validator.validate(plans[s])),
+            ("compile", size, lambda s=size: compiler.compile(ir[s])),
+            ("assemble", size, lambda s=size: build_program_xml(trees[s])),
+            ("queue", size, lambda s=size: build_queue_from_text(emails[s])),
+            ("separate", size, lambda s=size: separate_xml_and_python(fallbacks[s])),
+        ]
+    return cases
+
+
+def time_case(fn: Callable[[], object], repeat: int, budget: float = 0.2) -> Dict:
+    """Best-of-`repeat` seconds per call; `number` sized to ~budget per repeat."""
+    fn()
+    once = timeit.timeit(fn, number=1)
+    number = max(1, int(budget / max(once, 1e-7)))
+    best = min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+    return {"ms": best * 1e3, "number": number, "repeat": repeat}
+
+
+# -----------------------------
+# Full batch
+# -----------------------------
+def synthetic_completion(request: Dict) -> Dict:
+    # Every stage gets the plan: the expander just passes it on as text
+    return chat_completion(json.dumps(SIZES["medium"]), request.get("model", "stub"))
+
+
+def bench_batch(n_problems: int = BATCH_PROBLEMS) -> Dict:
+    scratch = Path(tempfile.mkdtemp(prefix="bench_suite_"))
+    stub = StubServer(
+        Cassette(scratch / "cassette.json"), "replay", Latency(scale=0),
+        synthesize=synthetic_completion
+    ).start()
+    os.environ["OPENROUTER_BASE_URL"] = stub.url
+    os.environ.setdefault("OPENROUTER_API_KEY", "stub")
+
+    import main as pipeline
+    from semantic.cascade import CASCADE
+    from semantic.llm_usage import LEDGER
+    from semantic.plan_library import PlanLibrary
+    from semantic.runner_cache import RunnerCache
+
+    # Keep the checkout clean: every file the batch writes goes to scratch
+    CASCADE.stats.path = None
+    # Few-shot examples start empty and the runner cache is off on every
+    # run, so prompts (and cassette keys) and runner calls do not depend
+    # on earlier runs
+    pipeline.LIBRARY = PlanLibrary(None)
+    pipeline.RUNNER_CACHE = RunnerCache(max_entries=0)
+    pipeline.show_notification = lambda *args, **kwargs: None
+    pipeline.ROOT = scratch
+    pipeline.OUTPUTS = scratch / "outputs"
+    pipeline.BLOCK_TREE_OUT = scratch / "block_tree.json"
+    pipeline.PROGRAM_XML_OUT = scratch / "program.xml"
+
+    def runner(cmd, cwd):
+        result = scratch / "runner" / "output" / "result.txt"
+        result.parent.mkdir(parents=True, exist_ok=True)
+        result.write_text(RUNNER_PROGRAM, encoding="utf-8")
+
+    pipeline.run = runner
+
+    fallbacks = []
+    original_fallback = pipeline.run_fallback
+
+    def run_fallback(*args):
+        fallbacks.append(args[2])
+        original_fallback(*args)
+
+    pipeline.run_fallback = run_fallback
+
+    usage_mark = LEDGER.mark()
+    start = time.perf_counter()
+    try:
+        for i in range(n_problems):
+            pipeline.process_problem(
+                {"problem_id": f"PID-B{i:03d}", "description": f"Synthetic problem {i}: decide yes or no."},
+                "TEAM_BENCH"
+            )
+    finally:
+        elapsed = time.perf_counter() - start
+        stub.stop()
+
+    return {
+        "problems": n_problems,
+        "seconds": elapsed,
+        "problems_per_s": n_problems / elapsed,
+        "fallbacks": len(fallbacks),
+        "llm_calls": LEDGER.total(usage_mark).calls,
+        "stub_requests": stub.stats().requests,
+    }
+
+
+# -----------------------------
+# Results
+# -----------------------------
+def commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(before_path: Path, after_path: Path):
+    before = json.loads(Path(before_path).read_text(encoding="utf-8"))
+    after = json.loads(Path(after_path).read_text(encoding="utf-8"))
+
+    print(f"{'case':<22} {before['commit']:>12} {after['commit']:>12} {'change':>8}   (ms)")
+    for name, b in before["stages"].items():
+        a = after["stages"].get(name)
+        if a is None:
+            continue
+        print(f"{name:<22} {b['ms']:>12.3f} {a['ms']:>12.3f} {b['ms'] / a['ms']:>7.2f}x")
+
+    b, a = before.get("batch"), after.get("batch")
+    if b and a:
+        print(
+            f"{'batch (problems/s)':<22} {b['problems_per_s']:>12.2f} {a['problems_per_s']:>12.2f} "
+            f"{a['problems_per_s'] / b['problems_per_s']:>7.2f}x"
+        )
+
+
+def main(out: Path = None, repeat: int = 5):
+    results = {
+        "commit": commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "stages": {},
+    }
+
+    print(f"{'case':<22} {'ms/call':>10} {'calls':>8}")
+    for stage, size, fn in stage_cases():
+        name = f"{stage}/{size}"
+        r = time_case(fn, repeat)
+        results["stages"][name] = r
+        print(f"{name:<22} {r['ms']:>10.4f} {r['number']:>8}")
+
+    batch = bench_batch()
+    results["batch"] = batch
+    print(
+        f"\nbatch: {batch['problems']} problems in {batch['seconds']:.2f} s "
+        f"({batch['problems_per_s']:.2f} problems/s), {batch['fallbacks']} fallback(s), "
+        f"{batch['llm_calls']} LLM call(s)"
+    )
+
+    out = Path(out) if out else RESULTS / f"{results['commit']}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"Results: {out}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        compare(sys.argv[2], sys.argv[3])
+    else:
+        main(sys.argv[1] if len(sys.argv) > 1 else None)
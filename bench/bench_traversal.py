@@ -0,0 +1,99 @@
+"""
+Benchmark: explicit-stack tree walkers (semantic/traversal.py)
+
+Deep synthetic programs (10k+ blocks) through validate, compile and
+the Python XML assembler, plus a recursive reference walk for the
+depths the interpreter stack still allows.
+
+Run from the repo root:
+    python -m bench.bench_traversal
+"""
+
+import io
+import sys
+import timeit
+from pathlib import Path
+
+from semantic.assembler import write_program_xml
+from semantic.compiler import SemanticCompiler
+from semantic.fused import FusedCompiler
+from semantic.ir import SemanticPlan
+from semantic.traversal import iter_blocks
+from semantic.validator import CapabilityValidator
+
+from bench.fixtures import deep_plan, synthetic_plan
+
+ROOT = Path(__file__).resolve().parent.parent
+NORMALIZED_BLOCKS = ROOT / "data" / "normalized_blocks.json"
+
+# (name, plan): one deeply nested expression / many atoms / a long chain
+CASES = {
+    "deep-300": deep_plan(300),
+    "deep-5k": deep_plan(5_000),
+    "deep-20k": deep_plan(20_000),
+    "atoms-5k": SemanticPlan.from_json(synthetic_plan(3, 0, 5_000)),
+    "chain-5k": SemanticPlan.from_json(synthetic_plan(100, 5_000, 100)),
+}
+
+
+def recursive_count(block) -> int:
+    """The recursive walk the stack-based one replaced (reference only)."""
+    if not block:
+        return 0
+    n = 1 + recursive_count(block.get("next"))
+    for key in ("value_inputs", "statement_inputs"):
+        for child in (block.get(key) or {}).values():
+            n += recursive_count(child)
+    return n
+
+
+def assemble(tree) -> int:
+    buf = io.StringIO()
+    write_program_xml(tree, buf)
+    return len(buf.getvalue())
+
+
+def best(fn, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1e3
+
+
+def main(repeat: int = 3):
+    validator = CapabilityValidator(str(NORMALIZED_BLOCKS))
+    compiler = SemanticCompiler(validator.dispatch)
+    fused = FusedCompiler(validator)
+
+    print(
+        f"{'case':<10} {'blocks':>8} {'validate':>9} {'compile':>9} {'fused':>9} "
+        f"{'assemble':>9} {'walk':>8} {'recursive walk':>15}   (ms)"
+    )
+
+    for name, plan in CASES.items():
+        # Same result on both paths, or the timings are meaningless
+        validation, tree = fused.validate_and_compile(plan)
+        assert validation == validator.validate(plan) == {"status": "ok"}, validation
+        assert assemble(tree) == assemble(compiler.compile(plan))
+
+        blocks = sum(1 for _ in iter_blocks(tree))
+
+        t_validate = best(lambda: validator.validate(plan), repeat)
+        t_compile = best(lambda: compiler.compile(plan), repeat)
+        t_fused = best(lambda: fused.validate_and_compile(plan), repeat)
+        t_assemble = best(lambda: assemble(tree), repeat)
+        t_walk = best(lambda: sum(1 for _ in iter_blocks(tree)), repeat)
+
+        try:
+            assert recursive_count(tree) == blocks
+            t_recursive = f"{best(lambda: recursive_count(tree), repeat):>15.2f}"
+        except RecursionError:
+            t_recursive = f"{'RecursionError':>15}"
+
+        print(
+            f"{name:<10} {blocks:>8} {t_validate:>9.2f} {t_compile:>9.2f} {t_fused:>9.2f} "
+            f"{t_assemble:>9.2f} {t_walk:>8.2f} {t_recursive}"
+        )
+
+    print(f"\n(recursion limit: {sys.getrecursionlimit()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Record / replay cassettes for offline pipeline runs
+
+- One JSON file per batch (data/cassettes/problems.json by default)
+- "llm": chat-completion responses keyed by the request body (model,
+  messages, sampling params; the same key single-flight uses), with
+  the latency measured when they were recorded
+- "runner": Python generated by runner/runner_execute.js, keyed by the
+  SHA-256 of the program.xml it was given
+- Replay latency is deterministic: fixed + scale x recorded + a jitter
+  fraction derived from the key, so reruns sleep exactly the same
+
+Recorded by bench/llm_stub.py (LLM) and bench/bench_main.py (runner).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from semantic.single_flight import request_key
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CASSETTE = ROOT / "data" / "cassettes" / "problems.json"
+
+# Fields that do not change the answer
+IGNORED_FIELDS = ("stream", "user")
+
+
+@dataclass(frozen=True, slots=True)
+class Latency:
+    fixed: float = 0.0      # seconds added to every reply
+    scale: float = 1.0      # x the latency measured when recording
+    jitter: float = 0.0     # up to this many seconds more, fixed per key
+
+    def delay(self, key: str, recorded: float) -> float:
+        fraction = int(key[:8], 16) / 0xFFFFFFFF if self.jitter else 0.0
+        return max(0.0, self.fixed + self.scale * recorded + self.jitter * fraction)
+
+
+class Cassette:
+    def __init__(self, path: Path = DEFAULT_CASSETTE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Any]] = {"llm": {}, "runner": {}}
+        if self.path.exists():
+            loaded = json.loads(self.path.read_text(encoding="utf-8"))
+            for section in self._data:
+                self._data[section].update(loaded.get(section, {}))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self._data.values())
+
+    # -----------------------------
+    # LLM
+    # -----------------------------
+    @staticmethod
+    def llm_key(request: Dict[str, Any]) -> str:
+        return request_key(**{k: v for k, v in request.items() if k not in IGNORED_FIELDS})
+
+    def get_llm(self, key: str) -> Optional[Dict[str, Any]]:
+        """{"response": ..., "seconds": ...} or None."""
+        with self._lock:
+            return self._data["llm"].get(key)
+
+    def put_llm(self, key: str, request: Dict[str, Any], response: Dict[str, Any], seconds: float):
+        with self._lock:
+            self._data["llm"][key] = {
+                "model": request.get("model"),
+                "response": response,
+                "seconds": round(seconds, 3),
+            }
+
+    # -----------------------------
+    # Runner
+    # -----------------------------
+    @staticmethod
+    def runner_key(xml: str) -> str:
+        return hashlib.sha256(xml.encode("utf-8")).hexdigest()
+
+    def get_runner(self, key: str) -> Optional[Dict[str, Any]]:
+        """{"python": ..., "seconds": ...} or None."""
+        with self._lock:
+            return self._data["runner"].get(key)
+
+    def put_runner(self, key: str, python: str, seconds: float):
+        with self._lock:
+            self._data["runner"][key] = {"python": python, "seconds": round(seconds, 3)}
+
+    def save(self):
+        with self._lock:
+            blob = json.dumps(self._data, indent=2, sort_keys=True)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(blob, encoding="utf-8")
+        os.replace(tmp, self.path)
@@ -0,0 +1,145 @@
+"""
+Synthetic inputs for the benchmarks in bench/
+
+Deterministic (no randomness, no network) so numbers are comparable
+across commits.
+"""
+
+import json
+from typing import Any, Dict
+
+from semantic.ir import (
+    Action, Actions, Condition, ConditionAtom, DerivedVar, Expression, InputVar, SemanticPlan
+)
+
+
+ARITH_OPS = ["+", "-", "*", "/"]
+COMPARATORS = [">", "<", ">=", "<=", "==", "!="]
+
+
+def synthetic_plan(n_inputs: int = 3, n_derived: int = 2, n_conditions: int = 2) -> Dict:
+    """
+    Builds a valid semantic plan in the SEMANTIC_PLAN_SCHEMA shape
+    with the requested number of inputs / derived vars / condition atoms.
+    """
+    inputs = [{"name": f"in_{i}", "type": "int"} for i in range(n_inputs)]
+    names = [i["name"] for i in inputs] or ["in_0"]
+
+    derived = []
+    for i in range(n_derived):
+        derived.append({
+            "name": f"d_{i}",
+            "expression": {
+                "op": ARITH_OPS[i % len(ARITH_OPS)],
+                "args": [names[i % len(names)], i + 1]
+            }
+        })
+        names.append(f"d_{i}")
+
+    conditions = [
+        {
+            "left": names[i % len(names)],
+            "op": COMPARATORS[i % len(COMPARATORS)],
+            "right": i
+        }
+        for i in range(n_conditions)
+    ]
+
+    return {
+        "inputs": inputs,
+        "derived": derived,
+        "condition": {"op": "and", "conditions": conditions},
+        "actions": {
+            "then": [{"type": "print", "value": "yes"}],
+            "else": [{"type": "print", "value": "no"}]
+        }
+    }
+
+
+def deep_plan(depth: int) -> SemanticPlan:
+    """
+    One derived variable whose expression nests `depth` levels deep:
+    in_0 + (1 - (in_0 * (2 + ...))). Built as IR directly: a JSON
+    document this deep is beyond the (recursive) json parser.
+    """
+    expr = "in_0"
+    for i in range(depth):
+        expr = Expression(ARITH_OPS[i % 3], [expr, i + 1] if i % 2 else [i + 1, expr])
+
+    return SemanticPlan(
+        inputs=[InputVar("in_0", "int")],
+        derived=[DerivedVar("d_0", expr)],
+        condition=Condition("and", [ConditionAtom("d_0", ">", 0)]),
+        actions=Actions(
+            then=[Action("print", "yes")],
+            else_=[Action("print", "no")]
+        )
+    )
+
+
+SIZES = {
+    "small": synthetic_plan(3, 2, 2),
+    "medium": synthetic_plan(20, 50, 20),
+    "large": synthetic_plan(100, 400, 100),
+}
+
+
+# -----------------------------
+# Text the pipeline parses (LLM answers, assignment emails)
+# -----------------------------
+def planner_response(plan: Dict, prose_lines: int = 2) -> str:
+    """A plan the way chat models return it: prose, then a ```json fence."""
+    prose = "\n".join(
+        f"Step {i}: map {{input_{i}}} onto the plan shape." for i in range(prose_lines)
+    )
+    return f"{prose}\n\n```json\n{json.dumps(plan, indent=2)}\n```\nDone."
+
+
+def fallback_response(n_statements: int) -> str:
+    """Fallback answer with XML + Python as plain text (no JSON)."""
+    blocks = "".join(
+        f'<block type="text_print"><value name="TEXT"><block type="text">'
+        f'<field name="TEXT">line {i}</field></block></value></block>'
+        for i in range(n_statements)
+    )
+    python = "\n".join(f"x_{i} = {i} * 2\nprint(x_{i})" for i in range(n_statements))
+    return (
+        "Here is the solution.\n\n"
+        f'<xml xmlns="https://developers.google.com/blockly/xml">{blocks}</xml>\n\n'
+        f"```python\nn = int(input())\n{python}\n```\n"
+    )
+
+
+def assignment_email(n_problems: int) -> str:
+    """Assignment email in the "1. statement (PID-XXXX)" format."""
+    lines = [
+        "Subject: Problem assignment",
+        "From: coordinator@example.com",
+        "TEAM_ID0602",
+        "=" * 40,
+        "Hello team,",
+        "You have been assigned the following problems:",
+        "",
+    ]
+    for i in range(n_problems):
+        lines.append(f"{i + 1}. Problem statement number {i} about scheduling jobs (PID-{7000 + i})")
+        if i % 3 == 0:
+            lines.append("  with a second line continuing the statement.")
+    return "\n".join(lines) + "\n"
+
+
+def chat_completion(content: str, model: str = "stub") -> Dict[str, Any]:
+    """An OpenAI chat.completion body around `content`."""
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": 0,
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    }
+
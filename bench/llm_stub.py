@@ -0,0 +1,218 @@
+"""
+Local OpenAI-compatible stub server (POST /v1/chat/completions)
+
+- replay: answers from a cassette (bench/cassette.py) after the
+  injected latency; a request with no recording gets a 404, which the
+  pipeline treats like any failed LLM call (fallback path), unless a
+  `synthesize` function makes up the answer (synthetic benchmarks)
+- record: replays what the cassette already has, forwards the rest to
+  the real endpoint and records the answer with its latency
+- No network access in replay mode: point the pipeline at it with
+  OPENROUTER_BASE_URL=http://127.0.0.1:<port>/v1
+
+Run from the repo root (Ctrl-C saves a recording):
+    python -m bench.llm_stub [replay|record] [port]
+
+Latency knobs (seconds, see cassette.Latency):
+    STUB_LATENCY=0 STUB_LATENCY_SCALE=1 STUB_JITTER=0
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+from bench.cassette import Cassette, Latency
+from semantic.llm_usage import DEFAULT_BASE_URL
+
+MODES = ("replay", "record")
+UPSTREAM_TIMEOUT = 120
+
+
+@dataclass(frozen=True, slots=True)
+class StubStats:
+    requests: int
+    hits: int
+    misses: int
+    synthesized: int
+    recorded: int
+    upstream_errors: int
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests} request(s): {self.hits} replayed, {self.recorded} recorded, "
+            f"{self.synthesized} synthesized, {self.misses} missing from the cassette, "
+            f"{self.upstream_errors} upstream error(s)"
+        )
+
+
+def latency_from_env() -> Latency:
+    return Latency(
+        fixed=float(os.getenv("STUB_LATENCY", "0")),
+        scale=float(os.getenv("STUB_LATENCY_SCALE", "1")),
+        jitter=float(os.getenv("STUB_JITTER", "0"))
+    )
+
+
+class StubServer:
+    def __init__(
+        self,
+        cassette: Cassette,
+        mode: str = "replay",
+        latency: Latency = Latency(),
+        upstream: str = DEFAULT_BASE_URL,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        synthesize: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+        sleep=time.sleep
+    ):
+        # synthesize(request) -> chat.completion dict, for replay misses
+        if mode not in MODES:
+            raise ValueError(f"Unknown stub mode '{mode}' (expected one of {', '.join(MODES)})")
+
+        self.cassette = cassette
+        self.mode = mode
+        self.latency = latency
+        self.upstream = upstream.rstrip("/")
+        self.synthesize = synthesize
+        self._sleep = sleep
+
+        self._lock = threading.Lock()
+        self._counts = {"requests": 0, "hits": 0, "misses": 0, "synthesized": 0, "recorded": 0, "upstream_errors": 0}
+
+        self._server = ThreadingHTTPServer((host, port), _handler(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="llm-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self.mode == "record":
+            self.cassette.save()
+
+    def stats(self) -> StubStats:
+        with self._lock:
+            return StubStats(**self._counts)
+
+    # -----------------------------
+    # Request handling
+    # -----------------------------
+    def respond(self, body: bytes, authorization: Optional[str]):
+        """(status, JSON body) for one chat-completion request."""
+        self._count("requests")
+        request = json.loads(body or b"{}")
+        key = Cassette.llm_key(request)
+
+        entry = self.cassette.get_llm(key)
+        if entry is not None:
+            self._count("hits")
+            self._sleep(self.latency.delay(key, entry["seconds"]))
+            return 200, entry["response"]
+
+        if self.mode == "replay" and self.synthesize is not None:
+            self._count("synthesized")
+            self._sleep(self.latency.delay(key, 0.0))
+            return 200, self.synthesize(request)
+
+        if self.mode == "replay":
+            self._count("misses")
+            return 404, _error(f"No cassette entry for this {request.get('model')} request", "cassette_miss")
+
+        start = time.perf_counter()
+        status, response = self._forward(body, authorization)
+        if status != 200:
+            self._count("upstream_errors")
+            return status, response
+
+        self.cassette.put_llm(key, request, response, time.perf_counter() - start)
+        self._count("recorded")
+        return 200, response
+
+    def _forward(self, body: bytes, authorization: Optional[str]):
+        headers = {"Content-Type": "application/json"}
+        if authorization:
+            headers["Authorization"] = authorization
+
+        request = urllib.request.Request(
+            f"{self.upstream}/chat/completions", data=body, headers=headers, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=UPSTREAM_TIMEOUT) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                return e.code, json.loads(e.read())
+            except ValueError:
+                return e.code, _error(str(e), "upstream_error")
+        except (urllib.error.URLError, TimeoutError, ValueError) as e:
+            return 502, _error(str(e), "upstream_error")
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+
+def _error(message: str, kind: str):
+    return {"error": {"message": message, "type": kind}}
+
+
+def _handler(stub: StubServer):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._reply(404, _error(f"Unknown path {self.path}", "not_found"))
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                status, payload = stub.respond(self.rfile.read(length), self.headers.get("Authorization"))
+            except ValueError as e:
+                status, payload = 400, _error(f"Bad request body: {e}", "invalid_request_error")
+            self._reply(status, payload)
+
+        def _reply(self, status: int, payload):
+            blob = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(blob)))
+            self.end_headers()
+            self.wfile.write(blob)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else "replay"
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8765
+
+    cassette = Cassette()
+    stub = StubServer(cassette, mode, latency_from_env(), port=port).start()
+    print(f"LLM stub ({mode}, {len(cassette)} cassette entries) at {stub.url}")
+    print(f"    OPENROUTER_BASE_URL={stub.url} python main.py")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.stop()
+        print(f"\nLLM stub: {stub.stats().summary()}")
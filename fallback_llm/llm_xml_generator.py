@@ -1,14 +1,19 @@
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from semantic.cascade import CASCADE
 from semantic.json_utils import extract_json_from_text
+from semantic.llm_usage import base_url, create_chat_completion
 from fallback_llm.separate_xml_python import separate_xml_and_python
 load_dotenv()
 
 class FallbackGenerationError(Exception):
     pass
 
+# Built once: a byte-identical prefix on every call (provider prompt cache)
+@lru_cache(maxsize=None)
 def system_prompt() -> str:
     return (
         "You are a fallback code generator for a Blockly-based programming platform.\n\n"
@@ -58,13 +63,17 @@ def generate_fallback_outputs(problem_text: str):
         )
 
     client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key
+        base_url=base_url(),
+        api_key=api_key,
+        # Retries + backoff are done by semantic/rate_limit.py
+        max_retries=0
     )
 
-    try:
-        response = client.chat.completions.create(
-            model="qwen/qwen-2.5-7b-instruct",
+    def attempt(model: str) -> str:
+        response = create_chat_completion(
+            client,
+            "fallback",
+            model=model,
             messages=[
                 {"role": "system", "content": system_prompt()},
                 {"role": "user", "content": user_prompt(problem_text)}
@@ -72,8 +81,11 @@ def generate_fallback_outputs(problem_text: str):
             temperature=0,
             max_tokens=1200
         )
+        return response.choices[0].message.content
 
-        raw = response.choices[0].message.content
+    # The next model in the cascade only if this answer has no JSON outputs
+    try:
+        raw = CASCADE.run("fallback", attempt, accept=_has_json_outputs)
 
     except Exception as e:
         return (
@@ -125,3 +137,11 @@ def generate_fallback_outputs(problem_text: str):
         )
         
        
+
+
+def _has_json_outputs(raw) -> bool:
+    try:
+        data = extract_json_from_text(raw or "")
+    except Exception:
+        return False
+    return isinstance(data, dict) and bool(data.get("xml")) and bool(data.get("python"))
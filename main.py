@@ -1,12 +1,26 @@
+import copy
 import json
+import os
 import subprocess
 from pathlib import Path
 import sys
 import plyer
 
-from semantic.planner import generate_semantic_plan, SemanticPlannerError
+from semantic.planner import (
+    generate_plan_candidates, generate_semantic_plan, repair_semantic_plan, SemanticPlannerError
+)
+from semantic.candidates import select_plan
+from semantic.repair import PlanRepairer, RepairTotals
+from semantic.llm_usage import CONTROLLER, FLIGHTS, HEDGER, LEDGER
+from semantic.cascade import CASCADE
+from semantic.plan_library import PlanLibrary
+from semantic.runner_cache import MAX_ENTRIES, VERIFY_RATE, RunnerCache
 from semantic.validator import CapabilityValidator
 from semantic.compiler import SemanticCompiler
+from semantic.ir import SemanticPlan
+from semantic.optimizer import PlanOptimizer
+from semantic.assembler import write_program_file
+from sandbox.executor import fixtures_for_inputs, format_bug_report, generic_fixtures, smoke_test
 from fallback_llm.llm_xml_generator import generate_fallback_outputs
 # from fallback_llm.fallback_writer import write_fallback_outputs
 
@@ -23,6 +37,64 @@ OUTPUTS = ROOT / "outputs"
 
 NORMALIZED_BLOCKS = ROOT / "data" / "normalized_blocks.json"
 BLOCK_TREE_OUT = ROOT / "semantic" / "output" / "block_tree.json"
+PROGRAM_XML_OUT = ROOT / "assembler" / "output" / "program.xml"
+
+# core | extended (loops, lists, functions); see semantic/dispatch.py
+CAPABILITY_TIER = os.getenv("CAPABILITY_TIER", "core")
+
+# >1: ask the planner for several candidate plans in one call and keep the
+# first that validates + compiles (semantic/candidates.py)
+PLAN_CANDIDATES = int(os.getenv("PLAN_CANDIDATES", "1"))
+PLAN_CANDIDATE_MODE = os.getenv("PLAN_CANDIDATE_MODE", "n")   # n | array
+
+# Similar solved problems shown to the planner (semantic/plan_library.py);
+# 0: zero-shot. Problems that pass the strict pipeline are added.
+FEW_SHOT_K = int(os.getenv("FEW_SHOT_K", "3"))
+LIBRARY = PlanLibrary()
+
+# A restated solved problem (shingle Jaccard >= this, same numbers,
+# operators, literals and content words) reuses its plan, re-validated +
+# recompiled, with no LLM call. Opt-in: 0 (default) disables, 0.95 keeps
+# it to rewordings in case and punctuation
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0"))
+NEAR_DUPLICATES = []   # problem ids served from the library this batch
+
+# Delta-prompt rounds after local fixes fail (0: local fixes only)
+REPAIR_LLM_ROUNDS = int(os.getenv("REPAIR_LLM_ROUNDS", "1"))
+
+# Batch-wide repair success rate + latency (printed after the batch)
+REPAIR_TOTALS = RepairTotals()
+
+# Shared LLM budget (semantic/rate_limit.py): concurrency ceiling for the
+# AIMD controller, optional requests / second cap
+CONTROLLER.configure(
+    max_limit=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+    rate=float(os.getenv("LLM_RATE_LIMIT", "0")) or None
+)
+
+# Opt-in hedging (semantic/hedging.py): e.g. LLM_HEDGE_PERCENTILE=0.95 fires a
+# duplicate request once one runs longer than 95% of that stage's requests
+# did; LLM_HEDGE_MODEL sends the duplicate to another model
+HEDGER.configure(
+    percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "0")) or None,
+    hedge_model=os.getenv("LLM_HEDGE_MODEL") or None
+)
+
+# program.xml -> Python, content-addressed (semantic/runner_cache.py): the
+# browser runner only runs for XML it has not seen; RUNNER_CACHE_VERIFY of
+# the hits re-run it anyway to catch stale entries. RUNNER_CACHE_SIZE=0: off
+RUNNER_CACHE = RunnerCache(
+    max_entries=int(os.getenv("RUNNER_CACHE_SIZE", str(MAX_ENTRIES))),
+    verify_rate=float(os.getenv("RUNNER_CACHE_VERIFY", str(VERIFY_RATE)))
+)
+
+# Per-stage model cascades (semantic/cascade.py), cheap model first; the
+# defaults live in data/model_cascade.json. Override a stage with e.g.
+# MODEL_CASCADE_PLANNER="openai/gpt-4o-mini,openai/gpt-4o"
+for _stage in ("expander", "planner", "fallback"):
+    _models = os.getenv(f"MODEL_CASCADE_{_stage.upper()}")
+    if _models:
+        CASCADE.configure(_stage, [m.strip() for m in _models.split(",") if m.strip()])
 
 
 # -------------------------
@@ -31,29 +103,81 @@ BLOCK_TREE_OUT = ROOT / "semantic" / "output" / "block_tree.json"
 def run_single_test(problem_text: str):
     print("🧪 Running single test mode")
 
-    semantic_plan = generate_semantic_plan(problem_text)
+    semantic_plan = generate_semantic_plan(problem_text, CAPABILITY_TIER)
+    CASCADE.stats.save()
     print(semantic_plan)
 
-    validator = CapabilityValidator(str(NORMALIZED_BLOCKS))
+    # Parse once; validator + compiler share the typed IR
+    semantic_plan = SemanticPlan.from_json(semantic_plan)
+
+    validator = CapabilityValidator(str(NORMALIZED_BLOCKS), CAPABILITY_TIER)
     v = validator.validate(semantic_plan)
     print("Validator:", v)
 
     if v["status"] != "ok":
         raise RuntimeError("Capability validation failed")
 
-    compiler = SemanticCompiler()
+    semantic_plan, opt_stats = PlanOptimizer(validator.dispatch).optimize(semantic_plan)
+    print("Optimizer:", opt_stats.summary())
+
+    compiler = SemanticCompiler(validator.dispatch)
     block_tree = compiler.compile(semantic_plan)
 
     BLOCK_TREE_OUT.parent.mkdir(parents=True, exist_ok=True)
     BLOCK_TREE_OUT.write_text(json.dumps(block_tree, indent=2), encoding='utf-8')
     print("Wrote block_tree.json")
 
-    run(["node", "generate_xml.js"], cwd=ROOT / "assembler")
+    write_program_file(block_tree, PROGRAM_XML_OUT)
     print("XML generated")
 
     run(["node", "runner_execute.js"], cwd=ROOT / "runner")
     print("Runner completed")
 
+def plan_from_candidates(description: str, validator: CapabilityValidator, examples=()):
+    """
+    One planner call, several candidate plans; returns the first that
+    validates + compiles (as IR). When none does, returns the
+    not_expressible answer or the first candidate's error as a plan dict,
+    so the caller reports it like a single-plan failure.
+    """
+    candidates = generate_plan_candidates(
+        description, CAPABILITY_TIER, PLAN_CANDIDATES, PLAN_CANDIDATE_MODE, examples
+    )
+    selection = select_plan(candidates, validator)
+    print(f"Candidates: {selection.summary()}")
+
+    if selection.chosen is not None:
+        return selection.chosen.plan
+    if selection.not_expressible:
+        return {"error": "not_expressible"}
+    # First candidate as-is: validation reports its error below
+    return candidates[0]
+
+def reuse_near_duplicate(description: str, validator: CapabilityValidator):
+    """
+    The stored plan of a solved problem this one restates, if it still
+    validates (local fixes allowed); else None and the planner runs.
+    """
+    if NEAR_DUP_THRESHOLD <= 0:
+        return None
+    match = LIBRARY.near_duplicate(description, CAPABILITY_TIER, NEAR_DUP_THRESHOLD)
+    if match is None:
+        return None
+
+    repair = PlanRepairer(validator).repair(copy.deepcopy(match.plan))
+    if not repair.ok:
+        print(f"Near-duplicate of {match.problem_id}: stored plan no longer validates ({repair.validation['reason']})")
+        return None
+
+    print(f"Near-duplicate of {match.problem_id} ({match.score:.0%} similar): reusing its plan, skipping the LLM")
+    return repair.plan
+
+def few_shot_examples(description: str):
+    examples = LIBRARY.search(description, FEW_SHOT_K, CAPABILITY_TIER)
+    if examples:
+        print("Few-shot: " + ", ".join(f"{e.problem_id} ({e.score:.1f})" for e in examples))
+    return examples
+
 def run_fallback(problem_dir: Path, team_id: str, pid: str, description: str):
     print("⚠️ Running LLM fallback pipeline")
 
@@ -68,10 +192,13 @@ def run_fallback(problem_dir: Path, team_id: str, pid: str, description: str):
     py_dst = problem_dir / f"{team_id}_Mem1_{pid}.txt"
     bug_dst = problem_dir / f"{team_id}_Mem1_{pid}_bug.txt"
 
+    # Fallback is the last resort: record the smoke result, don't gate on it
+    bug_report = format_bug_report(smoke_test(python_code, generic_fixtures()), "fallback")
+
     try:
         xml_dst.write_text(xml, encoding='utf-8')
         py_dst.write_text(python_code, encoding='utf-8')
-        bug_dst.write_text("Generated via fallback LLM (no validation)\n", encoding='utf-8')
+        bug_dst.write_text(f"Generated via fallback LLM\n{bug_report}", encoding='utf-8')
     except UnicodeEncodeError as e:
         # Last resort: replace problematic characters
         print(f"⚠️ Unicode encoding issue detected, applying safe encoding for {pid}")
@@ -79,7 +206,7 @@ def run_fallback(problem_dir: Path, team_id: str, pid: str, description: str):
         xml_safe = xml.encode('utf-8', errors='replace').decode('utf-8')
         xml_dst.write_text(xml_safe, encoding='utf-8')
         py_dst.write_text(python_code_safe, encoding='utf-8')
-        bug_dst.write_text(f"Generated via fallback LLM (no validation)\nUnicode issues handled: {e}\n", encoding='utf-8')
+        bug_dst.write_text(f"Generated via fallback LLM\n{bug_report}Unicode issues handled: {e}\n", encoding='utf-8')
 
     print(f"🟡 Fallback output written for {pid}")
     show_notification(f"FallBack Completed", f"Fallback output written for {pid}")
@@ -110,13 +237,31 @@ def process_problem(problem: dict, team_id: str):
     problem_dir = OUTPUTS / f"Problem_{pid}"
     problem_dir.mkdir(parents=True, exist_ok=True)
 
+    usage_mark = LEDGER.mark()
+
     try:
         # =========================
         # MODULE 1: Semantic Planner
         # =========================
-        semantic_plan = generate_semantic_plan(description)
-
-        if semantic_plan.get("error"):
+        validator = CapabilityValidator(str(NORMALIZED_BLOCKS), CAPABILITY_TIER)
+
+        reused = reuse_near_duplicate(description, validator)
+
+        if reused is not None:
+            NEAR_DUPLICATES.append(pid)
+            semantic_plan = reused
+        elif PLAN_CANDIDATES > 1:
+            semantic_plan = plan_from_candidates(description, validator, few_shot_examples(description))
+        else:
+            # Escalate to the next planner model unless the plan validates
+            # (local fixes allowed: they cost no LLM call)
+            semantic_plan = generate_semantic_plan(
+                description, CAPABILITY_TIER,
+                accept=lambda plan: not plan.get("error") and PlanRepairer(validator).repair(plan).ok,
+                examples=few_shot_examples(description)
+            )
+
+        if isinstance(semantic_plan, dict) and semantic_plan.get("error"):
             show_notification(f"Semantic Error", f"{semantic_plan['error']}")
             raise RuntimeError(f"Semantic error: {semantic_plan['error']}")
 
@@ -124,9 +269,17 @@ def process_problem(problem: dict, team_id: str):
 
         # =========================
         # MODULE 2: Capability Validator
+        # (+ repair: local fixes, then a delta prompt to the planner)
         # =========================
-        validator = CapabilityValidator(str(NORMALIZED_BLOCKS))
-        validation = validator.validate(semantic_plan)
+        repairer = PlanRepairer(
+            validator,
+            lambda plan, reason: repair_semantic_plan(description, plan, reason, CAPABILITY_TIER),
+            max_llm_rounds=REPAIR_LLM_ROUNDS
+        )
+        repair = repairer.repair(semantic_plan)
+        REPAIR_TOTALS.add(repair)
+        print(f"Repair: {repair.summary()}")
+        validation = repair.validation
 
         if validation["status"] != "ok":
             show_notification(f"Validated Blocks", "compiling...")
@@ -134,10 +287,20 @@ def process_problem(problem: dict, team_id: str):
         
         show_notification(f"Validated Blocks", "compiling...")
 
+        # Parse once; optimizer + compiler share the typed IR
+        semantic_plan = SemanticPlan.from_json(repair.plan)
+        validated_plan = semantic_plan.to_json()
+
+        # =========================
+        # OPTIMIZER: fold constants, drop dead derived variables
+        # =========================
+        semantic_plan, opt_stats = PlanOptimizer(validator.dispatch).optimize(semantic_plan)
+        print(f"Optimizer: {opt_stats.summary()}")
+
         # =========================
         # MODULE 3: Semantic Compiler
         # =========================
-        compiler = SemanticCompiler()
+        compiler = SemanticCompiler(validator.dispatch)
         block_tree = compiler.compile(semantic_plan)
 
         BLOCK_TREE_OUT.parent.mkdir(parents=True, exist_ok=True)
@@ -147,35 +310,46 @@ def process_problem(problem: dict, team_id: str):
 
         # =========================
         # MODULE 4: XML Generator
+        # (Python port of assembler/xml_builder.js, same output)
         # =========================
-        run(
-            ["node", "generate_xml.js"],
-            cwd=ROOT / "assembler"
-        )
+        write_program_file(block_tree, PROGRAM_XML_OUT)
 
         # =========================
         # EXECUTION: CodeAsthram
         # =========================
-        run(
-            ["node", "runner_execute.js"],
-            cwd=ROOT / "runner"
-        )
-
-        show_notification(f"Opening CodeAsthram", "executing...")
+        def execute_runner():
+            run(
+                ["node", "runner_execute.js"],
+                cwd=ROOT / "runner"
+            )
+            show_notification(f"Opening CodeAsthram", "executing...")
+            return (ROOT / "runner" / "output" / "result.txt").read_text(encoding='utf-8')
 
         # =========================
         # COLLECT OUTPUTS
+        # (the runner only runs for program.xml it has not seen)
         # =========================
-        xml_src = ROOT / "assembler" / "output" / "program.xml"
-        py_src = ROOT / "runner" / "output" / "result.txt"
+        xml_src = PROGRAM_XML_OUT
+        python_code = RUNNER_CACHE.run(xml_src.read_text(encoding='utf-8'), execute_runner)
+
+        # =========================
+        # SMOKE TEST: run the program before accepting it
+        # =========================
+        report = smoke_test(python_code, fixtures_for_inputs(semantic_plan.inputs))
+        if not report.passed:
+            failed = report.first_problem()
+            raise RuntimeError(f"Smoke test failed ({report.summary()}): {failed.error_line()}")
 
         xml_dst = problem_dir / f"{team_id}_Mem1_{pid}.xml"
         py_dst = problem_dir / f"{team_id}_Mem1_{pid}.txt"
         bug_dst = problem_dir / f"{team_id}_Mem1_{pid}_bug.txt"
 
         xml_dst.write_text(xml_src.read_text(encoding='utf-8'), encoding='utf-8')
-        py_dst.write_text(py_src.read_text(encoding='utf-8'), encoding='utf-8')
-        bug_dst.write_text("No bugs detected\n", encoding='utf-8')
+        py_dst.write_text(python_code, encoding='utf-8')
+        bug_dst.write_text(format_bug_report(report), encoding='utf-8')
+
+        # Few-shot material for similar problems later on
+        LIBRARY.add(pid, description, validated_plan, CAPABILITY_TIER)
 
         print(f"✅ Problem {pid} completed (strict)")
         show_notification(f"{pid} Completed", "Loading next problem...")
@@ -185,6 +359,10 @@ def process_problem(problem: dict, team_id: str):
         show_notification(f"Pipeline failed: {pid}", f"{e}")
         run_fallback(problem_dir, team_id, pid, description)
 
+    # Once per problem: every cascade attempt only marks the stats dirty
+    CASCADE.stats.save()
+    print(f"📊 LLM usage ({pid}):\n{LEDGER.summary(usage_mark)}")
+
 # def process_problem(problem: dict, team_id: str):
 #     pid = problem["problem_id"]
 #     description = problem["description"]
@@ -240,6 +418,19 @@ def main():
     for problem in problems["problems"]:
         process_problem(problem, team_id)
 
+    print(f"\n🔧 Plan repair: {REPAIR_TOTALS.summary()}")
+    print(f"♻️ Near-duplicates: {len(NEAR_DUPLICATES)}/{len(problems['problems'])} problem(s) reused a stored plan")
+
+    print(f"📊 LLM usage (batch):\n{LEDGER.summary()}")
+    print(f"🔁 Identical in-flight LLM requests: {FLIGHTS.stats().summary()}")
+    print(f"🚦 LLM rate limiting: {CONTROLLER.stats().summary()}")
+    if HEDGER.enabled:
+        print(f"🏁 LLM hedging: {HEDGER.stats().summary()}")
+    if RUNNER_CACHE.enabled:
+        print(f"🗃️ Runner cache: {RUNNER_CACHE.stats().summary()}")
+    print(f"🪜 Model cascade:\n{CASCADE.stats.summary()}")
+    (OUTPUTS / "llm_usage.json").write_text(json.dumps(LEDGER.to_json(), indent=2), encoding='utf-8')
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,214 @@
+# run_conformance.py
+"""
+Conformance check: Python XML assembler vs. Node assembler
+
+For every program.xml-style file under outputs/:
+1) Parse it back into a block tree
+2) Re-assemble it with semantic/assembler.py (Python)
+3) Re-assemble it with assembler/xml_builder.js (Node, one process)
+4) Require Python == Node == file on disk
+
+Files that are not in the Node assembler's dialect (fallback LLM XML)
+are reported as skipped.
+
+SYNTHETIC_CASES cover what no file does yet (XML special characters in
+field text and attributes): Python == Node, and the text parses back
+unchanged.
+
+Run from the repo root:
+    python run_conformance.py
+"""
+
+import json
+import shutil
+import subprocess
+import sys
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from semantic.assembler import build_program_xml
+
+ROOT = Path(__file__).parent
+OUTPUTS = ROOT / "outputs"
+
+NODE_BUILD = """
+import { buildProgramXML } from "./xml_builder.js";
+
+let data = "";
+process.stdin.on("data", chunk => data += chunk);
+process.stdin.on("end", () => {
+  const out = JSON.parse(data).map(tree => {
+    try {
+      return `
+<xml xmlns="https://developers.google.com/blockly/xml">
+${buildProgramXML(tree)}
+</xml>
+`.trim();
+    } catch (e) {
+      return null;
+    }
+  });
+  process.stdout.write(JSON.stringify(out));
+});
+"""
+
+
+# Field text / attribute values with every character XML escapes
+SPECIAL_TEXT = 'a < b && c > "d" \'e\''
+
+SYNTHETIC_CASES: Dict[str, Dict] = {
+    "escaped-field": {
+        "type": "text_print",
+        "value_inputs": {"TEXT": {"type": "text", "fields": {"TEXT": SPECIAL_TEXT}}},
+    },
+    "escaped-attribute": {
+        "type": "procedures_callnoreturn",
+        "mutation": {"name": SPECIAL_TEXT},
+        "fields": {"NAME": SPECIAL_TEXT},
+    },
+}
+
+
+class DialectError(Exception):
+    pass
+
+
+# -------------------------
+# XML → block tree
+# -------------------------
+def _tag(el) -> str:
+    return el.tag.rsplit("}", 1)[-1]
+
+
+def parse_block(el) -> Dict:
+    if _tag(el) != "block" or set(el.attrib) != {"type"}:
+        raise DialectError(f"unexpected element <{_tag(el)}>")
+
+    block = {"type": el.get("type")}
+    fields, values, statements = {}, {}, {}
+
+    for child in el:
+        tag = _tag(child)
+        if tag == "mutation":
+            block["mutation"] = dict(child.attrib)
+            continue
+        if tag == "field":
+            fields[child.get("name")] = child.text or ""
+            continue
+
+        if len(child) != 1:
+            raise DialectError(f"<{tag}> must wrap exactly one block")
+
+        if tag == "value":
+            values[child.get("name")] = parse_block(child[0])
+        elif tag == "statement":
+            statements[child.get("name")] = parse_block(child[0])
+        elif tag == "next":
+            block["next"] = parse_block(child[0])
+        else:
+            raise DialectError(f"unexpected element <{tag}>")
+
+    if fields:
+        block["fields"] = fields
+    if values:
+        block["value_inputs"] = values
+    if statements:
+        block["statement_inputs"] = statements
+
+    # `next` goes last, like the compiler output
+    if "next" in block:
+        block["next"] = block.pop("next")
+
+    return block
+
+
+def parse_program(text: str) -> Union[Dict, List[Dict]]:
+    try:
+        root = ET.fromstring(text)
+    except ET.ParseError as e:
+        raise DialectError(f"not well-formed: {e}")
+
+    if _tag(root) != "xml" or len(root) == 0:
+        raise DialectError("expected at least one top-level block")
+
+    # Several top-level blocks: main chain + function definitions
+    if len(root) > 1:
+        return [parse_block(el) for el in root]
+    return parse_block(root[0])
+
+
+# -------------------------
+# Node side (single process for all trees)
+# -------------------------
+def node_build_all(trees: List[Dict]) -> Optional[List[Optional[str]]]:
+    if shutil.which("node") is None:
+        return None
+
+    result = subprocess.run(
+        ["node", "--input-type=module", "-e", NODE_BUILD],
+        cwd=ROOT / "assembler",
+        input=json.dumps(trees),
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        check=True
+    )
+    return json.loads(result.stdout)
+
+
+# -------------------------
+# Main
+# -------------------------
+def main() -> int:
+    files = sorted(OUTPUTS.glob("*/*.xml"))
+    cases = []
+    skipped = []
+
+    for f in files:
+        text = f.read_text(encoding="utf-8")
+        try:
+            cases.append((f, text, parse_program(text)))
+        except DialectError as e:
+            skipped.append((f, str(e)))
+
+    node_out = node_build_all([tree for _, _, tree in cases] + list(SYNTHETIC_CASES.values()))
+    if node_out is None:
+        print("⚠️ node not found: comparing Python output with files on disk only")
+
+    failed = 0
+    for i, (f, text, tree) in enumerate(cases):
+        py_xml = build_program_xml(tree)
+        node_xml = node_out[i] if node_out is not None else py_xml
+
+        if py_xml == node_xml == text:
+            print(f"✅ {f.relative_to(ROOT)}")
+        else:
+            failed += 1
+            print(f"❌ {f.relative_to(ROOT)} "
+                  f"(python==node: {py_xml == node_xml}, python==file: {py_xml == text})")
+
+    for i, (name, tree) in enumerate(SYNTHETIC_CASES.items(), len(cases)):
+        py_xml = build_program_xml(tree)
+        node_xml = node_out[i] if node_out is not None else py_xml
+        try:
+            round_trip = parse_program(py_xml) == tree
+        except DialectError:
+            round_trip = False
+
+        if py_xml == node_xml and round_trip:
+            print(f"✅ {name}")
+        else:
+            failed += 1
+            print(f"❌ {name} (python==node: {py_xml == node_xml}, parses back: {round_trip})")
+
+    for f, reason in skipped:
+        print(f"⏭️ {f.relative_to(ROOT)} skipped: {reason}")
+
+    total = len(cases) + len(SYNTHETIC_CASES)
+    print(f"\n{total - failed}/{total} conform, {len(skipped)} skipped")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# run_regressions.py
+"""
+Regression checks for pipeline stages that have been wrong before
+
+Offline, no LLM, no runner: each check is a plain function that raises
+AssertionError with what went wrong. Add a case whenever a bug is fixed.
+
+Run from the repo root:
+    python run_regressions.py
+"""
+
+import sys
+import traceback
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from semantic.compiler import SemanticCompiler
+from semantic.fused import FusedCompiler
+from semantic.ir import SemanticPlan
+from semantic.near_duplicate import NearDuplicateIndex
+from semantic.optimizer import PlanOptimizer, count_blocks, evaluate
+from semantic.repair import PlanRepairer
+from semantic.runner_cache import xml_key
+from semantic.validator import CapabilityValidator
+
+ROOT = Path(__file__).parent
+NORMALIZED_BLOCKS = ROOT / "data" / "normalized_blocks.json"
+
+NEAR_DUP_THRESHOLD = 0.8
+DEEP_PLAN_DEPTH = 3000
+
+
+# -----------------------------
+# Near-duplicate reuse
+# -----------------------------
+# Close in wording, but another plan or another output
+NOT_DUPLICATES = [
+    ("Print YES if a > b, otherwise NO.", "Print YES if a < b, otherwise NO."),
+    ("Print YES if a >= b, otherwise NO.", "Print YES if a > b, otherwise NO."),
+    ("Print a + b for the two given integers.", "Print a - b for the two given integers."),
+    ("Print YES if n is divisible by 3 and 5, otherwise NO.",
+     "Print YES if n is divisible by 3 or 5, otherwise NO."),
+    ("Print YES if all of the given numbers are even, otherwise NO.",
+     "Print YES if any of the given numbers are even, otherwise NO."),
+    ("Print YES if the number is a perfect square, otherwise NO.",
+     "Print YES if the number is not a perfect square, otherwise NO."),
+    ("Print YES if the string contains at least 3 vowels, otherwise NO.",
+     "Print YES if the string contains at most 3 vowels, otherwise NO."),
+    ("Read the price and quantity and print the total cost",
+     "Read the price and quantity and print the total cost after tax"),
+    ("If the score is at least 50 print Pass, else print Fail",
+     "If the score is at least 50 print Pass, else print Failed"),
+    ("Print YES if a > b, otherwise NO.", "print yes if a > b otherwise no"),
+]
+
+# Same problem in other words: still reused
+DUPLICATES = [
+    ("Read two integers and print their sum.", "Read two integers, and print their sum!"),
+    ("Find the sum of two numbers.", "find the sum of two numbers"),
+    ("Print YES if a > b, otherwise NO.", "Print YES if a > b; otherwise NO!"),
+]
+
+
+def check_near_duplicates():
+    for stored, asked in NOT_DUPLICATES:
+        index = NearDuplicateIndex()
+        index.add(stored)
+        matches = index.query(asked, NEAR_DUP_THRESHOLD)
+        assert not matches, f"{asked!r} reused the plan of {stored!r} ({matches[0].similarity:.3f})"
+
+    for stored, asked in DUPLICATES:
+        index = NearDuplicateIndex()
+        index.add(stored)
+        assert index.query(asked, NEAR_DUP_THRESHOLD), f"{asked!r} did not match {stored!r}"
+
+
+# -----------------------------
+# Deeply nested expressions
+# -----------------------------
+def deep_plan_json(depth: int) -> Dict:
+    """Plan JSON whose derived expression nests `depth` levels deep."""
+    expr = "a"
+    for i in range(depth):
+        expr = {"op": "+-*"[i % 3], "args": [expr, i + 1] if i % 2 else [i + 1, expr]}
+    return {
+        "inputs": [{"name": "a", "type": "int"}],
+        "derived": [{"name": "d", "expression": expr}],
+        "condition": {"op": "and", "conditions": [{"left": "d", "op": ">", "right": 0}]},
+        "actions": {"then": [{"type": "print", "value": "yes"}], "else": [{"type": "print", "value": "no"}]},
+    }
+
+
+def check_deep_plan():
+    # Deeper than the interpreter's recursion limit at every stage
+    plan = deep_plan_json(DEEP_PLAN_DEPTH)
+    validator = CapabilityValidator(str(NORMALIZED_BLOCKS))
+    result = validator.validate(plan)
+    assert result["status"] == "ok", result
+
+    optimized, _ = PlanOptimizer(validator.dispatch).optimize(plan)
+    compiler = SemanticCompiler(validator.dispatch)
+    blocks = count_blocks(compiler.compile(optimized))
+    assert blocks > DEEP_PLAN_DEPTH, blocks
+
+    # (dataclass == recurses: compare what the round trip compiles to)
+    round_trip = SemanticPlan.from_json(optimized.to_json())
+    assert count_blocks(compiler.compile(round_trip)) == blocks
+
+
+def check_deep_plan_repair():
+    validator = CapabilityValidator(str(NORMALIZED_BLOCKS))
+    plan = deep_plan_json(DEEP_PLAN_DEPTH)
+    plan["condition"]["conditions"][0]["op"] = "=<"
+    result = PlanRepairer(validator).repair(plan)
+    assert result.ok and result.stage == "local", result.summary()
+
+
+def check_nested_group_repair():
+    # Reported as "unsupported_comparator: and", fixed by flattening
+    plan = deep_plan_json(1)
+    atom = plan["condition"]["conditions"][0]
+    plan["condition"]["conditions"] = [atom, {"op": "and", "conditions": [dict(atom, op="<")]}]
+    result = PlanRepairer(CapabilityValidator(str(NORMALIZED_BLOCKS))).repair(plan)
+    assert result.ok and result.stage == "local", result.summary()
+    assert len(result.plan["condition"]["conditions"]) == 2
+
+
+# -----------------------------
+# Fused vs two-pass validation
+# -----------------------------
+def check_fused_matches_validator():
+    # The compiler never emits a print's body: neither path may skip it
+    plan = {
+        "inputs": [{"name": "a", "type": "int"}],
+        "derived": [],
+        "condition": {"op": "and", "conditions": [{"left": "a", "op": ">", "right": 0}]},
+        "actions": {"then": [{"type": "print", "value": "yes", "body": [{"type": "set"}]}], "else": []},
+    }
+    validator = CapabilityValidator(str(NORMALIZED_BLOCKS))
+    fused, tree = FusedCompiler(validator).validate_and_compile(plan)
+    two_pass = validator.validate(plan)
+    assert fused == two_pass, (fused, two_pass)
+    assert two_pass["status"] == "error" and tree is None, two_pass
+
+
+# -----------------------------
+# Constant folding
+# -----------------------------
+def check_constant_folding():
+    # Blockly ABS is math.fabs: abs(-3) prints "3.0", a literal 3 would not
+    assert evaluate("abs", [-3]) is None
+    assert evaluate("abs", [-2.5]) == 2.5
+    # 8 / 2 = 4.0 would print as "4"
+    assert evaluate("/", [8, 2]) is None
+    assert evaluate("+", [2, 3]) == 5
+
+
+# -----------------------------
+# Runner cache keys
+# -----------------------------
+FIELD_XML = '<xml><block type="text"><field name="TEXT">{}</field></block></xml>'
+
+
+def check_runner_cache_keys():
+    # Formatting between tags is not part of the program
+    compact = FIELD_XML.format("hi")
+    indented = '<xml>\n  <block type="text">\n    <field name="TEXT">hi</field>\n  </block>\n</xml>\n'
+    assert xml_key(compact) == xml_key(indented)
+
+    # A field's text is, whitespace included
+    keys = {xml_key(FIELD_XML.format(text)) for text in ("", " ", "  ", "\n")}
+    assert len(keys) == 4, "whitespace-only field values share a cache key"
+
+
+CHECKS: List[Callable[[], None]] = [
+    check_near_duplicates,
+    check_deep_plan,
+    check_deep_plan_repair,
+    check_nested_group_repair,
+    check_fused_matches_validator,
+    check_constant_folding,
+    check_runner_cache_keys,
+]
+
+
+def main() -> int:
+    failed = 0
+    for check in CHECKS:
+        try:
+            check()
+            print(f"ok    {check.__name__}")
+        except Exception:
+            failed += 1
+            print(f"FAIL  {check.__name__}")
+            traceback.print_exc()
+    print(f"{len(CHECKS) - failed}/{len(CHECKS)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
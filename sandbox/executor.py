@@ -0,0 +1,338 @@
+"""
+Sandboxed Smoke Tester
+
+- Runs generated Python in isolated subprocesses (`python -I`, scratch
+  cwd, stripped env) with stdin fixtures
+- CPU / memory / output limits via `resource` where available (POSIX);
+  wall-clock timeout everywhere
+- Fans cases out across cores with a worker pool
+- Fixture values differ per input position (a - b is never 0); a crash
+  that only says the values were bad for this program (division by
+  zero, math domain) is "inconclusive", not a bug; a program still
+  needs one passing case
+- Produces the text recorded in the *_bug.txt files
+
+This is a smoke test, not a security boundary: it catches programs that
+crash, hang or blow up (e.g. the `_5Bobject_Object_5D` NameError/TypeError
+class of outputs), it does NOT check answers unless expected output is given.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import resource
+except ImportError:  # Windows: wall-clock limit only
+    resource = None
+
+MAX_CAPTURE = 64 * 1024
+
+
+# -----------------------------
+# Data
+# -----------------------------
+@dataclass(frozen=True, slots=True)
+class Limits:
+    cpu_seconds: int = 2
+    memory_mb: int = 256
+    wall_seconds: float = 5.0
+    max_file_mb: int = 1
+
+
+@dataclass(frozen=True, slots=True)
+class SmokeCase:
+    name: str
+    stdin: str
+    expect_stdout: Optional[str] = None
+
+
+@dataclass(slots=True)
+class CaseResult:
+    case: SmokeCase
+    status: str            # pass | inconclusive | error | timeout | wrong_output
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    duration: float
+
+    @property
+    def passed(self) -> bool:
+        return self.status == "pass"
+
+    @property
+    def failed(self) -> bool:
+        return self.status not in ("pass", "inconclusive")
+
+    def error_line(self) -> str:
+        if self.status == "timeout":
+            return "time limit exceeded"
+        if self.status == "wrong_output":
+            return "unexpected output"
+        lines = [l for l in self.stderr.strip().splitlines() if l.strip()]
+        return lines[-1] if lines else f"exit code {self.returncode}"
+
+
+@dataclass(slots=True)
+class SmokeReport:
+    results: List[CaseResult] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        # Inconclusive cases neither fail nor pass a program: at least one
+        # case must actually run through
+        return any(r.passed for r in self.results) and not any(r.failed for r in self.results)
+
+    def first_problem(self) -> Optional[CaseResult]:
+        """The first failed case, else the first inconclusive one."""
+        problems = [r for r in self.results if not r.passed]
+        return next((r for r in problems if r.failed), problems[0] if problems else None)
+
+    def summary(self) -> str:
+        ok = sum(r.passed for r in self.results)
+        inconclusive = sum(r.status == "inconclusive" for r in self.results)
+        text = f"{ok}/{len(self.results)} smoke cases passed"
+        return f"{text}, {inconclusive} inconclusive" if inconclusive else text
+
+
+# -----------------------------
+# Fixtures
+# -----------------------------
+# Values for input 0, 1, 2, ... (cycled): no two inputs of a case are
+# equal, so differences and ratios of inputs are never 0 or 1
+FIXTURE_VALUES = {
+    "ones": {
+        "int": ("1", "2", "3", "4", "5", "6", "7", "8"),
+        "float": ("1.5", "2.5", "3.5", "4.5", "5.5", "6.5", "7.5", "8.5"),
+        "string": ("a", "b", "c", "d", "e", "f", "g", "h"),
+        "bool": ("True", "False"),
+    },
+    "small": {
+        "int": ("3", "5", "7", "11", "13", "17", "19", "23"),
+        "float": ("2.5", "3.25", "4.75", "6.5", "8.25", "9.75", "11.5", "13.25"),
+        "string": ("hello", "world", "abc", "xyz", "cat", "dog", "sun", "moon"),
+        "bool": ("False", "True"),
+    },
+    "large": {
+        "int": ("1000", "1009", "1013", "1019", "1021", "1031", "1033", "1039"),
+        "float": ("999.75", "1009.5", "1013.25", "1019.75", "1021.5", "1031.25", "1033.75", "1039.5"),
+        "string": ("hello world", "open ai", "blockly code", "smoke test",
+                   "quick fox", "lazy dog", "red apple", "blue sky"),
+        "bool": ("True", "False"),
+    },
+}
+
+# Fallback programs have no plan: feed enough lines for typical input() use
+GENERIC_LINES = 16
+
+# Last stderr line of a crash caused by the fixture values, not the program
+FIXTURE_ERRORS = ("ZeroDivisionError", "OverflowError", "ValueError: math domain error")
+
+
+def fixture_value(values: Dict[str, Sequence[str]], inp_type: str, position: int) -> str:
+    options = values.get(inp_type, values["string"])
+    return options[position % len(options)]
+
+
+def fixtures_for_inputs(inputs: Sequence) -> List[SmokeCase]:
+    """
+    Builds stdin fixtures from semantic plan inputs (dicts or ir.InputVar),
+    one value per input() call, in declaration order.
+    """
+    cases = []
+    for name, values in FIXTURE_VALUES.items():
+        lines = []
+        for position, inp in enumerate(inputs):
+            inp_type = inp["type"] if isinstance(inp, dict) else inp.type
+            lines.append(fixture_value(values, inp_type, position))
+        cases.append(SmokeCase(name, "\n".join(lines) + "\n"))
+    return cases
+
+
+def generic_fixtures() -> List[SmokeCase]:
+    return [
+        SmokeCase(name, "".join(fixture_value(values, "int", i) + "\n" for i in range(GENERIC_LINES)))
+        for name, values in FIXTURE_VALUES.items()
+    ]
+
+
+# -----------------------------
+# Execution
+# -----------------------------
+# Sets the limits, then becomes the program: exec keeps rlimits. A
+# preexec_fn would do the same, but is not safe with the worker threads
+_LIMITED_EXEC = """
+import os, resource, sys
+cpu, mem, fsize = map(int, sys.argv[1:4])
+resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+resource.setrlimit(resource.RLIMIT_AS, (mem, mem))
+resource.setrlimit(resource.RLIMIT_FSIZE, (fsize, fsize))
+resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+os.execv(sys.executable, [sys.executable, "-I", sys.argv[4]])
+"""
+
+
+def _command(program: Path, limits: Limits) -> List[str]:
+    if resource is None:
+        return [sys.executable, "-I", str(program)]
+    return [
+        sys.executable, "-I", "-c", _LIMITED_EXEC,
+        str(limits.cpu_seconds),
+        str(limits.memory_mb * 1024 * 1024),
+        str(limits.max_file_mb * 1024 * 1024),
+        str(program),
+    ]
+
+
+def run_case(code: str, case: SmokeCase, limits: Limits = Limits()) -> CaseResult:
+    with tempfile.TemporaryDirectory(prefix="smoke_") as tmp:
+        program = Path(tmp) / "program.py"
+        program.write_text(code, encoding="utf-8")
+
+        env = {
+            "PATH": os.environ.get("PATH", ""),
+            "PYTHONIOENCODING": "utf-8",
+            "PYTHONDONTWRITEBYTECODE": "1",
+        }
+        if os.name == "nt":
+            env["SYSTEMROOT"] = os.environ.get("SYSTEMROOT", "")
+
+        start = time.perf_counter()
+        try:
+            proc = subprocess.run(
+                _command(program, limits),
+                input=case.stdin,
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                cwd=tmp,
+                env=env,
+                timeout=limits.wall_seconds,
+                start_new_session=os.name != "nt"
+            )
+        except subprocess.TimeoutExpired as e:
+            return CaseResult(
+                case, "timeout", None,
+                _text(e.stdout)[:MAX_CAPTURE], _text(e.stderr)[:MAX_CAPTURE],
+                time.perf_counter() - start
+            )
+
+        duration = time.perf_counter() - start
+
+    stdout = proc.stdout[:MAX_CAPTURE]
+    stderr = proc.stderr[:MAX_CAPTURE]
+
+    if proc.returncode in (-24, -9):
+        # Killed by a signal (SIGXCPU, SIGKILL)
+        status = "timeout"
+    elif proc.returncode != 0:
+        last = [l for l in stderr.strip().splitlines() if l.strip()][-1:]
+        status = "inconclusive" if last and last[0].startswith(FIXTURE_ERRORS) else "error"
+    elif case.expect_stdout is not None and stdout.strip() != case.expect_stdout.strip():
+        status = "wrong_output"
+    else:
+        status = "pass"
+
+    return CaseResult(case, status, proc.returncode, stdout, stderr, duration)
+
+
+def smoke_test(
+    code: str,
+    cases: Sequence[SmokeCase],
+    limits: Limits = Limits(),
+    workers: Optional[int] = None
+) -> SmokeReport:
+    """Runs all cases for ONE program in parallel."""
+    if not code or not code.strip():
+        empty = SmokeCase("empty", "")
+        return SmokeReport([CaseResult(empty, "error", None, "", "empty program", 0.0)])
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        results = list(pool.map(lambda c: run_case(code, c, limits), cases))
+
+    return SmokeReport(results)
+
+
+def smoke_test_many(
+    programs: Dict[str, str],
+    cases: Optional[Dict[str, Sequence[SmokeCase]]] = None,
+    limits: Limits = Limits(),
+    workers: Optional[int] = None
+) -> Dict[str, SmokeReport]:
+    """
+    Smoke-tests many programs at once: every (program, case) pair is one
+    job on a shared pool, so a batch saturates all cores.
+    """
+    cases = cases or {}
+    jobs = [
+        (key, case)
+        for key in programs
+        for case in cases.get(key) or generic_fixtures()
+    ]
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        results = list(pool.map(lambda job: run_case(programs[job[0]], job[1], limits), jobs))
+
+    reports = {key: SmokeReport() for key in programs}
+    for (key, _), result in zip(jobs, results):
+        reports[key].results.append(result)
+    return reports
+
+
+# -----------------------------
+# Reporting
+# -----------------------------
+def format_bug_report(report: SmokeReport, source: str = "strict") -> str:
+    if report.passed:
+        lines = [f"No bugs detected ({source}, {report.summary()})"]
+    else:
+        lines = [f"Bugs detected ({source}, {report.summary()})"]
+
+    for r in report.results:
+        line = f"- {r.case.name}: {r.status} ({r.duration * 1000:.0f} ms)"
+        if not r.passed:
+            line += f": {r.error_line()}"
+        lines.append(line)
+
+    return "\n".join(lines) + "\n"
+
+
+def _text(data) -> str:
+    if data is None:
+        return ""
+    if isinstance(data, bytes):
+        return data.decode("utf-8", errors="replace")
+    return data
+
+
+# -----------------------------
+# CLI: re-check every program under outputs/
+# -----------------------------
+if __name__ == "__main__":
+    root = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent.parent / "outputs"
+    programs = {
+        str(p): p.read_text(encoding="utf-8")
+        for p in sorted(root.glob("*/*.txt"))
+        if not p.name.endswith("_bug.txt")
+    }
+
+    start = time.perf_counter()
+    reports = smoke_test_many(programs)
+    elapsed = time.perf_counter() - start
+
+    for key, report in reports.items():
+        mark = "✅" if report.passed else "❌"
+        print(f"{mark} {key}: {report.summary()}")
+        problem = report.first_problem()
+        if not report.passed and problem is not None:
+            print(f"    {problem.case.name}: {problem.status}: {problem.error_line()}")
+
+    bad = sum(not r.passed for r in reports.values())
+    print(f"\n{len(reports) - bad}/{len(reports)} programs passed in {elapsed:.2f}s")
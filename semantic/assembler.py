@@ -0,0 +1,192 @@
+"""
+XML Assembler (Module 4, Python port of assembler/xml_builder.js)
+
+- Writes Blockly XML for a SemanticCompiler block tree
+- Streams into any text handle (file, io.StringIO) instead of
+  building one big string by repeated concatenation
+- Escapes field text (& < >) and attribute values (& < > "), the same
+  way the Node assembler does
+- Output is byte-identical to the Node assembler for every tree the
+  Node assembler accepts (see run_conformance.py)
+"""
+
+import io
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO, Union
+from xml.sax.saxutils import escape
+
+from semantic.ir import Block
+from semantic.traversal import LEAVE, iter_block_events
+
+BLOCKLY_XMLNS = "https://developers.google.com/blockly/xml"
+
+# -----------------------------
+# Blockly block type mapping (IR → Blockly)
+# -----------------------------
+BLOCK_TYPE_MAP = {
+    "essentials_var_set": "variables_set",
+    "essentials_var_get": "variables_get",
+    "essentials_num_literal": "math_number",
+    "essentials_num_arithmetic": "math_arithmetic",
+    "essentials_compare": "logic_compare",
+    "essentials_logic_and": "logic_operation",
+    "essentials_logic_or": "logic_operation",
+    "control_if_truthy": "controls_if",
+    "text_literal": "text",
+    "text_print": "text_print",
+}
+
+# -----------------------------
+# Operator mappings
+# -----------------------------
+ARITHMETIC_OP_MAP = {
+    "+": "ADD",
+    "-": "MINUS",
+    "*": "MULTIPLY",
+    "/": "DIVIDE",
+}
+
+COMPARE_OP_MAP = {
+    "==": "EQ",
+    "!=": "NEQ",
+    "<": "LT",
+    "<=": "LTE",
+    ">": "GT",
+    ">=": "GTE",
+}
+
+
+class AssemblerError(Exception):
+    pass
+
+
+# -----------------------------
+# Public API
+# -----------------------------
+def write_block_xml(block: Union[Dict, Block], out: TextIO) -> None:
+    """
+    Streams one block (and its `next` chain) as XML into `out`.
+    Iterative (semantic/traversal.py): deep trees and long `next`
+    chains don't hit the recursion limit.
+    """
+    if isinstance(block, Block):
+        block = block.to_json()
+    _check_block(block)
+
+    write = out.write
+
+    for event, edge, node in iter_block_events(block):
+        if event == LEAVE:
+            write('</block>')
+            if edge is not None:
+                write(_EDGE_CLOSE[edge[0]])
+            continue
+
+        _check_block(node)
+        block_type = node["type"]
+
+        if edge is not None:
+            kind, name = edge
+            if kind == "value":
+                write(f'<value name={_attr(name)}>')
+            elif kind == "statement":
+                write(f'<statement name={_attr("DO" if name == "THEN" else name)}>')
+            else:
+                write('<next>')
+
+        write(f'<block type={_attr(BLOCK_TYPE_MAP.get(block_type, block_type))}>')
+
+        # Mutation (controls_if else, lists_create_with items, procedure calls)
+        mutation = node.get("mutation")
+        if mutation:
+            attrs = "".join(f' {name}={_attr(_js_string(value))}' for name, value in mutation.items())
+            write(f'<mutation{attrs}></mutation>')
+
+        # Fields
+        for name, value in (node.get("fields") or {}).items():
+            write(f'<field name={_attr(name)}>{escape(_field_text(block_type, name, value))}</field>')
+
+        # Value inputs, statement inputs and `next` follow as events
+        # (empty inputs are left out, same as the Node assembler)
+
+
+_EDGE_CLOSE = {"value": '</value>', "statement": '</statement>', "next": '</next>'}
+
+
+Program = Union[Dict, Block, List[Union[Dict, Block]]]
+
+
+def write_program_xml(tree: Program, out: TextIO) -> None:
+    """
+    Streams a full Blockly document (same wrapper as generate_xml.js).
+    A list is written as several top-level blocks (main chain + functions).
+    """
+    out.write(f'<xml xmlns="{BLOCKLY_XMLNS}">\n')
+    roots = tree if isinstance(tree, list) else [tree]
+    for i, root in enumerate(roots):
+        if i:
+            out.write('\n')
+        write_block_xml(root, out)
+    out.write('\n</xml>')
+
+
+def build_program_xml(tree: Program) -> str:
+    buf = io.StringIO()
+    write_program_xml(tree, buf)
+    return buf.getvalue()
+
+
+def write_program_file(tree: Program, path: Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        write_program_xml(tree, f)
+    return path
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def _check_block(node) -> None:
+    if not node or not isinstance(node, dict):
+        raise AssemblerError("Invalid block node")
+
+    if not node.get("type"):
+        raise AssemblerError("Block missing type")
+
+
+def _field_text(block_type: str, name: str, value) -> str:
+    # A dict / list here is an uncompiled expression: never print it as text
+    if not isinstance(value, (str, int, float, bool, type(None))):
+        raise AssemblerError(f"Field '{name}' of '{block_type}' is not a scalar: {value!r}")
+
+    if name == "OP":
+        # Arithmetic operator mapping
+        if block_type == "essentials_num_arithmetic":
+            value = ARITHMETIC_OP_MAP.get(value, value)
+
+        # Comparison operator mapping
+        elif block_type == "essentials_compare":
+            value = COMPARE_OP_MAP.get(value, value)
+
+        # Logic AND / OR mapping
+        elif block_type in ("essentials_logic_and", "essentials_logic_or"):
+            value = "AND" if block_type == "essentials_logic_and" else "OR"
+
+    return _js_string(value)
+
+
+def _attr(value: str) -> str:
+    # Always double-quoted, like the Node assembler (quoteattr may pick ')
+    return '"' + escape(value, {'"': "&quot;"}) + '"'
+
+
+def _js_string(value: Optional[object]) -> str:
+    """String(value) as JavaScript renders JSON scalars."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
@@ -0,0 +1,107 @@
+"""
+Candidate plan selection (between Modules 1 and 2)
+
+- Validates AND compiles every candidate plan locally, in parallel
+- Picks the first candidate (in the planner's order) that passes both,
+  so one planner round-trip gives several chances to stay on the
+  strict path instead of falling back
+- Never calls the LLM: candidates come from
+  semantic.planner.generate_plan_candidates
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Union
+
+from semantic.fused import FusedCompiler
+from semantic.ir import PlanSchemaError, SemanticPlan
+from semantic.validator import CapabilityValidator
+
+
+# -----------------------------
+# Data
+# -----------------------------
+@dataclass(slots=True)
+class Candidate:
+    index: int
+    validation: Dict                        # {"status", "reason"}, as CapabilityValidator
+    plan: Optional[SemanticPlan] = None     # parsed IR, when the shape was valid
+    block_tree: Optional[Union[Dict, List[Dict]]] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.validation["status"] == "ok"
+
+
+@dataclass(slots=True)
+class Selection:
+    candidates: List[Candidate] = field(default_factory=list)
+    chosen: Optional[Candidate] = None
+
+    @property
+    def not_expressible(self) -> bool:
+        """Every candidate answered not_expressible."""
+        return bool(self.candidates) and all(
+            c.validation.get("reason") == "not_expressible" for c in self.candidates
+        )
+
+    def first_error(self) -> Optional[str]:
+        for c in self.candidates:
+            if not c.ok:
+                return c.validation.get("reason")
+        return None
+
+    def summary(self) -> str:
+        valid = sum(c.ok for c in self.candidates)
+        picked = f", picked #{self.chosen.index + 1}" if self.chosen else ""
+        return f"{valid}/{len(self.candidates)} candidates valid{picked}"
+
+
+# -----------------------------
+# Public API
+# -----------------------------
+def evaluate_candidate(index: int, raw: Dict, validator: CapabilityValidator) -> Candidate:
+    """Validate + compile one candidate. Never raises for a bad plan."""
+    if not isinstance(raw, dict):
+        return Candidate(index, {"status": "error", "reason": "invalid_plan_schema"})
+
+    if raw.get("error"):
+        return Candidate(index, {"status": "error", "reason": str(raw["error"])})
+
+    try:
+        plan = SemanticPlan.from_json(raw)
+    except PlanSchemaError as e:
+        return Candidate(index, {"status": "error", "reason": str(e)})
+
+    # One compiler per candidate: FusedCompiler holds per-plan state
+    try:
+        validation, block_tree = FusedCompiler(validator).validate_and_compile(plan)
+    except ValueError as e:
+        return Candidate(index, {"status": "error", "reason": f"compile_error: {e}"}, plan)
+
+    return Candidate(index, validation, plan, block_tree)
+
+
+def select_plan(
+    candidates: Sequence[Dict],
+    validator: CapabilityValidator,
+    workers: Optional[int] = None
+) -> Selection:
+    """
+    Evaluates all candidates in parallel; chosen is the first valid one
+    in candidate order (not the first to finish), so the pick is
+    deterministic.
+    """
+    if not candidates:
+        return Selection()
+
+    workers = workers or min(len(candidates), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(
+            lambda job: evaluate_candidate(job[0], job[1], validator),
+            enumerate(candidates)
+        ))
+
+    chosen = next((c for c in results if c.ok), None)
+    return Selection(results, chosen)
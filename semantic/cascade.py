@@ -0,0 +1,235 @@
+"""
+Per-stage model cascades (expander, planner, fallback)
+
+- Each stage lists models cheapest / fastest first
+  (data/model_cascade.json); a request starts at the first model and
+  escalates to the next only when the answer is rejected: the call
+  failed, no JSON could be extracted, or the plan does not validate
+- Per (stage, model) attempts, successes and latency are persisted
+  (data/cache/model_stats.json, saved once per problem by main.py,
+  not per attempt) and drive routing on later runs: a
+  model that has kept failing a stage is skipped, except for one
+  probe every PROBE_EVERY requests so its stats stay current
+- The last model of a cascade is never skipped
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+ROOT = Path(__file__).parent.parent
+DEFAULT_CASCADE = ROOT / "data" / "model_cascade.json"
+DEFAULT_STATS = ROOT / "data" / "cache" / "model_stats.json"
+
+# Routing: skip a non-final model once it has this record for a stage
+MIN_ATTEMPTS = 10
+MIN_SUCCESS_RATE = 0.2
+PROBE_EVERY = 10
+
+
+class CascadeError(Exception):
+    pass
+
+
+# -----------------------------
+# Stats
+# -----------------------------
+@dataclass(slots=True)
+class ModelRecord:
+    attempts: int = 0
+    successes: int = 0
+    errors: int = 0         # the call itself failed
+    seconds: float = 0.0
+    skipped: int = 0        # routed around while failing
+    probes: int = 0         # tried anyway while failing
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.attempts if self.attempts else 0.0
+
+    @property
+    def avg_seconds(self) -> float:
+        return self.seconds / self.attempts if self.attempts else 0.0
+
+
+class ModelStats:
+    def __init__(self, path: Optional[Path] = DEFAULT_STATS):
+        self.path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+        self._records: Dict[Tuple[str, str], ModelRecord] = self._load()
+        self._dirty = False     # changed since the last save()
+
+    def get(self, stage: str, model: str) -> ModelRecord:
+        with self._lock:
+            return self._records.setdefault((stage, model), ModelRecord())
+
+    def record(self, stage: str, model: str, ok: bool, seconds: float, error: bool = False):
+        with self._lock:
+            r = self._records.setdefault((stage, model), ModelRecord())
+            r.attempts += 1
+            r.successes += ok
+            r.errors += error
+            r.seconds += seconds
+            self._dirty = True
+
+    def route(self, stage: str, model: str, probed: bool):
+        """Count a failing model as probed or skipped for one request."""
+        with self._lock:
+            r = self._records.setdefault((stage, model), ModelRecord())
+            if probed:
+                r.probes += 1
+            else:
+                r.skipped += 1
+            self._dirty = True
+
+    def summary(self) -> str:
+        with self._lock:
+            items = sorted(self._records.items())
+        return "\n".join(
+            f"  {stage:<10} {model:<32} {r.successes}/{r.attempts} ok "
+            f"({r.success_rate:.0%}), {r.avg_seconds:.2f} s avg, {r.skipped} skipped"
+            for (stage, model), r in items
+        )
+
+    def save(self):
+        """Write the stats if anything changed since the last save."""
+        if self.path is None:
+            return
+        # Held through the write: concurrent saves cannot interleave, and
+        # the tmp name is unique per thread as well as per process
+        with self._lock:
+            if not self._dirty:
+                return
+            data: Dict[str, Dict[str, Dict]] = {}
+            for (stage, model), r in sorted(self._records.items()):
+                data.setdefault(stage, {})[model] = asdict(r)
+            tmp = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+                os.replace(tmp, self.path)
+            except OSError as e:
+                # Read-only checkout etc.: routing falls back to this run's
+                # stats; still dirty, so the next save retries
+                print(f"Model stats not saved ({self.path.name}): {e}")
+                return
+            self._dirty = False
+
+    def _load(self) -> Dict[Tuple[str, str], ModelRecord]:
+        if self.path is None or not self.path.exists():
+            return {}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            return {
+                (stage, model): ModelRecord(**fields)
+                for stage, models in data.items()
+                for model, fields in models.items()
+            }
+        except (OSError, ValueError, TypeError, AttributeError):
+            return {}
+
+
+# -----------------------------
+# Cascade
+# -----------------------------
+class ModelCascade:
+    def __init__(self, stages: Dict[str, List[str]], stats: Optional[ModelStats] = None):
+        for stage, models in stages.items():
+            if not models:
+                raise CascadeError(f"Stage '{stage}' has an empty model cascade")
+        self.stages = {stage: list(models) for stage, models in stages.items()}
+        self.stats = stats if stats is not None else ModelStats(None)
+
+    def configure(self, stage: str, models: List[str]):
+        if not models:
+            raise CascadeError(f"Stage '{stage}' has an empty model cascade")
+        self.stages[stage] = list(models)
+
+    def models(self, stage: str) -> List[str]:
+        """The cascade for `stage` as routed now (failing models skipped)."""
+        if stage not in self.stages:
+            raise CascadeError(f"No model cascade for stage '{stage}'")
+
+        cascade = self.stages[stage]
+        routed = [m for m in cascade[:-1] if not self._skip(stage, m)]
+        return routed + cascade[-1:]
+
+    def primary(self, stage: str) -> str:
+        return self.models(stage)[0]
+
+    def run(
+        self,
+        stage: str,
+        attempt: Callable[[str], T],
+        accept: Callable[[T], bool] = lambda _: True
+    ) -> T:
+        """
+        attempt(model) for each routed model until accept(result). Returns
+        the accepted result, else the last model's result; raises the
+        last model's exception if every call failed. accept() raising
+        counts as a rejection.
+        """
+        models = self.models(stage)
+        for model in self.stages[stage][:-1]:
+            if self._failing(stage, model):
+                self.stats.route(stage, model, probed=model in models)
+
+        result = None
+        have_result = False
+        error: Optional[Exception] = None
+
+        for i, model in enumerate(models):
+            start = time.perf_counter()
+            try:
+                result = attempt(model)
+            except Exception as e:
+                self.stats.record(stage, model, False, time.perf_counter() - start, error=True)
+                error = e
+                continue
+
+            try:
+                ok = bool(accept(result))
+            except Exception:
+                ok = False
+            self.stats.record(stage, model, ok, time.perf_counter() - start)
+            have_result = True
+            if ok:
+                return result
+            if i + 1 < len(models):
+                print(f"Cascade: {stage} answer from {model} rejected, escalating to {models[i + 1]}")
+
+        if have_result:
+            return result
+        raise error
+
+    def _failing(self, stage: str, model: str) -> bool:
+        r = self.stats.get(stage, model)
+        return r.attempts >= MIN_ATTEMPTS and r.success_rate < MIN_SUCCESS_RATE
+
+    def _skip(self, stage: str, model: str) -> bool:
+        if not self._failing(stage, model):
+            return False
+        # One probe per PROBE_EVERY requests, so a recovered model can
+        # win its place back
+        r = self.stats.get(stage, model)
+        return r.skipped < (r.probes + 1) * (PROBE_EVERY - 1)
+
+
+def load_cascade(
+    path: Path = DEFAULT_CASCADE,
+    stats_path: Optional[Path] = DEFAULT_STATS
+) -> ModelCascade:
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(f"model_cascade.json not found: {path}")
+    return ModelCascade(json.loads(p.read_text(encoding="utf-8")), ModelStats(stats_path))
+
+
+# Process-wide, shared by every LLM stage
+CASCADE = load_cascade()
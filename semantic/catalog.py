@@ -0,0 +1,307 @@
+"""
+Block Catalog
+
+Lazy, indexed access to block catalogs such as data/normalized_blocks.json
+(58 blocks) and data/old_normalized_blocks.json (677 blocks).
+
+- The JSON is parsed ONCE per catalog version and written to a binary
+  cache (data/cache/) next to an index by type / category / module / kind
+- Later startups memory-map the cache and read only the small index;
+  individual blocks are unpickled on first access
+- The cache is keyed by the source file's size + mtime, so editing the
+  JSON transparently rebuilds it (and deletes the superseded cache)
+- CatalogSet answers the same queries over several catalogs at once
+  (capability tiers, see semantic/dispatch.py)
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+ROOT = Path(__file__).parent.parent
+DEFAULT_CACHE_DIR = ROOT / "data" / "cache"
+
+# Bump when the on-disk layout changes
+CACHE_FORMAT = 1
+
+# <8-byte header length><pickled index><pickled block>...
+_HEADER = struct.Struct("<Q")
+
+INDEX_KEYS = ("category", "module", "kind")
+
+
+class BlockCatalog:
+    def __init__(self, path: str, cache_dir: Optional[Path] = DEFAULT_CACHE_DIR):
+        self.path = Path(path)
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+
+        self._index: Optional[Dict] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._blocks: Optional[List[Dict]] = None   # set when built in-process
+        self._decoded: Dict[int, Dict] = {}
+
+    # ---------------------------
+    # Queries
+    # ---------------------------
+    @property
+    def block_types(self) -> FrozenSet[str]:
+        return self._ensure_index()["type_set"]
+
+    def __contains__(self, block_type: str) -> bool:
+        return block_type in self._ensure_index()["types"]
+
+    def __len__(self) -> int:
+        return self._ensure_index()["count"]
+
+    def get(self, block_type: str) -> Optional[Dict]:
+        """First definition of `block_type` (the catalogs repeat a few types)."""
+        positions = self._ensure_index()["types"].get(block_type)
+        if not positions:
+            return None
+        return self._block(positions[0])
+
+    def get_all(self, block_type: str) -> List[Dict]:
+        positions = self._ensure_index()["types"].get(block_type, ())
+        return [self._block(i) for i in positions]
+
+    def types_by(
+        self,
+        category: Optional[str] = None,
+        module: Optional[str] = None,
+        kind: Optional[str] = None
+    ) -> List[str]:
+        """Block types matching ALL given facets, in catalog order."""
+        index = self._ensure_index()
+        selected = None
+
+        for key, value in zip(INDEX_KEYS, (category, module, kind)):
+            if value is None:
+                continue
+            matches = set(index[key].get(value, ()))
+            selected = matches if selected is None else selected & matches
+
+        if selected is None:
+            return list(index["types"])
+        return [t for t in index["types"] if t in selected]
+
+    def facets(self, key: str) -> List[str]:
+        """Distinct values of category / module / kind."""
+        return list(self._ensure_index()[key])
+
+    def blocks(self) -> List[Dict]:
+        """Every block, in catalog order (decodes all of them)."""
+        return [self._block(i) for i in range(len(self))]
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.blocks())
+
+    # ---------------------------
+    # Loading
+    # ---------------------------
+    def _ensure_index(self) -> Dict:
+        if self._index is None:
+            if not self.path.exists():
+                raise FileNotFoundError(f"{self.path.name} not found: {self.path}")
+
+            if self._load_cache():
+                return self._index
+
+            blocks = self._parse_json()
+            self._index = _build_index(blocks)
+            self._blocks = blocks
+            self._write_cache(blocks)
+
+        return self._index
+
+    def _block(self, i: int) -> Dict:
+        if self._blocks is not None:
+            return self._blocks[i]
+
+        block = self._decoded.get(i)
+        if block is None:
+            offset, length = self._index["offsets"][i]
+            block = pickle.loads(self._mmap[offset:offset + length])
+            self._decoded[i] = block
+        return block
+
+    def _parse_json(self) -> List[Dict]:
+        data = json.loads(self.path.read_text(encoding='utf-8'))
+
+        if not isinstance(data, list):
+            raise TypeError(f"{self.path.name} must be a list")
+
+        for i, block in enumerate(data):
+            if "type" not in block:
+                raise KeyError(f"Block at index {i} missing 'type'")
+
+        return data
+
+    # ---------------------------
+    # Binary cache
+    # ---------------------------
+    def _cache_file(self) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        stat = self.path.stat()
+        key = f"{self.path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}:{CACHE_FORMAT}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return self.cache_dir / f"{self.path.stem}.{digest}.idx"
+
+    def _load_cache(self) -> bool:
+        cache = self._cache_file()
+        if cache is None or not cache.exists():
+            return False
+
+        try:
+            with open(cache, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            (header_len,) = _HEADER.unpack_from(mm, 0)
+            index = pickle.loads(mm[_HEADER.size:_HEADER.size + header_len])
+        except (OSError, ValueError, pickle.UnpicklingError, struct.error, EOFError):
+            return False
+
+        self._mmap = mm
+        self._index = index
+        return True
+
+    def _write_cache(self, blocks: List[Dict]):
+        cache = self._cache_file()
+        if cache is None:
+            return
+
+        payloads = [pickle.dumps(b, protocol=pickle.HIGHEST_PROTOCOL) for b in blocks]
+
+        # Offsets depend on the header size, which depends on the offsets:
+        # size the header with placeholder offsets of the final width.
+        index = dict(self._index)
+        index["offsets"] = [(0, len(p)) for p in payloads]
+        header_len = len(pickle.dumps(_with_offsets(index, payloads, 2 ** 62), protocol=pickle.HIGHEST_PROTOCOL))
+        index = _with_offsets(index, payloads, _HEADER.size + header_len)
+        header = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL).ljust(header_len, b"\0")
+
+        try:
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(header_len))
+                f.write(header)
+                for p in payloads:
+                    f.write(p)
+            os.replace(tmp, cache)
+        except OSError:
+            # Read-only checkout etc.: the in-memory catalog still works
+            return
+
+        self._remove_stale_caches(cache)
+
+    def _remove_stale_caches(self, current: Path):
+        """Caches of earlier versions of this catalog are never read again."""
+        for stale in current.parent.glob(f"{self.path.stem}.{'?' * 16}.idx"):
+            if stale == current:
+                continue
+            try:
+                stale.unlink()
+            except OSError:
+                # Still mapped by another process (Windows): next rebuild
+                pass
+
+
+class CatalogSet:
+    """
+    Several catalogs queried as one, in priority order.
+
+    A block type is available if ANY catalog has it; its definition comes
+    from the FIRST catalog that has it, so a structured catalog listed
+    first (normalized_blocks.json) shadows legacy placeholder entries.
+    """
+
+    def __init__(self, catalogs: Tuple[BlockCatalog, ...]):
+        if not catalogs:
+            raise ValueError("CatalogSet needs at least one catalog")
+        self.catalogs = tuple(catalogs)
+        self._types: Optional[FrozenSet[str]] = None
+
+    @property
+    def path(self) -> Path:
+        return self.catalogs[0].path
+
+    @property
+    def block_types(self) -> FrozenSet[str]:
+        if self._types is None:
+            self._types = frozenset().union(*(c.block_types for c in self.catalogs))
+        return self._types
+
+    def __contains__(self, block_type: str) -> bool:
+        return block_type in self.block_types
+
+    def __len__(self) -> int:
+        # Distinct block types: the catalogs share most of theirs
+        return len(self.block_types)
+
+    def get(self, block_type: str) -> Optional[Dict]:
+        for catalog in self.catalogs:
+            block = catalog.get(block_type)
+            if block is not None:
+                return block
+        return None
+
+    def get_all(self, block_type: str) -> List[Dict]:
+        return [b for c in self.catalogs for b in c.get_all(block_type)]
+
+    def blocks(self) -> List[Dict]:
+        return [b for c in self.catalogs for b in c.blocks()]
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.blocks())
+
+
+# -----------------------------
+# Index helpers
+# -----------------------------
+def _build_index(blocks: List[Dict]) -> Dict:
+    types: Dict[str, List[int]] = {}
+    facets: Dict[str, Dict[str, List[str]]] = {key: {} for key in INDEX_KEYS}
+
+    for i, block in enumerate(blocks):
+        block_type = block["type"]
+        first = block_type not in types
+        types.setdefault(block_type, []).append(i)
+
+        if first:
+            for key in INDEX_KEYS:
+                value = block.get(key)
+                if value is not None:
+                    facets[key].setdefault(value, []).append(block_type)
+
+    return {
+        "types": {t: tuple(p) for t, p in types.items()},
+        "type_set": frozenset(types),
+        "count": len(blocks),
+        **facets
+    }
+
+
+def _with_offsets(index: Dict, payloads: List[bytes], start: int) -> Dict:
+    offsets: List[Tuple[int, int]] = []
+    pos = start
+    for p in payloads:
+        offsets.append((pos, len(p)))
+        pos += len(p)
+    return {**index, "offsets": offsets}
+
+
+@lru_cache(maxsize=None)
+def load_catalog(path: str, cache_dir: Optional[str] = str(DEFAULT_CACHE_DIR)) -> BlockCatalog:
+    """One shared catalog object per path per process."""
+    return BlockCatalog(path, Path(cache_dir) if cache_dir is not None else None)
+
+
+@lru_cache(maxsize=None)
+def load_catalog_set(paths: Tuple[str, ...], cache_dir: Optional[str] = str(DEFAULT_CACHE_DIR)) -> CatalogSet:
+    return CatalogSet(tuple(load_catalog(p, cache_dir) for p in paths))
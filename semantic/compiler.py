@@ -1,4 +1,12 @@
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
+
+from semantic.dispatch import DispatchTable, OpSpec, load_dispatch_table
+from semantic.hashcons import BlockInterner, BlockNode
+from semantic.ir import (
+    Action, Actions, Condition, ConditionAtom, DerivedVar, Expression, Function, InputVar,
+    SemanticPlan, Value
+)
+from semantic.traversal import fold_expression
 
 
 class SemanticCompiler:
@@ -6,34 +14,80 @@ class SemanticCompiler:
     Compiles a semantic plan into a Blockly-aligned block tree.
     """
 
+    def __init__(self, dispatch: Optional[DispatchTable] = None):
+        # Op → block table shared with CapabilityValidator
+        self.dispatch = dispatch if dispatch is not None else load_dispatch_table()
+
     # -----------------------------
     # Public API
     # -----------------------------
-    def compile(self, plan: Dict) -> Dict:
+    def compile(self, plan: Union[Dict, SemanticPlan]) -> Union[Dict, List[Dict]]:
+        """
+        Returns the main block chain. A plan that defines functions
+        (extended tier) has several top-level blocks and compiles to a
+        list instead: [main chain, *procedure definitions].
+        """
+        plan = SemanticPlan.from_json(plan)
+
         head = None
         current = None
 
         # 1️⃣ Inputs
-        for inp in plan.get("inputs", []):
+        for inp in plan.inputs:
             node = self._compile_input(inp)
             head, current = self._chain(head, current, node)
 
         # 2️⃣ Derived variables
-        for drv in plan.get("derived", []):
+        for drv in plan.derived:
             node = self._compile_derived(drv)
             head, current = self._chain(head, current, node)
 
         # 3️⃣ Condition + actions
-        condition = plan.get("condition")
-        if condition and condition.get("conditions"):
-            node = self._compile_if(condition, plan.get("actions", {}))
+        condition = plan.condition
+        if condition and condition.conditions:
+            node = self._compile_if(condition, plan.actions)
             head, current = self._chain(head, current, node)
-
-        return head
+        elif self.dispatch.tier != "core" and plan.actions.then:
+            # Extended tier: no decision → the then-actions always run
+            node = self._compile_unconditional(condition, plan.actions)
+            head, current = self._chain(head, current, node)
+        else:
+            self._skip_if(condition, plan.actions)
+
+        if not plan.functions:
+            return head
+
+        # 4️⃣ Functions: separate top-level blocks (definitions have no `next`)
+        roots = [head] if head is not None else []
+        roots.extend(self._compile_function(fn) for fn in plan.functions)
+        return roots
+
+    def compile_interned(
+        self,
+        plan: Union[Dict, SemanticPlan],
+        interner: Optional[BlockInterner] = None
+    ) -> Union[Optional[BlockNode], List[BlockNode]]:
+        """
+        Same as compile(), but returns a hash-consed tree where every
+        repeated subtree (variables_get, math_number, ...) is shared.
+        Pass one interner across plans to share nodes between programs.
+        Use semantic.hashcons.expand() to get the dict tree back.
+        """
+        interner = interner if interner is not None else BlockInterner()
+        # Value blocks (the bulk of a tree) are interned as the fold builds
+        # them; only the statement chain is left to intern at the end
+        tree = _InterningCompiler(self.dispatch, interner).compile(plan)
+        if isinstance(tree, list):
+            return [interner.intern(root) for root in tree]
+        return interner.intern(tree)
 
     # -----------------------------
     # Helpers
     # -----------------------------
+    def _require_available(self, spec: OpSpec):
+        if not spec.available:
+            raise ValueError(f"Block '{spec.block_type}' for op '{spec.op}' is not in the catalog")
+
     def _chain(self, head, current, node):
         if head is None:
             return node, node
@@ -43,17 +97,17 @@ class SemanticCompiler:
     # -----------------------------
     # Input
     # -----------------------------
-    def _compile_input(self, inp: Dict) -> Dict:
+    def _compile_input(self, inp: InputVar) -> Dict:
         return {
             "type": "variables_set",
             "fields": {
-                "VAR": inp["name"]
+                "VAR": inp.name
             },
             "value_inputs": {
                 "VALUE": {
                     "type": "text_prompt_ext",
                     "fields": {
-                        "TYPE": "NUMBER" if inp["type"] in {"int", "float"} else "TEXT",
+                        "TYPE": "NUMBER" if inp.type in {"int", "float"} else "TEXT",
                         "TEXT": ""
                     }
                 }
@@ -63,182 +117,240 @@ class SemanticCompiler:
     # -----------------------------
     # Derived
     # -----------------------------
-    def _compile_derived(self, drv: Dict) -> Dict:
+    def _compile_derived(self, drv: DerivedVar) -> Dict:
         return {
             "type": "variables_set",
             "fields": {
-                "VAR": drv["name"]
+                "VAR": drv.name
             },
             "value_inputs": {
-                "VALUE": self._compile_expression(drv["expression"])
+                "VALUE": self._compile_value(drv.expression)
             }
         }
 
-    def _compile_expression(self, expr: Dict) -> Dict:
-        op = expr["op"]
-
-        if op in {"+", "-", "*", "/"}:
-            return self._compile_arithmetic(expr)
-
-        if op == "abs":
-            return {
-                "type": "math_single",
-                "fields": { "OP": "ABS" },
-                "value_inputs": {
-                    "NUM": self._compile_value(expr["args"][0])
-                }
-            }
-
-        if op == "mod":
-            return {
-                "type": "math_modulo",
-                "value_inputs": {
-                    "DIVIDEND": self._compile_value(expr["args"][0]),
-                    "DIVISOR": self._compile_value(expr["args"][1])
-                }
-            }
-
-        if op in {"min", "max"}:
-            return {
-                "type": "math_minmax",
-                "fields": { "OP": op.upper() },
-                "value_inputs": {
-                    "A": self._compile_value(expr["args"][0]),
-                    "B": self._compile_value(expr["args"][1])
-                }
-            }
-
-        if op == "len":
-            return {
-                "type": "text_length",
-                "value_inputs": {
-                    "VALUE": self._compile_value(expr["args"][0])
-                }
-            }
+    def _enter_expression(self, expr: Expression):
+        # Pre-order: unknown / unavailable ops fail before any arg compiles
+        spec = self.dispatch.expressions.get(expr.op)
+        if spec is None:
+            raise ValueError(f"Unsupported expression op: {expr.op}")
+        self._require_available(spec)
+
+    def _expression_args(self, expr: Expression) -> List[Value]:
+        # The args that become value inputs (a call's arg is its name)
+        spec = self.dispatch.expressions[expr.op]
+        if spec.form == "variadic":
+            return expr.args
+        if spec.form == "call":
+            return []
+        return expr.args[:spec.arity]
+
+    def _build_expression(self, expr: Expression, inputs: List[Dict]) -> Dict:
+        spec = self.dispatch.expressions[expr.op]
+        if spec.form == "variadic":
+            return self._variadic_block(spec, inputs)
+        if spec.form == "call":
+            return self._call_block(spec, expr.args[0])
+        return self._op_block(spec, inputs)
+
+    def _compile_op(self, spec: OpSpec, args: List) -> Dict:
+        self._require_available(spec)
+        return self._op_block(spec, [self._compile_value(arg) for arg in args])
+
+    def _op_block(self, spec: OpSpec, inputs: List[Dict]) -> Dict:
+        node = {"type": spec.block_type}
+
+        if spec.fields:
+            node["fields"] = dict(spec.fields)
+
+        node["value_inputs"] = dict(zip(spec.inputs, inputs))
 
-        if op == "to_string":
-            return {
-                "type": "text_to_string",
-                "value_inputs": {
-                    "VALUE": self._compile_value(expr["args"][0])
-                }
-            }
+        return node
 
-        if op == "to_number":
-            return {
-                "type": "text_to_number",
-                "value_inputs": {
-                    "TEXT": self._compile_value(expr["args"][0])
-                }
+    def _variadic_block(self, spec: OpSpec, inputs: List[Dict]) -> Dict:
+        # lists_create_with: one ADD<i> input per arg, count in the mutation
+        prefix = spec.inputs[0]
+        return {
+            "type": spec.block_type,
+            "mutation": {"items": str(len(inputs))},
+            "value_inputs": {
+                f"{prefix}{i}": block
+                for i, block in enumerate(inputs)
             }
-
-        raise ValueError(f"Unsupported expression op: {op}")
-
-
-    def _compile_arithmetic(self, expr: Dict) -> Dict:
-        op_map = {
-            "+": "ADD",
-            "-": "MINUS",
-            "*": "MULTIPLY",
-            "/": "DIVIDE"
         }
 
+    def _call_block(self, spec: OpSpec, name: str) -> Dict:
         return {
-            "type": "math_arithmetic",
-            "fields": {
-                "OP": op_map[expr["op"]]
-            },
-            "value_inputs": {
-                "A": self._compile_value(expr["args"][0]),
-                "B": self._compile_value(expr["args"][1])
-            }
+            "type": spec.block_type,
+            "mutation": {"name": name},
+            "fields": {spec.var_field: name}
         }
 
     # -----------------------------
     # Condition
     # -----------------------------
-    def _compile_if(self, condition: Dict, actions: Dict) -> Dict:
-        return {
-            "type": "controls_if",
-            "value_inputs": {
-                "IF0": self._compile_condition(condition)
-            },
-            "statement_inputs": {
-                "DO0": self._compile_actions(actions.get("then", [])),
-                "ELSE": self._compile_actions(actions.get("else", []))
-            }
-        }
-
-    def _compile_condition(self, condition: Dict) -> Dict:
-        logic = condition["op"].upper()  # AND / OR
-        compiled = [self._compile_compare(c) for c in condition["conditions"]]
+    def _compile_if(self, condition: Condition, actions: Actions) -> Dict:
+        return self._if_block(condition, actions.then, actions.else_)
+
+    def _compile_unconditional(self, condition: Optional[Condition], actions: Actions) -> Dict:
+        return self._compile_actions(actions.then)
+
+    def _skip_if(self, condition: Optional[Condition], actions: Actions):
+        """
+        Override point: called with the condition + actions that compile()
+        emits no block for. Nothing to do here; FusedCompiler validates
+        them, as the two-pass validator would.
+        """
+
+    def _if_block(self, condition: Condition, then: List[Action], else_: List[Action]) -> Dict:
+        test = self._compile_condition(condition)
+        do = self._compile_actions(then)
+        otherwise = self._compile_actions(else_)
+
+        node = {"type": "controls_if"}
+        if otherwise is not None:
+            # Blockly only creates the ELSE input when the mutation asks for it
+            node["mutation"] = {"else": "1"}
+
+        node["value_inputs"] = {"IF0": test}
+        node["statement_inputs"] = {"DO0": do, "ELSE": otherwise}
+        return node
 
-        node = compiled[0]
-        for next_cond in compiled[1:]:
-            node = {
-                "type": "logic_operation",
-                "fields": {
-                    "OP": logic
-                },
-                "value_inputs": {
-                    "A": node,
-                    "B": next_cond
+    def _compile_condition(self, condition: Condition) -> Dict:
+        logic = self.dispatch.logic.get(condition.op)  # and / or
+        if logic is None:
+            raise ValueError(f"Unsupported logic op: {condition.op}")
+
+        compiled = [self._compile_compare(c) for c in condition.conditions]
+
+        # Pair neighbours level by level: a balanced tree, depth ceil(log2 n)
+        # instead of a left-deep chain. AND / OR are associative and the
+        # atoms keep their left-to-right (short-circuit) order.
+        a, b = logic.inputs
+        level = compiled
+        while len(level) > 1:
+            paired = [
+                {
+                    "type": logic.block_type,
+                    "fields": dict(logic.fields),
+                    "value_inputs": {
+                        a: level[i],
+                        b: level[i + 1]
+                    }
                 }
-            }
+                for i in range(0, len(level) - 1, 2)
+            ]
+            if len(level) % 2:
+                paired.append(level[-1])
+            level = paired
 
-        return node
+        return level[0]
 
-    def _compile_compare(self, c: Dict) -> Dict:
-        op_map = {
-            "==": "EQ",
-            "!=": "NEQ",
-            "<": "LT",
-            "<=": "LTE",
-            ">": "GT",
-            ">=": "GTE"
-        }
+    def _compile_compare(self, c: ConditionAtom) -> Dict:
+        spec = self.dispatch.comparators.get(c.op)
+        if spec is None:
+            raise ValueError(f"Unsupported comparator: {c.op}")
 
-        return {
-            "type": "logic_compare",
-            "fields": {
-                "OP": op_map[c["op"]]
-            },
-            "value_inputs": {
-                "A": self._compile_value(c["left"]),
-                "B": self._compile_value(c["right"])
-            }
-        }
+        return self._compile_op(spec, [c.left, c.right])
 
     # -----------------------------
     # Actions
     # -----------------------------
-    def _compile_actions(self, actions: List[Dict]) -> Dict:
+    def _compile_actions(self, actions: List[Action]) -> Dict:
         head = None
         current = None
 
         for action in actions:
-            if action["type"] == "print":
-                node = {
-                    "type": "text_print",
-                    "value_inputs": {
-                        "TEXT": {
-                            "type": "text",
-                            "fields": {
-                                "TEXT": action["value"]
-                            }
+            node = self._compile_action(action)
+            head, current = self._chain(head, current, node)
+
+        return head
+
+    def _compile_action(self, action: Action) -> Dict:
+        spec = self.dispatch.actions.get(action.type)
+        if spec is None:
+            raise ValueError(f"Unsupported action: {action.type}")
+
+        if spec.literal_type:
+            return {
+                "type": spec.block_type,
+                "value_inputs": {
+                    spec.inputs[0]: {
+                        "type": spec.literal_type,
+                        "fields": {
+                            spec.literal_field: action.value
                         }
                     }
                 }
-                head, current = self._chain(head, current, node)
-            else:
-                raise ValueError(f"Unsupported action: {action['type']}")
+            }
 
-        return head
+        return self._compile_statement(spec, action)
+
+    def _compile_statement(self, spec: OpSpec, action: Action) -> Dict:
+        # Extended tier: set / change / append / loops / if / break / call
+        self._require_available(spec)
+
+        if spec.form == "if":
+            return self._if_block(action.condition, action.body, action.else_)
+        if spec.form == "call":
+            return self._call_block(spec, action.operand("name"))
+
+        node = {"type": spec.block_type}
+
+        fields = dict(spec.fields)
+        if spec.var_key:
+            fields[spec.var_field] = action.operand(spec.var_key)
+        if fields:
+            node["fields"] = fields
+
+        if spec.form == "while":
+            node["value_inputs"] = {spec.inputs[0]: self._compile_condition(action.condition)}
+        elif spec.args:
+            node["value_inputs"] = {
+                name: self._compile_value(action.operand(key))
+                for name, key in zip(spec.inputs, spec.args)
+            }
+
+        if spec.statements:
+            node["statement_inputs"] = {spec.statements[0]: self._compile_actions(action.body)}
+
+        return node
+
+    # -----------------------------
+    # Functions
+    # -----------------------------
+    def _compile_function(self, fn: Function) -> Dict:
+        kind = "procedure" if fn.returns is None else "function"
+        spec = self.dispatch.functions.get(kind)
+        if spec is None:
+            raise ValueError(f"Unsupported construct: {kind}")
+        self._require_available(spec)
+
+        stack = self._compile_actions(fn.body)
+
+        node = {
+            "type": spec.block_type,
+            "fields": {spec.var_field: fn.name}
+        }
+        if fn.returns is not None:
+            node["value_inputs"] = {spec.inputs[0]: self._compile_value(fn.returns)}
+        node["statement_inputs"] = {spec.statements[0]: stack}
+        return node
 
     # -----------------------------
     # Values
     # -----------------------------
-    def _compile_value(self, v: Union[str, int, float]) -> Dict:
+    def _compile_value(self, v: Value) -> Dict:
+        # Nested expressions become inline blocks, not temp variables.
+        # Walked with an explicit stack: no Python frame per nesting level.
+        return fold_expression(
+            v,
+            self._compile_leaf,
+            self._build_expression,
+            self._enter_expression,
+            self._expression_args
+        )
+
+    def _compile_leaf(self, v: Value) -> Dict:
         if isinstance(v, (int, float)):
             return {
                 "type": "math_number",
@@ -253,3 +365,26 @@ class SemanticCompiler:
                 "VAR": v
             }
         }
+
+
+class _InterningCompiler(SemanticCompiler):
+    """compile() that hands back value blocks already interned."""
+
+    def __init__(self, dispatch: DispatchTable, interner: BlockInterner):
+        super().__init__(dispatch)
+        self.interner = interner
+
+    def _compile_value(self, v: Value) -> BlockNode:
+        return fold_expression(
+            v,
+            self._intern_leaf,
+            self._intern_expression,
+            self._enter_expression,
+            self._expression_args
+        )
+
+    def _intern_leaf(self, v: Value) -> BlockNode:
+        return self.interner.intern(self._compile_leaf(v))
+
+    def _intern_expression(self, expr: Expression, inputs: List[BlockNode]) -> BlockNode:
+        return self.interner.intern(self._build_expression(expr, inputs))
@@ -0,0 +1,255 @@
+"""
+Op → block dispatch tables
+
+Generated ONCE from:
+- data/semantic_ops.json      (semantic op → block type + fixed fields)
+- data/normalized_blocks.json (block value inputs, fields, allowed enums)
+
+Both CapabilityValidator and SemanticCompiler read these tables, so the
+arity the validator enforces is, by construction, the number of value
+inputs the compiler fills. Adding an op is a data change.
+
+Capability tiers:
+- core      inputs, arithmetic, one decision, print (the default)
+- extended  + loops, lists, variables, functions (opt-in)
+
+A tier lists the catalogs it negotiates against ("tiers" in
+semantic_ops.json). An op is offered when its tier is active AND every
+block it needs exists in one of those catalogs; the planner prompt is
+generated from what is left (DispatchTable.capabilities()).
+"""
+
+import json
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from semantic.catalog import BlockCatalog, CatalogSet, load_catalog, load_catalog_set
+
+ROOT = Path(__file__).parent.parent
+DATA_DIR = ROOT / "data"
+DEFAULT_BLOCKS = DATA_DIR / "normalized_blocks.json"
+DEFAULT_OPS = DATA_DIR / "semantic_ops.json"
+
+# Ordered: each tier includes everything below it
+TIERS = ("core", "extended")
+DEFAULT_TIER = "core"
+
+GROUPS = ("expressions", "comparators", "logic", "actions", "functions")
+
+
+class DispatchError(Exception):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class OpSpec:
+    op: str
+    block_type: str
+    fields: Dict[str, str] = field(default_factory=dict)
+    inputs: Tuple[str, ...] = ()        # value input names, in catalog order
+    literal_type: Optional[str] = None  # actions only: literal child block
+    literal_field: Optional[str] = None
+    available: bool = True              # False if a block is missing from the catalog
+    form: str = "op"                    # op | variadic | call | if | while
+    args: Tuple[str, ...] = ()          # actions only: plan keys filling `inputs`
+    var_key: Optional[str] = None       # actions only: plan key naming the variable
+    var_field: Optional[str] = None     # block field holding a variable / function name
+    statements: Tuple[str, ...] = ()    # statement input names, in catalog order
+
+    @property
+    def arity(self) -> int:
+        return len(self.inputs)
+
+    @property
+    def required_blocks(self) -> Tuple[str, ...]:
+        if self.literal_type:
+            return (self.block_type, self.literal_type)
+        return (self.block_type,)
+
+
+class DispatchTable:
+    def __init__(
+        self,
+        expressions: Dict[str, OpSpec],
+        comparators: Dict[str, OpSpec],
+        logic: Dict[str, OpSpec],
+        actions: Dict[str, OpSpec],
+        functions: Optional[Dict[str, OpSpec]] = None,
+        tier: str = DEFAULT_TIER
+    ):
+        self.expressions = expressions
+        self.comparators = comparators
+        self.logic = logic
+        self.actions = actions
+        self.functions = functions or {}
+        self.tier = tier
+
+    # -----------------------------
+    # Build
+    # -----------------------------
+    @classmethod
+    def build(
+        cls,
+        catalog: Union[BlockCatalog, CatalogSet],
+        bindings: Dict,
+        tier: str = DEFAULT_TIER
+    ) -> "DispatchTable":
+        # Only the bound block types are decoded from the catalog;
+        # catalog.get() returns the first definition of a repeated type
+        rank = _tier_rank(tier)
+        return cls(
+            *(
+                {
+                    op: _make_spec(op, binding, catalog)
+                    for op, binding in bindings.get(group, {}).items()
+                    if _tier_rank(binding.get("tier", DEFAULT_TIER)) <= rank
+                }
+                for group in GROUPS
+            ),
+            tier=tier
+        )
+
+    # -----------------------------
+    # Negotiation
+    # -----------------------------
+    def capabilities(self) -> Dict[str, List[str]]:
+        """Ops usable with the active tier + catalogs, per group."""
+        return {
+            group: [op for op, spec in getattr(self, group).items() if spec.available]
+            for group in GROUPS
+        }
+
+
+def _make_spec(op: str, binding: Dict, catalog: BlockCatalog) -> OpSpec:
+    block_type = binding.get("block")
+    if not block_type:
+        raise DispatchError(f"Op '{op}' has no block binding")
+
+    fields = dict(binding.get("fields", {}))
+    literal_type = binding.get("literal")
+    form = binding.get("form", "op")
+    args = tuple(binding.get("args", ()))
+    var_key = binding.get("var")
+
+    block = catalog.get(block_type)
+    literal = catalog.get(literal_type) if literal_type else None
+
+    if block is None or (literal_type and literal is None):
+        # Keep the op so the validator can report missing_block precisely
+        return OpSpec(
+            op, block_type, fields,
+            literal_type=literal_type, available=False,
+            form=form, args=args, var_key=var_key
+        )
+
+    # Fixed field values must be legal for the block
+    block_fields = block.get("fields", {})
+    for name, value in fields.items():
+        if name not in block_fields:
+            raise DispatchError(f"Op '{op}': block '{block_type}' has no field '{name}'")
+        # old_normalized_blocks.json stores fields as bare placeholders
+        field_spec = block_fields[name]
+        allowed = field_spec.get("allowed") if isinstance(field_spec, dict) else None
+        if allowed is not None and value not in allowed:
+            raise DispatchError(
+                f"Op '{op}': '{value}' is not an allowed {block_type}.{name} value"
+            )
+
+    literal_field = None
+    if literal is not None:
+        literal_field = next(iter(literal.get("fields", {})), None)
+
+    # Legacy catalog entries carry no input names: a binding may spell them out
+    inputs = tuple(binding.get("inputs") or block.get("value_inputs") or ())
+
+    if form == "variadic":
+        # ADD0, ADD1, ... → "ADD"; the compiler numbers one input per arg
+        if not inputs:
+            raise DispatchError(f"Op '{op}': variadic block '{block_type}' has no value inputs")
+        inputs = (inputs[0].rstrip("0123456789"),)
+
+    if args and len(args) != len(inputs):
+        raise DispatchError(
+            f"Op '{op}': {len(args)} args for {len(inputs)} inputs of '{block_type}'"
+        )
+
+    # The first free field names the variable (VAR) or function (NAME)
+    var_field = None
+    if var_key or form == "call" or block_type in _DEFINITION_BLOCKS:
+        var_field = next((f for f in block_fields if f not in fields), None)
+        if var_field is None:
+            raise DispatchError(f"Op '{op}': block '{block_type}' has no name field")
+
+    return OpSpec(
+        op,
+        block_type,
+        fields,
+        inputs,
+        literal_type,
+        literal_field,
+        form=form,
+        args=args,
+        var_key=var_key,
+        var_field=var_field,
+        statements=tuple(block.get("statement_inputs") or ())
+    )
+
+
+_DEFINITION_BLOCKS = {"procedures_defreturn", "procedures_defnoreturn"}
+
+
+def _tier_rank(tier: str) -> int:
+    if tier not in TIERS:
+        raise DispatchError(f"Unknown capability tier '{tier}' (expected one of {', '.join(TIERS)})")
+    return TIERS.index(tier)
+
+
+# -----------------------------
+# Loaders (cached: built once per process)
+# -----------------------------
+@lru_cache(maxsize=None)
+def load_op_bindings(path: str = str(DEFAULT_OPS)) -> Dict:
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(f"semantic_ops.json not found: {path}")
+    return json.loads(p.read_text(encoding='utf-8'))
+
+
+def load_tier_catalog(
+    blocks_path: str = str(DEFAULT_BLOCKS),
+    tier: str = DEFAULT_TIER,
+    ops_path: str = str(DEFAULT_OPS)
+) -> Union[BlockCatalog, CatalogSet]:
+    """
+    `blocks_path` first, then the tier's other catalogs (semantic_ops.json
+    "tiers"). A single catalog is returned as-is.
+    """
+    _tier_rank(tier)
+    tiers = load_op_bindings(ops_path).get("tiers", {})
+    names = tiers.get(tier, {}).get("catalogs", [])
+
+    primary = Path(blocks_path).resolve()
+    paths = [str(blocks_path)]
+    for name in names:
+        p = DATA_DIR / name
+        if p.resolve() != primary and str(p) not in paths:
+            paths.append(str(p))
+
+    if len(paths) == 1:
+        return load_catalog(paths[0])
+    return load_catalog_set(tuple(paths))
+
+
+@lru_cache(maxsize=None)
+def load_dispatch_table(
+    blocks_path: str = str(DEFAULT_BLOCKS),
+    ops_path: str = str(DEFAULT_OPS),
+    tier: str = DEFAULT_TIER
+) -> DispatchTable:
+    return DispatchTable.build(
+        load_tier_catalog(blocks_path, tier, ops_path),
+        load_op_bindings(ops_path),
+        tier
+    )
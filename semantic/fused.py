@@ -0,0 +1,113 @@
+"""
+Fused Validator + Compiler (Modules 2 + 3)
+
+- Validates capabilities AND emits the block tree in ONE traversal
+- Returns the same {"status", "reason"} dicts as CapabilityValidator
+- CapabilityValidator.validate / SemanticCompiler.compile stay available
+"""
+
+from typing import Dict, List, Optional, Tuple, Union
+
+from semantic.compiler import SemanticCompiler
+from semantic.ir import (
+    Action, Actions, Condition, ConditionAtom, DerivedVar, Expression, Function, InputVar,
+    PlanSchemaError, SemanticPlan
+)
+from semantic.validator import NO_FUNCTIONS, CapabilityError, CapabilityValidator
+
+
+class FusedCompiler(SemanticCompiler):
+    """
+    SemanticCompiler that runs the validator's per-node checks right
+    before compiling each node.
+
+    Checks fire in the same order as CapabilityValidator.validate
+    (inputs → derived → condition → then → else → functions), so the
+    first error reported is the same one the two-pass path reports.
+    """
+
+    def __init__(self, validator: CapabilityValidator):
+        super().__init__(validator.dispatch)
+        self.validator = validator
+        self._functions = NO_FUNCTIONS    # names defined by the plan being compiled
+
+        # Bound once: these run per node on the hot path
+        self._check_statement = validator.check_statement
+        self._check_expression = validator.check_expression
+        self._check_compare = validator.check_compare
+        self._check_action = validator.check_action
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def validate_and_compile(
+        self,
+        plan: Union[Dict, SemanticPlan]
+    ) -> Tuple[Dict, Optional[Union[Dict, List[Dict]]]]:
+        """
+        Returns (validation, block_tree).
+        block_tree is None whenever validation["status"] != "ok".
+        """
+        try:
+            plan = SemanticPlan.from_json(plan)
+            self._functions = self.validator.function_names(plan.functions)
+            block_tree = self.compile(plan)
+
+        except (CapabilityError, PlanSchemaError) as e:
+            return {"status": "error", "reason": str(e)}, None
+
+        except ValueError:
+            # Compile-time failure (e.g. unknown op the validator lets
+            # through). Two-pass semantics: a validation error anywhere
+            # in the plan wins; otherwise the compile error propagates.
+            validation = self.validator.validate(plan)
+            if validation["status"] != "ok":
+                return validation, None
+            raise
+
+        return {"status": "ok"}, block_tree
+
+    # -----------------------------
+    # Checked compile hooks
+    # -----------------------------
+    def _compile_input(self, inp: InputVar) -> Dict:
+        self._check_statement()
+        return SemanticCompiler._compile_input(self, inp)
+
+    def _compile_derived(self, drv: DerivedVar) -> Dict:
+        self._check_statement()
+        return SemanticCompiler._compile_derived(self, drv)
+
+    def _enter_expression(self, expr: Expression):
+        self._check_expression(expr, self._functions)
+        SemanticCompiler._enter_expression(self, expr)
+
+    def _skip_if(self, condition: Optional[Condition], actions: Actions):
+        # The compiler emits nothing for an empty condition,
+        # but the validator still checks the condition + actions.
+        if condition:
+            self.validator.check_condition(condition)
+        self.validator._validate_actions(actions, self._functions)
+
+    def _compile_unconditional(self, condition: Optional[Condition], actions: Actions) -> Dict:
+        if condition:
+            self.validator.check_condition(condition)
+        node = SemanticCompiler._compile_unconditional(self, condition, actions)
+        self.validator._validate_action_list(actions.else_, self._functions)
+        return node
+
+    def _compile_condition(self, condition: Condition) -> Dict:
+        self.validator.check_condition(condition)
+        return SemanticCompiler._compile_condition(self, condition)
+
+    def _compile_compare(self, c: ConditionAtom) -> Dict:
+        self._check_compare(c)
+        return SemanticCompiler._compile_compare(self, c)
+
+    def _compile_action(self, action: Action) -> Dict:
+        self._check_action(action, self._functions)
+        return SemanticCompiler._compile_action(self, action)
+
+    def _compile_function(self, fn: Function) -> Dict:
+        self.validator.check_function(fn)
+        return SemanticCompiler._compile_function(self, fn)
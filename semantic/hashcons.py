@@ -0,0 +1,231 @@
+"""
+Hash-consed block trees
+
+- Interns structurally identical subtrees of a compiled block tree
+  into ONE shared, immutable node
+- Subtrees can be interned as they are built (children first), so the
+  full dict tree never exists (SemanticCompiler.compile_interned)
+- Node equality is identity, so comparing / diffing subtrees is O(1)
+- expand() restores the exact dict shape produced by SemanticCompiler
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+
+class BlockNode:
+    """
+    Immutable, interned block node.
+
+    Only ever create nodes through BlockInterner.intern(); two nodes
+    built by the same interner are structurally equal iff they are
+    the same object.
+
+    `mutation`, `fields`, `value_inputs` and `statement_inputs` are
+    tuples of (name, value) pairs in the original key order, or None
+    when the key was absent from the source dict (kept for lossless
+    expansion).
+    """
+
+    __slots__ = ("type", "mutation", "fields", "value_inputs", "statement_inputs", "next", "_hash")
+
+    def __init__(
+        self,
+        type: str,
+        mutation: Optional[Tuple[Tuple[str, object], ...]],
+        fields: Optional[Tuple[Tuple[str, object], ...]],
+        value_inputs: Optional[Tuple[Tuple[str, Optional["BlockNode"]], ...]],
+        statement_inputs: Optional[Tuple[Tuple[str, Optional["BlockNode"]], ...]],
+        next: Optional["BlockNode"],
+        key_hash: int
+    ):
+        self.type = type
+        self.mutation = mutation
+        self.fields = fields
+        self.value_inputs = value_inputs
+        self.statement_inputs = statement_inputs
+        self.next = next
+        self._hash = key_hash
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    # Identity equality is the whole point of hash-consing
+    __eq__ = object.__eq__
+
+    def __repr__(self) -> str:
+        return f"BlockNode({self.type!r}, id=0x{id(self):x})"
+
+
+class BlockInterner:
+    """
+    Hash-cons table for block nodes.
+
+    Children are interned before their parents, so a parent's key can
+    reference its children by id() — building a key is O(fan-out),
+    never O(subtree size).
+    """
+
+    def __init__(self):
+        self._table: Dict[tuple, BlockNode] = {}
+        self.requested = 0   # nodes passed to intern()
+        self.created = 0     # distinct nodes actually allocated
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def intern(self, tree: Union[None, Dict, BlockNode]) -> Optional[BlockNode]:
+        """
+        Interns a dict tree. Any subtree (input or `next`) may already be
+        a BlockNode of this interner: it is used as is, so a tree can be
+        interned bottom-up while it is being built.
+        """
+        # Walk the `next` chain iteratively (programs are long chains)
+        # and intern it tail-first, so each node's successor is ready.
+        chain: List[Dict] = []
+        block = tree
+        while block is not None and not isinstance(block, BlockNode):
+            chain.append(block)
+            block = block.get("next") if isinstance(block, dict) else None
+
+        node = block
+        for block in reversed(chain):
+            node = self._intern_one(block, node)
+
+        return node
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requested": self.requested,
+            "created": self.created,
+            "shared": self.requested - self.created
+        }
+
+    # -----------------------------
+    # Helpers
+    # -----------------------------
+    def _intern_one(self, block: Dict, next_node: Optional[BlockNode]) -> BlockNode:
+        if not isinstance(block, dict) or "type" not in block:
+            raise ValueError(f"Invalid block node: {block!r}")
+
+        self.requested += 1
+
+        mutation = block.get("mutation")
+        if mutation is not None:
+            mutation = tuple(mutation.items())
+
+        fields = block.get("fields")
+        if fields is not None:
+            fields = tuple(fields.items())
+
+        value_inputs = self._intern_inputs(block.get("value_inputs"))
+        statement_inputs = self._intern_inputs(block.get("statement_inputs"))
+
+        key = (
+            block["type"],
+            _scalar_key(mutation),
+            _scalar_key(fields),
+            self._child_key(value_inputs),
+            self._child_key(statement_inputs),
+            id(next_node) if next_node is not None else None
+        )
+
+        node = self._table.get(key)
+        if node is None:
+            node = BlockNode(
+                block["type"],
+                mutation,
+                fields,
+                value_inputs,
+                statement_inputs,
+                next_node,
+                hash(key)
+            )
+            self._table[key] = node
+            self.created += 1
+
+        return node
+
+    def _intern_inputs(self, inputs: Optional[Dict]):
+        if inputs is None:
+            return None
+        return tuple((name, self.intern(child)) for name, child in inputs.items())
+
+    @staticmethod
+    def _child_key(inputs):
+        if inputs is None:
+            return None
+        return tuple(
+            (name, id(child) if child is not None else None)
+            for name, child in inputs
+        )
+
+
+def _scalar_key(pairs):
+    if pairs is None:
+        return None
+    # 1, 1.0 and True hash alike; keep the value type in the key
+    return tuple((k, type(v), v) for k, v in pairs)
+
+
+# -----------------------------
+# Expansion
+# -----------------------------
+def expand(node: Optional[BlockNode]) -> Optional[Dict]:
+    """
+    Expands an interned tree back into fresh, independent dicts in the
+    exact shape SemanticCompiler.compile() returns.
+    """
+    if node is None:
+        return None
+
+    chain: List[BlockNode] = []
+    while node is not None:
+        chain.append(node)
+        node = node.next
+
+    head = None
+    current = None
+    for n in chain:
+        block = {"type": n.type}
+        if n.mutation is not None:
+            block["mutation"] = dict(n.mutation)
+        if n.fields is not None:
+            block["fields"] = dict(n.fields)
+        if n.value_inputs is not None:
+            block["value_inputs"] = {
+                name: expand(child) for name, child in n.value_inputs
+            }
+        if n.statement_inputs is not None:
+            block["statement_inputs"] = {
+                name: expand(child) for name, child in n.statement_inputs
+            }
+
+        if current is None:
+            head = block
+        else:
+            current["next"] = block
+        current = block
+
+    return head
+
+
+def iter_nodes(node: Optional[BlockNode]) -> Iterator[BlockNode]:
+    """Yields every DISTINCT node reachable from `node` exactly once."""
+    seen = set()
+    stack = [node] if node is not None else []
+
+    while stack:
+        n = stack.pop()
+        if id(n) in seen:
+            continue
+        seen.add(id(n))
+        yield n
+
+        if n.next is not None:
+            stack.append(n.next)
+        for inputs in (n.value_inputs, n.statement_inputs):
+            if inputs:
+                stack.extend(child for _, child in inputs if child is not None)
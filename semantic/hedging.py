@@ -0,0 +1,181 @@
+"""
+Hedged LLM requests (opt-in)
+
+- Learns each stage's latency distribution from completed requests
+- If a request is still running at the configured percentile of that
+  distribution (e.g. p95), fires ONE duplicate, optionally to a
+  different model, and returns whichever succeeds first
+- The loser is cancelled if it has not started yet; a sync HTTP call
+  already in flight cannot be interrupted, so it finishes in the
+  background and its answer is dropped (its tokens are still recorded)
+- Metrics: hedge rate, hedge wins, and p99 of what callers waited vs.
+  p99 of the primary request alone (the latency without hedging)
+
+Hedging stays off until `percentile` is set and `min_samples`
+latencies have been observed for the stage.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+WINDOW = 500
+
+
+# -----------------------------
+# Data
+# -----------------------------
+@dataclass(frozen=True, slots=True)
+class HedgeStats:
+    requests: int
+    hedged: int
+    hedge_wins: int
+    p99_primary: Optional[float]     # primary request alone (no hedging)
+    p99_effective: Optional[float]   # what callers actually waited
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.requests if self.requests else 0.0
+
+    def summary(self) -> str:
+        line = (
+            f"{self.hedged}/{self.requests} requests hedged ({self.hedge_rate:.0%}), "
+            f"hedge won {self.hedge_wins}"
+        )
+        if self.p99_primary is not None and self.p99_effective is not None:
+            line += f"; p99 {self.p99_primary:.2f} s → {self.p99_effective:.2f} s"
+        return line
+
+
+def percentile(values: Sequence[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile, p in (0, 1]."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(p * len(ordered))))
+    return ordered[rank - 1]
+
+
+class Hedger:
+    def __init__(
+        self,
+        percentile: Optional[float] = None,
+        hedge_model: Optional[str] = None,
+        min_samples: int = 20,
+        max_workers: int = 32,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.percentile = percentile
+        self.hedge_model = hedge_model
+        self.min_samples = min_samples
+        self._clock = clock
+        self._max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+        self._lock = threading.Lock()
+        self._latency: Dict[str, Deque[float]] = {}
+        self._primary: Deque[float] = deque(maxlen=WINDOW)
+        self._effective: Deque[float] = deque(maxlen=WINDOW)
+        self._requests = 0
+        self._hedged = 0
+        self._wins = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.percentile is not None
+
+    def configure(self, percentile: Optional[float] = None, hedge_model: Optional[str] = None):
+        if percentile is not None and not 0 < percentile <= 1:
+            raise ValueError(f"Hedge percentile must be in (0, 1], got {percentile}")
+        self.percentile = percentile
+        self.hedge_model = hedge_model
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def delay(self, key: str) -> Optional[float]:
+        """Seconds to wait before hedging `key`; None: don't hedge."""
+        if self.percentile is None:
+            return None
+        with self._lock:
+            samples = list(self._latency.get(key, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return percentile(samples, self.percentile)
+
+    def call(self, key: str, attempt: Callable[[Optional[str]], T]) -> T:
+        """
+        attempt(model) runs one request; model None means the request's
+        own model, otherwise the hedge model.
+        """
+        start = self._clock()
+        delay = self.delay(key)
+
+        if delay is None:
+            # Not hedging (yet): run inline, just learn the latency
+            result = self._observe(key, attempt, None)
+            self._done(start, hedged=False, won=False)
+            return result
+
+        pool = self._executor()
+        primary = pool.submit(self._observe, key, attempt, None)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            self._done(start, hedged=False, won=False)
+            return primary.result()
+
+        hedge = pool.submit(attempt, self.hedge_model)
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    self._done(start, hedged=True, won=future is hedge)
+                    return future.result()
+                error = error or future.exception()
+
+        self._done(start, hedged=True, won=False)
+        raise error
+
+    def stats(self) -> HedgeStats:
+        with self._lock:
+            return HedgeStats(
+                self._requests, self._hedged, self._wins,
+                percentile(self._primary, 0.99), percentile(self._effective, 0.99)
+            )
+
+    # -----------------------------
+    # Helpers
+    # -----------------------------
+    def _observe(self, key: str, attempt: Callable[[Optional[str]], T], model: Optional[str]) -> T:
+        # Successful primary latencies only: they set the hedge threshold
+        start = self._clock()
+        result = attempt(model)
+        elapsed = self._clock() - start
+        with self._lock:
+            self._latency.setdefault(key, deque(maxlen=WINDOW)).append(elapsed)
+            self._primary.append(elapsed)
+        return result
+
+    def _done(self, start: float, hedged: bool, won: bool):
+        with self._lock:
+            self._requests += 1
+            self._hedged += hedged
+            self._wins += won
+            self._effective.append(self._clock() - start)
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self._max_workers, thread_name_prefix="llm-hedge")
+            return self._pool
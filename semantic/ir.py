@@ -0,0 +1,412 @@
+"""
+Semantic IR
+
+Typed, __slots__-backed runtime form of the shapes described in
+semantic/schema.py (plans) and of the block trees the compiler emits.
+
+- from_json() checks the structural shape ONCE, at parse time
+- to_json() gives back plain dicts / lists (json.dumps-ready)
+- Capability checks (blocks, arity, comparators) stay in the validator
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+
+class PlanSchemaError(Exception):
+    pass
+
+
+# Expression arguments: variable name, numeric literal or nested expression
+Value = Union[str, int, float, "Expression"]
+
+
+# ------------------------------
+# Expressions
+# ------------------------------
+@dataclass(slots=True)
+class Expression:
+    op: str
+    args: Any    # list of Value when well-formed; kept raw otherwise
+
+    @classmethod
+    def from_json(cls, data: Any) -> "Expression":
+        if not data or not isinstance(data, dict):
+            raise PlanSchemaError("missing_expression")
+        return parse_value(data)
+
+    def to_json(self) -> Dict:
+        return value_to_json(self)
+
+
+# Expressions nest as deep as the planner likes: nested ones go through
+# the explicit-stack fold (semantic/traversal.py imports this module,
+# hence the imports inside the functions); flat ones, by far the most
+# common, are built directly
+def parse_value(v: Any) -> Value:
+    if not isinstance(v, dict):
+        return v
+    _check_expression(v)
+    args = v.get("args", [])
+    if not isinstance(args, list):
+        return Expression(v.get("op"), args)
+    if not any(isinstance(a, dict) for a in args):
+        return Expression(v.get("op"), list(args))
+
+    from semantic.traversal import fold_expression
+    return fold_expression(
+        v, _identity, _build_expression, _check_expression, _json_args, node_type=dict
+    )
+
+
+def value_to_json(v: Value) -> Any:
+    if not isinstance(v, Expression):
+        return v
+    args = v.args
+    if not isinstance(args, list):
+        return {"op": v.op, "args": args}
+    if not any(isinstance(a, Expression) for a in args):
+        return {"op": v.op, "args": list(args)}
+
+    from semantic.traversal import fold_expression
+    return fold_expression(v, _identity, _expression_json)
+
+
+def _identity(v: Any) -> Any:
+    return v
+
+
+def _check_expression(data: Dict):
+    if not data:
+        raise PlanSchemaError("missing_expression")
+
+
+def _json_args(data: Dict) -> List:
+    args = data.get("args", [])
+    return args if isinstance(args, list) else ()
+
+
+def _build_expression(data: Dict, args: List[Value]) -> Expression:
+    raw = data.get("args", [])
+    return Expression(data.get("op"), args if isinstance(raw, list) else raw)
+
+
+def _expression_json(expr: Expression, args: List[Any]) -> Dict:
+    return {"op": expr.op, "args": args if isinstance(expr.args, list) else expr.args}
+
+
+# ------------------------------
+# Inputs / Derived
+# ------------------------------
+@dataclass(slots=True)
+class InputVar:
+    name: str
+    type: str
+
+    @classmethod
+    def from_json(cls, data: Any) -> "InputVar":
+        if not isinstance(data, dict) or "name" not in data or "type" not in data:
+            raise PlanSchemaError("invalid_input_schema")
+        return cls(data["name"], data["type"])
+
+    def to_json(self) -> Dict:
+        return {"name": self.name, "type": self.type}
+
+
+@dataclass(slots=True)
+class DerivedVar:
+    name: str
+    expression: Value    # an Expression; a bare literal once constant-folded
+
+    @classmethod
+    def from_json(cls, data: Any) -> "DerivedVar":
+        if not isinstance(data, dict):
+            raise PlanSchemaError("invalid_derived_schema")
+
+        expression = Expression.from_json(data.get("expression"))
+
+        if "name" not in data:
+            raise PlanSchemaError("invalid_derived_schema")
+
+        return cls(data["name"], expression)
+
+    def to_json(self) -> Dict:
+        return {"name": self.name, "expression": value_to_json(self.expression)}
+
+
+# ------------------------------
+# Conditions
+# ------------------------------
+@dataclass(slots=True)
+class ConditionAtom:
+    left: Value
+    op: str
+    right: Value
+
+    @classmethod
+    def from_json(cls, data: Any) -> "ConditionAtom":
+        if not isinstance(data, dict) or "op" not in data:
+            raise PlanSchemaError("invalid_condition_schema")
+        return cls(
+            parse_value(data.get("left")),
+            data["op"],
+            parse_value(data.get("right"))
+        )
+
+    def to_json(self) -> Dict:
+        return {
+            "left": value_to_json(self.left),
+            "op": self.op,
+            "right": value_to_json(self.right)
+        }
+
+
+@dataclass(slots=True)
+class Condition:
+    op: str
+    conditions: List[ConditionAtom] = field(default_factory=list)
+
+    @classmethod
+    def from_json(cls, data: Any) -> Optional["Condition"]:
+        # Empty / null condition means "no decision"
+        if not data:
+            return None
+
+        if not isinstance(data, dict) or "op" not in data:
+            raise PlanSchemaError("invalid_condition_schema")
+
+        return cls(
+            data["op"],
+            [ConditionAtom.from_json(c) for c in data.get("conditions", [])]
+        )
+
+    def to_json(self) -> Dict:
+        return {
+            "op": self.op,
+            "conditions": [c.to_json() for c in self.conditions]
+        }
+
+
+# ------------------------------
+# Actions
+# ------------------------------
+# Keys with dedicated slots; every other key of an action is an operand
+_ACTION_KEYS = {"type", "value", "condition", "body", "then", "else"}
+
+
+@dataclass(slots=True)
+class Action:
+    type: str
+    value: Any = None
+    # Extended tier: loops, variables, lists, calls (data/semantic_ops.json)
+    operands: Dict[str, Value] = field(default_factory=dict)   # name, var, list, times, from, ...
+    condition: Optional[Condition] = None                     # if / while
+    body: List["Action"] = field(default_factory=list)        # loop body / if-then
+    else_: List["Action"] = field(default_factory=list)       # if-else
+
+    @classmethod
+    def from_json(cls, data: Any) -> "Action":
+        if not isinstance(data, dict) or "type" not in data:
+            raise PlanSchemaError("invalid_action_schema")
+
+        return cls(
+            data["type"],
+            parse_value(data.get("value")),
+            {k: parse_value(v) for k, v in data.items() if k not in _ACTION_KEYS},
+            Condition.from_json(data.get("condition")),
+            _actions_from_json(data.get("body", data.get("then"))),
+            _actions_from_json(data.get("else"))
+        )
+
+    def operand(self, key: str) -> Any:
+        return self.value if key == "value" else self.operands.get(key)
+
+    def to_json(self) -> Dict:
+        out = {"type": self.type}
+        extended = self.operands or self.condition or self.body or self.else_
+        if self.value is not None or not extended:
+            out["value"] = value_to_json(self.value)
+        for k, v in self.operands.items():
+            out[k] = value_to_json(v)
+        if self.condition is not None:
+            out["condition"] = self.condition.to_json()
+        if self.type == "if":
+            out["then"] = [a.to_json() for a in self.body]
+            out["else"] = [a.to_json() for a in self.else_]
+        elif self.body:
+            out["body"] = [a.to_json() for a in self.body]
+        return out
+
+
+def _actions_from_json(data: Any) -> List[Action]:
+    if data is None:
+        return []
+    if not isinstance(data, list):
+        raise PlanSchemaError("invalid_action_schema")
+    return [Action.from_json(a) for a in data]
+
+
+@dataclass(slots=True)
+class Actions:
+    then: List[Action] = field(default_factory=list)
+    else_: List[Action] = field(default_factory=list)
+
+    @classmethod
+    def from_json(cls, data: Any) -> "Actions":
+        data = data or {}
+        if not isinstance(data, dict):
+            raise PlanSchemaError("invalid_action_schema")
+        return cls(
+            [Action.from_json(a) for a in data.get("then", [])],
+            [Action.from_json(a) for a in data.get("else", [])]
+        )
+
+    def to_json(self) -> Dict:
+        return {
+            "then": [a.to_json() for a in self.then],
+            "else": [a.to_json() for a in self.else_]
+        }
+
+
+# ------------------------------
+# Functions (extended tier)
+# ------------------------------
+@dataclass(slots=True)
+class Function:
+    name: str
+    body: List[Action] = field(default_factory=list)
+    returns: Optional[Value] = None    # None → procedure without a result
+
+    @classmethod
+    def from_json(cls, data: Any) -> "Function":
+        if not isinstance(data, dict) or not isinstance(data.get("name"), str):
+            raise PlanSchemaError("invalid_function_schema")
+        return cls(
+            data["name"],
+            _actions_from_json(data.get("body")),
+            parse_value(data.get("returns"))
+        )
+
+    def to_json(self) -> Dict:
+        out = {"name": self.name, "body": [a.to_json() for a in self.body]}
+        if self.returns is not None:
+            out["returns"] = value_to_json(self.returns)
+        return out
+
+
+# ------------------------------
+# Semantic Plan
+# ------------------------------
+@dataclass(slots=True)
+class SemanticPlan:
+    inputs: List[InputVar] = field(default_factory=list)
+    derived: List[DerivedVar] = field(default_factory=list)
+    condition: Optional[Condition] = None
+    actions: Actions = field(default_factory=Actions)
+    functions: List[Function] = field(default_factory=list)
+
+    @classmethod
+    def from_json(cls, data: Any) -> "SemanticPlan":
+        if isinstance(data, cls):
+            return data
+
+        if not isinstance(data, dict):
+            raise PlanSchemaError("invalid_plan: semantic plan must be a JSON object")
+
+        return cls(
+            [InputVar.from_json(i) for i in data.get("inputs") or []],
+            [DerivedVar.from_json(d) for d in data.get("derived") or []],
+            Condition.from_json(data.get("condition")),
+            Actions.from_json(data.get("actions")),
+            [Function.from_json(f) for f in data.get("functions") or []]
+        )
+
+    def to_json(self) -> Dict:
+        out = {
+            "inputs": [i.to_json() for i in self.inputs],
+            "derived": [d.to_json() for d in self.derived],
+            "condition": self.condition.to_json() if self.condition else None,
+            "actions": self.actions.to_json()
+        }
+        if self.functions:
+            out["functions"] = [f.to_json() for f in self.functions]
+        return out
+
+
+# ------------------------------
+# Block tree
+# ------------------------------
+@dataclass(slots=True)
+class Block:
+    type: str
+    fields: Optional[Dict[str, Any]] = None
+    value_inputs: Optional[Dict[str, Optional["Block"]]] = None
+    statement_inputs: Optional[Dict[str, Optional["Block"]]] = None
+    next: Optional["Block"] = None
+    mutation: Optional[Dict[str, Any]] = None    # Blockly <mutation> attributes
+
+    @classmethod
+    def from_json(cls, data: Optional[Dict]) -> Optional["Block"]:
+        if data is None:
+            return None
+
+        # `next` chains can be thousands long: walk them iteratively
+        head = None
+        current = None
+        while data is not None:
+            if not isinstance(data, dict) or "type" not in data:
+                raise PlanSchemaError(f"invalid_block: {data!r}")
+
+            block = cls(
+                data["type"],
+                dict(data["fields"]) if data.get("fields") is not None else None,
+                _inputs_from_json(data.get("value_inputs")),
+                _inputs_from_json(data.get("statement_inputs")),
+                mutation=dict(data["mutation"]) if data.get("mutation") is not None else None
+            )
+
+            if current is None:
+                head = block
+            else:
+                current.next = block
+            current = block
+            data = data.get("next")
+
+        return head
+
+    def to_json(self) -> Dict:
+        head = None
+        current = None
+        block = self
+        while block is not None:
+            out = {"type": block.type}
+            if block.mutation is not None:
+                out["mutation"] = dict(block.mutation)
+            if block.fields is not None:
+                out["fields"] = dict(block.fields)
+            if block.value_inputs is not None:
+                out["value_inputs"] = _inputs_to_json(block.value_inputs)
+            if block.statement_inputs is not None:
+                out["statement_inputs"] = _inputs_to_json(block.statement_inputs)
+
+            if current is None:
+                head = out
+            else:
+                current["next"] = out
+            current = out
+            block = block.next
+
+        return head
+
+
+def _inputs_from_json(inputs: Optional[Dict]) -> Optional[Dict[str, Optional[Block]]]:
+    if inputs is None:
+        return None
+    return {name: Block.from_json(child) for name, child in inputs.items()}
+
+
+def _inputs_to_json(inputs: Dict[str, Optional[Block]]) -> Dict:
+    return {
+        name: child.to_json() if child is not None else None
+        for name, child in inputs.items()
+    }
@@ -1,6 +1,6 @@
 import json
 import re
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 
 class JSONExtractionError(Exception):
@@ -98,3 +98,44 @@ def extract_json_from_text(text: str) -> Dict[str, Any]:
         "No valid JSON object found in LLM response.\n"
         f"Raw response:\n{text}"
     )
+
+
+def extract_json_objects_from_text(text: str) -> List[Dict[str, Any]]:
+    """
+    Extracts a JSON array of objects (multi-candidate responses).
+
+    Strategy (in order):
+    1) Direct JSON parse (an array, or a single object)
+    2) Markdown ```json [...]``` block extraction
+    3) Outermost [...] slice
+    4) A single object, via extract_json_from_text
+
+    Non-object array items are dropped.
+    Raises JSONExtractionError if nothing usable is found.
+    """
+
+    if not text or not isinstance(text, str):
+        raise JSONExtractionError("Input must be a non-empty string")
+
+    text = text.strip()
+
+    candidates = [text]
+    candidates += re.findall(r"```(?:json)?\s*(\[.*?\])\s*```", text, re.DOTALL)
+
+    first, last = text.find("["), text.rfind("]")
+    if first != -1 and last > first:
+        candidates.append(text[first : last + 1])
+
+    for candidate in candidates:
+        try:
+            parsed = json.loads(candidate)
+        except Exception:
+            continue
+        if isinstance(parsed, dict):
+            return [parsed]
+        if isinstance(parsed, list):
+            objects = [item for item in parsed if isinstance(item, dict)]
+            if objects:
+                return objects
+
+    return [extract_json_from_text(text)]
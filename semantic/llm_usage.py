@@ -0,0 +1,235 @@
+"""
+LLM call accounting (all stages: expander, planner, repair, fallback)
+
+- Every chat completion goes through create_chat_completion(), which
+  times the call and records prompt / completion / cached tokens from
+  the response `usage` (cached = provider-side prompt-prefix cache hits)
+- LEDGER keeps one record per call; summaries aggregate per stage, for
+  a whole batch, or for the calls since a mark (one problem)
+- Thread-safe: candidate and repair stages may call concurrently
+- Identical requests in flight at the same time share one network call
+  (semantic/single_flight.py); the extra callers are recorded as
+  coalesced, with no tokens
+- Network calls pass through CONTROLLER (semantic/rate_limit.py):
+  adaptive concurrency, rate-limit headers, retries with jitter
+- Opt-in hedging (HEDGER, semantic/hedging.py): a request still running
+  at the stage's latency percentile gets one duplicate; first answer wins
+- base_url(): OPENROUTER_BASE_URL points every stage at another
+  OpenAI-compatible server (e.g. the replay stub in bench/llm_stub.py)
+"""
+
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from semantic.hedging import Hedger
+from semantic.rate_limit import RateLimitController
+from semantic.single_flight import SingleFlight, request_key
+
+
+# -----------------------------
+# Data
+# -----------------------------
+@dataclass(frozen=True, slots=True)
+class CallRecord:
+    stage: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int
+    seconds: float
+    error: bool = False
+    coalesced: bool = False    # served by an identical in-flight call
+
+
+@dataclass(slots=True)
+class StageUsage:
+    calls: int = 0              # network calls
+    coalesced: int = 0          # requests that shared another call's result
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    seconds: float = 0.0
+
+    def add(self, r: CallRecord):
+        if r.coalesced:
+            self.coalesced += 1
+            return
+        self.calls += 1
+        self.errors += r.error
+        self.prompt_tokens += r.prompt_tokens
+        self.completion_tokens += r.completion_tokens
+        self.cached_tokens += r.cached_tokens
+        self.seconds += r.seconds
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Share of prompt tokens served from the provider's prefix cache."""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def summary(self) -> str:
+        avg = self.seconds / self.calls if self.calls else 0.0
+        errors = f", {self.errors} failed" if self.errors else ""
+        coalesced = f", {self.coalesced} coalesced" if self.coalesced else ""
+        return (
+            f"{self.calls} call(s){errors}{coalesced}, {self.prompt_tokens} prompt "
+            f"({self.cached_tokens} cached, {self.cache_hit_rate:.0%}) + "
+            f"{self.completion_tokens} completion tokens, "
+            f"{self.seconds:.2f} s ({avg:.2f} s/call)"
+        )
+
+
+class UsageLedger:
+    def __init__(self):
+        self._records: List[CallRecord] = []
+        self._lock = threading.Lock()
+
+    def record(self, r: CallRecord):
+        with self._lock:
+            self._records.append(r)
+
+    def mark(self) -> int:
+        """Pass to by_stage() / summary() to cover only later calls."""
+        with self._lock:
+            return len(self._records)
+
+    def records(self, since: int = 0) -> List[CallRecord]:
+        with self._lock:
+            return self._records[since:]
+
+    def by_stage(self, since: int = 0) -> Dict[str, StageUsage]:
+        stages: Dict[str, StageUsage] = {}
+        for r in self.records(since):
+            stages.setdefault(r.stage, StageUsage()).add(r)
+        return stages
+
+    def total(self, since: int = 0) -> StageUsage:
+        total = StageUsage()
+        for r in self.records(since):
+            total.add(r)
+        return total
+
+    def summary(self, since: int = 0) -> str:
+        lines = [f"  {stage:<10} {usage.summary()}" for stage, usage in self.by_stage(since).items()]
+        lines.append(f"  {'total':<10} {self.total(since).summary()}")
+        return "\n".join(lines)
+
+    def to_json(self, since: int = 0) -> Dict[str, Any]:
+        return {
+            "stages": {stage: asdict(usage) for stage, usage in self.by_stage(since).items()},
+            "total": asdict(self.total(since)),
+            "calls": [asdict(r) for r in self.records(since)],
+        }
+
+
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+
+LEDGER = UsageLedger()
+
+# Process-wide: concurrent identical requests from any stage share a call
+FLIGHTS = SingleFlight()
+
+# Process-wide: one concurrency / rate budget for every stage
+CONTROLLER = RateLimitController()
+
+# Process-wide, off until configured (HEDGER.configure(percentile=0.95))
+HEDGER = Hedger()
+
+
+# -----------------------------
+# Public API
+# -----------------------------
+def base_url() -> str:
+    """Endpoint for every stage's OpenAI client."""
+    return os.getenv("OPENROUTER_BASE_URL") or DEFAULT_BASE_URL
+
+
+def create_chat_completion(
+    client,
+    stage: str,
+    ledger: Optional[UsageLedger] = None,
+    flights: Optional[SingleFlight] = FLIGHTS,
+    **kwargs
+):
+    """
+    client.chat.completions.create(**kwargs), timed and recorded under
+    `stage`. Exceptions propagate (recorded as a failed call).
+
+    Concurrent calls with the same endpoint + request share one network
+    call; pass flights=None to always call.
+    """
+    ledger = ledger if ledger is not None else LEDGER
+    model = kwargs.get("model", "")
+
+    if flights is None:
+        return _hedged_call(client, stage, ledger, kwargs)
+
+    key = request_key(base_url=getattr(client, "base_url", None), **kwargs)
+    start = time.perf_counter()
+    leader = []
+
+    def call():
+        leader.append(True)
+        return _hedged_call(client, stage, ledger, kwargs)
+
+    response = flights.do(key, call)
+
+    if not leader:
+        ledger.record(CallRecord(stage, model, 0, 0, 0, time.perf_counter() - start, coalesced=True))
+    return response
+
+
+def _hedged_call(client, stage: str, ledger: UsageLedger, kwargs: Dict[str, Any]):
+    if not HEDGER.enabled:
+        return _timed_call(client, stage, ledger, kwargs)
+
+    def attempt(model: Optional[str]):
+        request = dict(kwargs, model=model) if model else kwargs
+        return _timed_call(client, stage, ledger, request)
+
+    return HEDGER.call(f"{stage}:{kwargs.get('model', '')}", attempt)
+
+
+def _timed_call(client, stage: str, ledger: UsageLedger, kwargs: Dict[str, Any]):
+    model = kwargs.get("model", "")
+    start = time.perf_counter()
+
+    try:
+        response = CONTROLLER.call(lambda: _send(client, kwargs))
+    except Exception:
+        ledger.record(CallRecord(stage, model, 0, 0, 0, time.perf_counter() - start, error=True))
+        raise
+
+    ledger.record(usage_record(stage, model, response, time.perf_counter() - start))
+    return response
+
+
+def _send(client, kwargs: Dict[str, Any]):
+    # The raw-response API exposes the rate-limit headers (openai SDK)
+    raw_api = getattr(client.chat.completions, "with_raw_response", None)
+    if raw_api is None:
+        return client.chat.completions.create(**kwargs), {}
+    raw = raw_api.create(**kwargs)
+    return raw.parse(), raw.headers
+
+
+def usage_record(stage: str, model: str, response, seconds: float) -> CallRecord:
+    # `usage` is optional in OpenAI-compatible responses; cached tokens
+    # live in prompt_tokens_details (OpenAI / OpenRouter) when reported
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return CallRecord(
+        stage,
+        getattr(response, "model", None) or model,
+        _int(getattr(usage, "prompt_tokens", 0)),
+        _int(getattr(usage, "completion_tokens", 0)),
+        _int(getattr(details, "cached_tokens", 0)),
+        seconds
+    )
+
+
+def _int(v) -> int:
+    return v if isinstance(v, int) else 0
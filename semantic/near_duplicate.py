@@ -0,0 +1,223 @@
+"""
+Near-duplicate problem detection (MinHash + LSH over shingles)
+
+- A statement becomes a set of character 5-shingles of its normalized
+  text (lowercase, punctuation dropped, whitespace collapsed; operator
+  characters < > = != + - * / % are kept), so "Find the sum of two
+  numbers." and "find the sum of two numbers" share every shingle
+- MinHash signatures estimate Jaccard similarity; LSH banding finds
+  candidates without comparing against every stored statement
+- Candidates are confirmed with the exact Jaccard of the shingle sets,
+  and both statements must have the same numbers, operators, content
+  words (FILLER words aside) and output literals (quoted text, the word
+  after print / output / display, case kept): "greater than 10" vs
+  "greater than 20", "a > b" vs "a < b", "total cost" vs "total cost
+  after tax" or "print Fail" vs "print Failed" is another plan
+- Likewise a statement that swaps one word of a CONTRASTS pair for the
+  other (even / odd, and / or, all / any, ...) or negates where the
+  other does not (NEGATIONS) is never a duplicate
+
+Used by semantic/plan_library.py to reuse a solved problem's plan.
+"""
+
+import hashlib
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+SHINGLE = 5
+NUM_PERM = 64
+BANDS = 16                      # 16 bands x 4 rows: candidates from ~0.5 Jaccard
+ROWS = NUM_PERM // BANDS
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# One word for the other changes the plan, however similar the rest is
+CONTRASTS = (
+    ("even", "odd"), ("maximum", "minimum"), ("max", "min"),
+    ("largest", "smallest"), ("greatest", "smallest"), ("highest", "lowest"),
+    ("greater", "less"), ("greater", "smaller"), ("more", "less"), ("more", "fewer"),
+    ("above", "below"), ("positive", "negative"), ("increasing", "decreasing"),
+    ("ascending", "descending"), ("first", "last"), ("sum", "product"),
+    ("add", "subtract"), ("vowel", "consonant"), ("prime", "composite"),
+    ("true", "false"), ("valid", "invalid"), ("before", "after"),
+    ("and", "or"), ("all", "any"), ("both", "either"), ("every", "some"),
+    ("least", "most"), ("inclusive", "exclusive"), ("equal", "unequal"),
+    ("divisible", "indivisible"), ("upper", "lower"), ("left", "right"),
+)
+
+# Either both statements negate with these words or neither does
+# (apostrophes are dropped: "isn't" -> "isn t")
+NEGATIONS = frozenset(
+    "not no never none neither nor without except cannot isn doesn don aren won".split()
+)
+
+# Words whose presence does not change the problem
+FILLER = frozenset(
+    "a an the of to is are be given then that this these its their it as".split()
+)
+
+_PUNCT = re.compile(r"[^a-z0-9\s<>=!+\-*/%]|!(?!=)")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+# Quoted text, or the word an output verb prints
+_LITERAL = re.compile(
+    r'"([^"]*)"|\u201c([^\u201d]*)\u201d|(?<!\w)\'([^\']*)\'(?!\w)'
+    r"|\b(?:print|prints|output|outputs|display|displays)\s+([^\s,.;:!?\"'\u201c]+)",
+    re.IGNORECASE
+)
+# Comparison / arithmetic symbols; "!" is only one in "!=", a hyphen
+# inside a word is not minus
+_OPERATOR = re.compile(r"[<>=]+|!=+|[+*/%]|(?<![a-z])-(?![a-z])", re.IGNORECASE)
+
+
+def _permutations(n: int) -> List[Tuple[int, int]]:
+    # Fixed (a, b) pairs: signatures stay comparable across runs
+    params = []
+    for i in range(n):
+        digest = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "little") % (_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], "little") % _PRIME
+        params.append((a, b))
+    return params
+
+
+_PERMUTATIONS = _permutations(NUM_PERM)
+
+
+@dataclass(frozen=True, slots=True)
+class Match:
+    doc: int
+    similarity: float       # exact Jaccard of the shingle sets
+
+
+def normalize(text: str) -> str:
+    return " ".join(_PUNCT.sub(" ", text.lower()).split())
+
+
+def shingles(text: str) -> FrozenSet[int]:
+    norm = normalize(text)
+    if len(norm) <= SHINGLE:
+        grams = {norm}
+    else:
+        grams = {norm[i:i + SHINGLE] for i in range(len(norm) - SHINGLE + 1)}
+    return frozenset(
+        int.from_bytes(hashlib.blake2b(g.encode(), digest_size=4).digest(), "little")
+        for g in grams
+    )
+
+
+def signature(shingle_set: FrozenSet[int]) -> Tuple[int, ...]:
+    if not shingle_set:
+        return (_MAX_HASH,) * NUM_PERM
+    return tuple(
+        min(((a * s + b) % _PRIME) & _MAX_HASH for s in shingle_set)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def jaccard(x: FrozenSet[int], y: FrozenSet[int]) -> float:
+    if not x and not y:
+        return 1.0
+    return len(x & y) / len(x | y)
+
+
+def numbers(text: str) -> Tuple[str, ...]:
+    return tuple(sorted(_NUMBER.findall(text)))
+
+
+def operators(text: str) -> Tuple[str, ...]:
+    return tuple(sorted(_OPERATOR.findall(text)))
+
+
+def literals(text: str) -> Tuple[str, ...]:
+    return tuple(sorted("".join(groups) for groups in _LITERAL.findall(text)))
+
+
+def content_words(text: str) -> FrozenSet[str]:
+    return words(text) - FILLER
+
+
+def contrasting(x: FrozenSet[str], y: FrozenSet[str]) -> bool:
+    """
+    True if one word set has a CONTRASTS word where the other has its
+    opposite, or the two negate differently.
+    """
+    if x & NEGATIONS != y & NEGATIONS:
+        return True
+    for a, b in CONTRASTS:
+        if (a in x and b in y and a not in y) or (b in x and a in y and b not in y):
+            return True
+    return False
+
+
+def words(text: str) -> FrozenSet[str]:
+    return frozenset(normalize(text).split())
+
+
+class NearDuplicateIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._shingles: List[FrozenSet[int]] = []
+        self._numbers: List[Tuple[str, ...]] = []
+        self._operators: List[Tuple[str, ...]] = []
+        self._literals: List[Tuple[str, ...]] = []
+        self._words: List[FrozenSet[str]] = []
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._shingles)
+
+    def add(self, text: str) -> int:
+        """Indexes a statement; returns its doc number (0, 1, 2, ...)."""
+        shingle_set = shingles(text)
+        bands = _bands(signature(shingle_set))
+        with self._lock:
+            doc = len(self._shingles)
+            self._shingles.append(shingle_set)
+            self._numbers.append(numbers(text))
+            self._operators.append(operators(text))
+            self._literals.append(literals(text))
+            self._words.append(words(text))
+            for band in bands:
+                self._buckets.setdefault(band, []).append(doc)
+            return doc
+
+    def query(self, text: str, threshold: float) -> List[Match]:
+        """
+        Stored statements with Jaccard >= threshold, the same numbers,
+        operators, literals and content words and no contrasting words,
+        best first.
+        """
+        shingle_set = shingles(text)
+        nums = numbers(text)
+        ops = operators(text)
+        lits = literals(text)
+        word_set = words(text)
+        content = word_set - FILLER
+        bands = _bands(signature(shingle_set))
+
+        with self._lock:
+            candidates: Set[int] = set()
+            for band in bands:
+                candidates.update(self._buckets.get(band, ()))
+
+            matches = []
+            for doc in candidates:
+                if self._numbers[doc] != nums or self._operators[doc] != ops:
+                    continue
+                if self._literals[doc] != lits or self._words[doc] - FILLER != content:
+                    continue
+                if contrasting(word_set, self._words[doc]):
+                    continue
+                similarity = jaccard(shingle_set, self._shingles[doc])
+                if similarity >= threshold:
+                    matches.append(Match(doc, similarity))
+
+        return sorted(matches, key=lambda m: (-m.similarity, m.doc))
+
+
+def _bands(sig: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+    return [(i, sig[i * ROWS:(i + 1) * ROWS]) for i in range(BANDS)]
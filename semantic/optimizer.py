@@ -0,0 +1,663 @@
+"""
+Plan Optimizer (between Modules 2 and 3)
+
+Runs on a VALIDATED semantic plan, before SemanticCompiler.compile:
+- Constant folding: arithmetic over numeric literals becomes one literal
+- Constant propagation: a derived variable assigned once from a literal
+  is substituted into the places that read it
+- Dead-derivation elimination: derived variables nothing reads are dropped
+- Trivial conditions: literal-vs-literal comparisons are decided up front
+- Common subexpressions: an expression repeated across derived variables
+  and the condition is computed once, into a derived variable
+
+Every rewrite keeps the generated Python's output identical. Blockly turns
+math_number text into a JS Number, so a fold is only kept when that round
+trip preserves it (e.g. 8 / 2 = 4.0 would print as "4"; it is NOT folded).
+"""
+
+import math
+import operator
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+from semantic.compiler import SemanticCompiler
+from semantic.dispatch import DispatchTable, load_dispatch_table
+from semantic.ir import (
+    Action, Actions, Condition, ConditionAtom, DerivedVar, Expression, Function,
+    SemanticPlan, Value
+)
+from semantic.traversal import fold_expression, iter_blocks, iter_expressions
+
+# Largest integer a JS Number holds exactly
+MAX_SAFE_INT = 2 ** 53
+
+
+# -----------------------------
+# Stats
+# -----------------------------
+@dataclass(slots=True)
+class OptimizationStats:
+    folded: int = 0                 # expressions replaced by a literal
+    propagated: int = 0             # variable reads replaced by a literal
+    dead_derived: int = 0           # derived variables removed
+    atoms_removed: int = 0          # comparisons decided at compile time
+    cse_hoisted: int = 0            # repeated expressions computed once
+    cse_replaced: int = 0           # occurrences replaced by a variable read
+    blocks_before: int = 0
+    blocks_after: int = 0
+
+    @property
+    def blocks_removed(self) -> int:
+        return self.blocks_before - self.blocks_after
+
+    def summary(self) -> str:
+        return (
+            f"{self.blocks_removed} blocks removed ({self.blocks_before} → {self.blocks_after}): "
+            f"{self.folded} folded, {self.propagated} propagated, "
+            f"{self.dead_derived} dead derived, {self.atoms_removed} atoms decided, "
+            f"{self.cse_hoisted} subexpressions hoisted, {self.cse_replaced} uses shared"
+        )
+
+
+# -----------------------------
+# Constant evaluation
+# -----------------------------
+def _checked_div(a, b):
+    return a / b if b != 0 else None
+
+
+def _checked_mod(a, b):
+    return a % b if b != 0 else None
+
+
+def _checked_sqrt(a):
+    return math.sqrt(a) if a >= 0 else None
+
+
+FOLDERS: Dict[str, Tuple[int, Callable]] = {
+    "+": (2, operator.add),
+    "-": (2, operator.sub),
+    "*": (2, operator.mul),
+    "/": (2, _checked_div),
+    "mod": (2, _checked_mod),
+    "abs": (1, math.fabs),      # Blockly ABS is math.fabs: always a float
+    "neg": (1, operator.neg),
+    "sqrt": (1, _checked_sqrt),
+    "min": (2, min),
+    "max": (2, max),
+}
+
+COMPARATORS: Dict[str, Callable] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def is_literal(v) -> bool:
+    # bool is an int subclass, but never a math_number
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _representable(v) -> bool:
+    """True if a math_number holding str(v) generates exactly `v` again."""
+    if isinstance(v, bool):
+        return False
+    if isinstance(v, int):
+        return abs(v) <= MAX_SAFE_INT
+    if isinstance(v, float):
+        return math.isfinite(v) and not v.is_integer()
+    return False
+
+
+def evaluate(op: str, args: List) -> Optional[Union[int, float]]:
+    """Value of `op` over literal args, or None if it must stay a block."""
+    folder = FOLDERS.get(op)
+    if folder is None or not isinstance(args, list):
+        return None
+
+    arity, fn = folder
+    if len(args) != arity or not all(is_literal(a) for a in args):
+        return None
+
+    try:
+        result = fn(*args)
+    except (ArithmeticError, ValueError):
+        return None
+
+    return result if result is not None and _representable(result) else None
+
+
+# -----------------------------
+# Optimizer
+# -----------------------------
+class PlanOptimizer:
+    def __init__(self, dispatch: Optional[DispatchTable] = None):
+        self.dispatch = dispatch if dispatch is not None else load_dispatch_table()
+        self.compiler = SemanticCompiler(self.dispatch)
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def optimize(
+        self,
+        plan: Union[Dict, SemanticPlan],
+        measure: bool = True
+    ) -> Tuple[SemanticPlan, OptimizationStats]:
+        """
+        Returns (optimized plan, stats). The input plan is not modified.
+        measure=True compiles before + after to count removed blocks.
+        """
+        plan = SemanticPlan.from_json(plan)
+        stats = OptimizationStats()
+
+        if measure:
+            stats.blocks_before = count_blocks(self.compiler.compile(plan))
+
+        written = _written_names(plan)
+
+        # 1️⃣ Fold + propagate, in program order
+        consts: Dict[str, Union[int, float]] = {}
+        derived = []
+        for d in plan.derived:
+            expression = self._fold(d.expression, consts, stats)
+            derived.append((d.name, expression))
+
+            if is_literal(expression) and written.get(d.name, 0) == 1:
+                consts[d.name] = expression
+
+        condition = self._fold_condition(plan.condition, consts, stats)
+        actions = Actions(
+            [self._fold_action(a, consts, stats) for a in plan.actions.then],
+            [self._fold_action(a, consts, stats) for a in plan.actions.else_]
+        )
+        functions = [
+            Function(
+                fn.name,
+                [self._fold_action(a, consts, stats) for a in fn.body],
+                self._fold(fn.returns, consts, stats)
+            )
+            for fn in plan.functions
+        ]
+
+        # 2️⃣ Trivial condition
+        condition, actions = self._simplify_condition(condition, actions, stats)
+
+        # 3️⃣ Common subexpressions (derived + condition)
+        derived, condition = eliminate_common_subexpressions(
+            derived, condition, _names(plan), stats
+        )
+
+        # 4️⃣ Dead derived variables (backwards liveness)
+        live: Set[str] = set()
+        _reads_condition(condition, live)
+        for a in actions.then + actions.else_:
+            _reads_action(a, live)
+        for fn in functions:
+            for a in fn.body:
+                _reads_action(a, live)
+            _reads_value(fn.returns, live)
+
+        kept: List[DerivedVar] = []
+        for name, expression in reversed(derived):
+            if name not in live and not _has_call(expression):
+                stats.dead_derived += 1
+                continue
+            live.discard(name)
+            _reads_value(expression, live)
+            kept.append(DerivedVar(name, expression))
+        kept.reverse()
+
+        optimized = SemanticPlan(list(plan.inputs), kept, condition, actions, functions)
+
+        if measure:
+            stats.blocks_after = count_blocks(self.compiler.compile(optimized))
+
+        return optimized, stats
+
+    # -----------------------------
+    # Folding
+    # -----------------------------
+    def _fold(self, v: Value, consts: Dict, stats: OptimizationStats) -> Value:
+        if not isinstance(v, (Expression, str)):
+            return v
+
+        def leaf(a):
+            if isinstance(a, str) and a in consts:
+                stats.propagated += 1
+                return consts[a]
+            return a
+
+        def node(e, args):
+            if not _folds(e):
+                return e
+            value = evaluate(e.op, args)
+            if value is not None:
+                stats.folded += 1
+                return value
+            return Expression(e.op, args)
+
+        return fold_expression(v, leaf, node, children=_fold_args)
+
+    def _fold_condition(
+        self,
+        condition: Optional[Condition],
+        consts: Dict,
+        stats: OptimizationStats
+    ) -> Optional[Condition]:
+        if condition is None:
+            return None
+        return Condition(condition.op, [
+            ConditionAtom(
+                self._fold(c.left, consts, stats),
+                c.op,
+                self._fold(c.right, consts, stats)
+            )
+            for c in condition.conditions
+        ])
+
+    def _fold_action(self, action: Action, consts: Dict, stats: OptimizationStats) -> Action:
+        spec = self.dispatch.actions.get(action.type)
+
+        # Only value operands are reads; names being assigned stay as-is
+        value_keys = set(spec.args) if spec is not None else set()
+
+        value = action.value
+        if "value" in value_keys:
+            value = self._fold(value, consts, stats)
+
+        return Action(
+            action.type,
+            value,
+            {
+                k: self._fold(v, consts, stats) if k in value_keys else v
+                for k, v in action.operands.items()
+            },
+            self._fold_condition(action.condition, consts, stats),
+            [self._fold_action(a, consts, stats) for a in action.body],
+            [self._fold_action(a, consts, stats) for a in action.else_]
+        )
+
+    # -----------------------------
+    # Conditions
+    # -----------------------------
+    def _simplify_condition(
+        self,
+        condition: Optional[Condition],
+        actions: Actions,
+        stats: OptimizationStats
+    ) -> Tuple[Optional[Condition], Actions]:
+        if condition is None or condition.op not in ("and", "or") or not condition.conditions:
+            return condition, actions
+
+        atoms = condition.conditions
+        if any(_has_call(c.left) or _has_call(c.right) for c in atoms):
+            # Calls may print: keep every comparison that would run
+            return condition, actions
+
+        # and: one False atom decides the group; or: one True atom does
+        decisive = condition.op == "or"
+        outcomes = [_decide(c) for c in atoms]
+
+        if decisive in outcomes:
+            outcome = decisive
+            atom = atoms[outcomes.index(decisive)]
+        else:
+            kept = [c for c, o in zip(atoms, outcomes) if o is None]
+            if kept:
+                stats.atoms_removed += len(atoms) - len(kept)
+                return Condition(condition.op, kept), actions
+            outcome = not decisive
+            atom = atoms[-1]
+
+        taken = actions.then if outcome else actions.else_
+
+        if not taken or self.dispatch.tier != "core":
+            # Nothing left to decide: the taken branch (if any) runs as-is
+            stats.atoms_removed += len(atoms)
+            return None, Actions(taken, [])
+
+        # The core tier cannot emit actions without an if-block:
+        # keep one literal atom and drop the branch it never takes
+        stats.atoms_removed += len(atoms) - 1
+        if outcome:
+            return Condition(condition.op, [atom]), Actions(taken, [])
+        return Condition(condition.op, [atom]), Actions([], taken)
+
+
+# -----------------------------
+# Common subexpressions
+# -----------------------------
+# Ops that cannot raise on numbers: safe to evaluate ahead of a
+# short-circuiting and / or that might have skipped them
+TOTAL_OPS = {"+", "-", "*", "abs", "neg", "min", "max"}
+
+CSE_PREFIX = "common_"
+
+
+def eliminate_common_subexpressions(
+    derived: List[Tuple[str, Value]],
+    condition: Optional[Condition],
+    reserved: Set[str],
+    stats: OptimizationStats
+) -> Tuple[List[Tuple[str, Value]], Optional[Condition]]:
+    """
+    Hoists expressions repeated across `derived` [(name, value), ...] and
+    the condition into one derived variable (or reuses a derived variable
+    that already computes it), largest first, while that shrinks the
+    program. Positions: derived index, len(derived) = the condition.
+    """
+    derived = list(derived)
+    reserved = set(reserved)
+    counter = 0
+
+    while True:
+        candidate = _best_candidate(derived, condition)
+        if candidate is None:
+            return derived, condition
+
+        expr, key, first, reuse = candidate
+
+        if reuse is not None:
+            name = reuse
+        else:
+            counter += 1
+            while f"{CSE_PREFIX}{counter}" in reserved:
+                counter += 1
+            name = f"{CSE_PREFIX}{counter}"
+            reserved.add(name)
+            derived.insert(first, (name, expr))
+            stats.cse_hoisted += 1
+
+        # Rewrite every later occurrence (not the defining one)
+        start = first + 1
+        replaced = [0]
+        derived[start:] = [
+            (n, _replace(v, key, name, replaced)) for n, v in derived[start:]
+        ]
+        if condition is not None:
+            condition = Condition(condition.op, [
+                ConditionAtom(
+                    _replace(c.left, key, name, replaced),
+                    c.op,
+                    _replace(c.right, key, name, replaced)
+                )
+                for c in condition.conditions
+            ])
+        stats.cse_replaced += replaced[0]
+
+
+def _best_candidate(derived: List[Tuple[str, Value]], condition: Optional[Condition]):
+    end = len(derived)
+
+    # key → [expression, size, [(position, atom index)]]
+    seen: Dict[tuple, list] = {}
+
+    def visit(v: Value, position: int, atom: int):
+        if not isinstance(v, Expression):
+            return
+        keys, sizes = _subtree_keys(v)
+        stack = [v]
+        while stack:
+            e = stack.pop()
+            key = keys.get(id(e)) if isinstance(e, Expression) else None
+            if key is None:
+                continue
+            entry = seen.setdefault(key, [e, sizes[id(e)], []])
+            entry[2].append((position, atom))
+            stack.extend(e.args)
+
+    for i, (_, v) in enumerate(derived):
+        visit(v, i, -1)
+    if condition is not None:
+        for j, c in enumerate(condition.conditions):
+            visit(c.left, end, j)
+            visit(c.right, end, j)
+
+    # Largest first: hoisting it also removes its repeated sub-expressions
+    for key, (expr, size, where) in sorted(seen.items(), key=lambda kv: -kv[1][1]):
+        n = len(where)
+        if n < 2 or _has_call(expr):
+            continue
+
+        first = min(p for p, _ in where)
+        last = max(p for p, _ in where)
+
+        # x = E already exists and nothing rewrites x before the last use
+        reuse = None
+        if first < end and _key(derived[first][1]) == key:
+            reuse = derived[first][0]
+            written = {name for name, _ in derived[first + 1:last]}
+            if reuse in written:
+                reuse = None
+
+        if reuse is None and n * size <= size + n + 1:
+            continue    # a new variable would not make the program smaller
+
+        # No operand may change between the first and last occurrence
+        between = derived[first:last]
+        reads: Set[str] = set()
+        _reads_value(expr, reads)
+        if reads & {name for name, _ in between} or any(_has_call(v) for _, v in between):
+            continue
+
+        # Only in the condition: must be evaluated anyway, or unable to raise
+        if first == end and all(atom != 0 for _, atom in where) and not _is_total(expr):
+            continue
+
+        return expr, key, first, reuse
+
+    return None
+
+
+def _leaf_key(v: Value) -> Optional[tuple]:
+    if isinstance(v, (str, int, float, bool)):
+        # 1, 1.0 and True compare equal; keep them apart
+        return (type(v).__name__, v)
+    return None
+
+
+def _subtree_keys(v: Value) -> Tuple[Dict[int, Optional[tuple]], Dict[int, int]]:
+    """
+    Structural key and block count of every Expression in `v`, by id().
+    A key is flat (pre-order: "op", op, arity, then the children's keys),
+    so hashing and comparing it does not recurse either.
+    """
+    keys: Dict[int, Optional[tuple]] = {}
+    sizes: Dict[int, int] = {}
+
+    def node(e, children):
+        key = None
+        if isinstance(e.args, list) and all(k is not None for k, _ in children):
+            key = ("op", e.op, len(children))
+            for k, _ in children:
+                key += k
+        size = 1 + sum(n for _, n in children)
+        keys[id(e)] = key
+        sizes[id(e)] = size
+        return key, size
+
+    fold_expression(v, lambda a: (_leaf_key(a), 1), node)
+    return keys, sizes
+
+
+def _key(v: Value) -> Optional[tuple]:
+    if isinstance(v, Expression):
+        return _subtree_keys(v)[0][id(v)]
+    return _leaf_key(v)
+
+
+def _size(v: Value) -> int:
+    """Blocks the compiler emits for a value."""
+    return fold_expression(v, lambda a: 1, lambda e, sizes: 1 + sum(sizes))
+
+
+def _is_total(v: Value) -> bool:
+    return fold_expression(v, lambda a: True, lambda e, totals: e.op in TOTAL_OPS and all(totals))
+
+
+def _replace(v: Value, key: tuple, name: str, count: List[int]) -> Value:
+    """`v` with every outermost subtree whose key is `key` read from `name`."""
+    if not isinstance(v, Expression):
+        return v
+    keys, _ = _subtree_keys(v)
+
+    def children(e):
+        # A replaced subtree is not descended into
+        return [] if keys[id(e)] == key else _args(e)
+
+    def node(e, args):
+        if not isinstance(e.args, list):
+            return e
+        if keys[id(e)] == key:
+            count[0] += 1
+            return name
+        return Expression(e.op, args)
+
+    return fold_expression(v, lambda a: a, node, children=children)
+
+
+def _names(plan: SemanticPlan) -> Set[str]:
+    """Every variable name the plan reads or writes (never reuse one)."""
+    names = set(_written_names(plan))
+    _reads_condition(plan.condition, names)
+    for d in plan.derived:
+        _reads_value(d.expression, names)
+    for a in plan.actions.then + plan.actions.else_:
+        _reads_action(a, names)
+    for fn in plan.functions:
+        names.add(fn.name)
+        for a in fn.body:
+            _reads_action(a, names)
+    return names
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def _decide(c: ConditionAtom) -> Optional[bool]:
+    compare = COMPARATORS.get(c.op)
+    if compare is None or not (is_literal(c.left) and is_literal(c.right)):
+        return None
+    return compare(c.left, c.right)
+
+
+def _has_call(v: Value) -> bool:
+    return any(e.op == "call" for e in iter_expressions(v))
+
+
+def _reads_value(v: Value, out: Set[str]):
+    if not isinstance(v, Expression):
+        if isinstance(v, str):
+            out.add(v)
+        return
+
+    def leaf(a):
+        if isinstance(a, str):
+            out.add(a)
+
+    fold_expression(v, leaf, lambda e, _: None, children=_read_args)
+
+
+def _read_args(e: Expression) -> List[Value]:
+    # call args name a function, not a variable
+    if e.op == "call" and isinstance(e.args, list) and e.args:
+        return []
+    return _args(e)
+
+
+def _folds(e: Expression) -> bool:
+    # Calls and malformed (non-list) args are kept as they are
+    return e.op != "call" and isinstance(e.args, list)
+
+
+def _fold_args(e: Expression) -> List[Value]:
+    return e.args if _folds(e) else []
+
+
+def _args(e: Expression) -> List[Value]:
+    return e.args if isinstance(e.args, list) else []
+
+
+def _reads_condition(condition: Optional[Condition], out: Set[str]):
+    if condition is None:
+        return
+    for c in condition.conditions:
+        _reads_value(c.left, out)
+        _reads_value(c.right, out)
+
+
+def _reads_action(action: Action, out: Set[str]):
+    # Conservative: every operand, assigned names included, counts as a read
+    # (change / append read their target; print literals are not names)
+    if action.type != "print":
+        _reads_value(action.value, out)
+    for v in action.operands.values():
+        _reads_value(v, out)
+    _reads_condition(action.condition, out)
+    for a in action.body + action.else_:
+        _reads_action(a, out)
+
+
+def _written_names(plan: SemanticPlan) -> Dict[str, int]:
+    """How many places assign each name (inputs, derived, set / loop vars)."""
+    counts: Dict[str, int] = {}
+
+    def write(name):
+        if isinstance(name, str):
+            counts[name] = counts.get(name, 0) + 1
+
+    def walk(actions: List[Action]):
+        for a in actions:
+            for key in ("name", "var"):
+                if key in a.operands and a.type != "call":
+                    write(a.operands[key])
+            walk(a.body)
+            walk(a.else_)
+
+    for i in plan.inputs:
+        write(i.name)
+    for d in plan.derived:
+        write(d.name)
+    walk(plan.actions.then)
+    walk(plan.actions.else_)
+    for fn in plan.functions:
+        walk(fn.body)
+
+    return counts
+
+
+def count_blocks(tree: Union[None, Dict, List[Dict]]) -> int:
+    """Number of blocks in a compiled tree (or list of top-level trees)."""
+    return sum(1 for _ in iter_blocks(tree))
+
+
+# -----------------------------
+# CLI: stats for the sample plans in semantic/
+# -----------------------------
+if __name__ == "__main__":
+    import json
+    import sys
+    from pathlib import Path
+
+    from semantic.validator import CapabilityValidator
+
+    here = Path(__file__).parent
+    paths = [Path(p) for p in sys.argv[1:]] or sorted(
+        p for p in here.glob("*.json") if not p.stem.endswith("_compiled")
+    )
+
+    validator = CapabilityValidator(str(here.parent / "data" / "normalized_blocks.json"))
+    optimizer = PlanOptimizer(validator.dispatch)
+
+    for path in paths:
+        plan = json.loads(path.read_text(encoding="utf-8"))
+        validation = validator.validate(plan)
+        if validation["status"] != "ok":
+            print(f"⏭️ {path.name}: {validation['reason']}")
+            continue
+        _, stats = optimizer.optimize(plan)
+        print(f"{path.name}: {stats.summary()}")
@@ -0,0 +1,174 @@
+"""
+Local library of solved problems (few-shot examples for the planner)
+
+- Every problem that passes the strict pipeline is appended to
+  data/plan_library.jsonl: statement, capability tier, validated plan
+- BM25 index over the statements, built incrementally: loading replays
+  the file, add() indexes one more document; nothing is rebuilt
+- search() returns the top-k most similar solved problems of the same
+  tier, for the planner prompt (semantic/prompt.py)
+- near_duplicate() finds a solved problem that is the same one in other
+  words (semantic/near_duplicate.py), whose plan can be reused as is
+- Fully offline: plain Python, no embeddings, no network
+
+Run from the repo root to query it:
+    python -m semantic.plan_library "count the digits of a number"
+"""
+
+import json
+import math
+import re
+import sys
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from semantic.near_duplicate import NearDuplicateIndex
+
+ROOT = Path(__file__).parent.parent
+DEFAULT_LIBRARY = ROOT / "data" / "plan_library.jsonl"
+
+# BM25 (Robertson / Sparck Jones), the usual defaults
+K1 = 1.5
+B = 0.75
+
+# Below this a "similar" problem shares little more than filler words
+MIN_SCORE = 1.0
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from given if in into is it of on or "
+    "that the their then this to with whether which".split()
+)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+@dataclass(frozen=True, slots=True)
+class Example:
+    problem_id: str
+    text: str
+    plan: Dict
+    score: float
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOP_WORDS]
+
+
+class PlanLibrary:
+    def __init__(self, path: Optional[Path] = DEFAULT_LIBRARY):
+        # path None: in-memory only
+        self.path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+
+        self._docs: List[Dict] = []
+        self._keys: Dict[Tuple[str, str], int] = {}      # (tier, statement) -> doc
+        self._postings: Dict[str, Dict[int, int]] = {}   # term -> {doc: tf}
+        self._lengths: List[int] = []
+        self._total_length = 0
+        self._near = NearDuplicateIndex()
+
+        if self.path is not None and self.path.exists():
+            for line in self.path.read_text(encoding="utf-8").splitlines():
+                try:
+                    entry = json.loads(line)
+                    self._index(entry["problem_id"], entry["text"], entry["tier"], entry["plan"])
+                except (ValueError, KeyError, TypeError):
+                    continue   # a torn last line from an interrupted run
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._docs)
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def add(self, problem_id: str, text: str, plan: Dict, tier: str) -> bool:
+        """Indexes + persists a solved problem. False if already known."""
+        with self._lock:
+            if not self._index(problem_id, text, tier, plan):
+                return False
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                entry = {"problem_id": problem_id, "text": text, "tier": tier, "plan": plan}
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            return True
+
+    def search(self, text: str, k: int = 3, tier: Optional[str] = None) -> List[Example]:
+        """Top-k solved problems by BM25 score (>= MIN_SCORE), best first."""
+        if k < 1:
+            return []
+
+        with self._lock:
+            n = len(self._docs)
+            if not n:
+                return []
+            avg_length = self._total_length / n
+
+            scores: Dict[int, float] = {}
+            for term in set(tokenize(text)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc, tf in postings.items():
+                    norm = tf + K1 * (1 - B + B * self._lengths[doc] / avg_length)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (K1 + 1) / norm
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+            examples = []
+            for doc, score in ranked:
+                if score < MIN_SCORE or len(examples) >= k:
+                    break
+                entry = self._docs[doc]
+                if tier is not None and entry["tier"] != tier:
+                    continue
+                examples.append(Example(entry["problem_id"], entry["text"], entry["plan"], score))
+            return examples
+
+    def near_duplicate(self, text: str, tier: str, threshold: float) -> Optional[Example]:
+        """
+        The solved problem of this tier that `text` restates (shingle
+        Jaccard >= threshold), or None. score is the similarity.
+        """
+        with self._lock:
+            for match in self._near.query(text, threshold):
+                entry = self._docs[match.doc]
+                if entry["tier"] == tier:
+                    return Example(entry["problem_id"], entry["text"], entry["plan"], match.similarity)
+            return None
+
+    # -----------------------------
+    # Index
+    # -----------------------------
+    def _index(self, problem_id: str, text: str, tier: str, plan: Dict) -> bool:
+        key = (tier, " ".join(text.split()))
+        if key in self._keys:
+            return False
+
+        doc = len(self._docs)
+        self._keys[key] = doc
+        self._docs.append({"problem_id": problem_id, "text": text, "tier": tier, "plan": plan})
+
+        terms = Counter(tokenize(text))
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc] = tf
+        length = sum(terms.values())
+        self._lengths.append(length)
+        self._total_length += length
+
+        # Same doc numbers in both indexes
+        self._near.add(text)
+        return True
+
+
+if __name__ == "__main__":
+    library = PlanLibrary()
+    query = " ".join(sys.argv[1:])
+    print(f"{len(library)} solved problem(s) in {library.path}")
+    if query:
+        for example in library.search(query, k=5):
+            print(f"  {example.score:6.2f}  {example.problem_id}  {example.text}")
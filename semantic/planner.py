@@ -4,18 +4,32 @@ Semantic Planner (Module 1)
 - Calls the LLM
 - Produces a STRICT semantic plan JSON
 - Does NOT validate feasibility or correctness
+- The prompt offers only what the capability tier can compile
+  (see semantic/dispatch.py)
+- Optionally returns several candidate plans from ONE call
+  (generate_plan_candidates); semantic/candidates.py picks one locally
+- Repairs a rejected plan from the validator's reason
+  (repair_semantic_plan; driven by semantic/repair.py)
+- Optional few-shot examples (similar solved problems from
+  semantic/plan_library.py) go into the prompt
+- Models come from the "planner" cascade (semantic/cascade.py): the
+  cheap model first, the next one only if its answer has no JSON or
+  the caller's `accept` rejects the plan
 """
 
 import json
 import os
-from typing import Dict, Union
+from typing import Callable, Dict, List, Optional, Sequence, Union
 
 from dotenv import load_dotenv
 from openai import OpenAI
 
-from semantic.prompt import system_prompt, user_prompt
+from semantic.cascade import CASCADE
+from semantic.dispatch import DEFAULT_TIER, load_dispatch_table
+from semantic.prompt import repair_prompt, system_prompt, user_prompt
 from semantic.question_expander import expand_problem
-from semantic.json_utils import extract_json_from_text
+from semantic.llm_usage import base_url, create_chat_completion
+from semantic.json_utils import JSONExtractionError, extract_json_from_text, extract_json_objects_from_text
 
 load_dotenv()
 
@@ -24,30 +38,142 @@ class SemanticPlannerError(Exception):
     pass
 
 
-def generate_semantic_plan(problem_text: str) -> Dict[str, Union[str, list, dict]]:
+# Candidates must differ to be worth validating: sample instead of greedy
+CANDIDATE_TEMPERATURE = 0.7
+
+# n: one call, n choices (OpenAI-style `n`)
+# array: one choice holding a JSON array (providers that ignore `n`)
+CANDIDATE_MODES = ("n", "array")
+
+
+def generate_semantic_plan(
+    problem_text: str,
+    tier: str = DEFAULT_TIER,
+    accept: Optional[Callable[[Dict], bool]] = None,
+    examples: Sequence = ()
+) -> Dict[str, Union[str, list, dict]]:
+    """
+    accept(plan) -> False escalates to the next planner model (e.g. the
+    plan does not validate). The last model's plan is returned as is.
+    examples: solved problems for the prompt (PlanLibrary.search).
+    """
     if not problem_text or not isinstance(problem_text, str):
         raise SemanticPlannerError("Problem text must be a non-empty string")
 
-    detailed_problem = expand_problem(problem_text)
+    dispatch = load_dispatch_table(tier=tier)
+    detailed_problem = expand_problem(problem_text, tier)
+    client = _client()
+
+    def attempt(model: str) -> Dict:
+        try:
+            response = create_chat_completion(
+                client,
+                "planner",
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt(dispatch)},
+                    {"role": "user", "content": user_prompt(detailed_problem, dispatch, examples)}
+                ],
+                temperature=0
+            )
+        except Exception as e:
+            raise SemanticPlannerError(f"LLM call failed: {e}")
+
+        raw_output = response.choices[0].message.content.strip()
+
+        try:
+            parsed = extract_json_from_text(raw_output)
+            print(parsed)
+        except (json.JSONDecodeError, JSONExtractionError):
+            raise SemanticPlannerError(
+                "LLM did not return valid JSON.\n"
+                f"Raw output:\n{raw_output}"
+            )
+
+        if not isinstance(parsed, dict):
+            raise SemanticPlannerError("Semantic plan must be a JSON object")
+
+        # Explicit not_expressible passes through (accept decides on it)
+        return parsed
 
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        raise SemanticPlannerError("OPENROUTER_API_KEY not set")
+    return CASCADE.run("planner", attempt, accept or (lambda _: True))
+
+
+def generate_plan_candidates(
+    problem_text: str,
+    tier: str = DEFAULT_TIER,
+    n: int = 3,
+    mode: str = "n",
+    examples: Sequence = ()
+) -> List[Dict[str, Union[str, list, dict]]]:
+    """
+    Up to `n` candidate plans from a single planner round-trip, in the
+    order the model returned them. Candidates are NOT validated here;
+    not_expressible answers are kept so the caller can tell them apart.
+    Choices whose text holds no JSON object are dropped.
+    """
+    if not problem_text or not isinstance(problem_text, str):
+        raise SemanticPlannerError("Problem text must be a non-empty string")
+    if n < 1:
+        raise SemanticPlannerError("n must be at least 1")
+    if mode not in CANDIDATE_MODES:
+        raise SemanticPlannerError(f"Unknown candidate mode '{mode}' (expected one of {', '.join(CANDIDATE_MODES)})")
 
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key
-    )
+    dispatch = load_dispatch_table(tier=tier)
+    detailed_problem = expand_problem(problem_text, tier)
+
+    prompt = user_prompt(detailed_problem, dispatch, examples, n if mode == "array" else 1)
+
+    try:
+        response = create_chat_completion(
+            _client(),
+            "planner",
+            model=CASCADE.primary("planner"),
+            messages=[
+                {"role": "system", "content": system_prompt(dispatch)},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=CANDIDATE_TEMPERATURE,
+            n=n if mode == "n" else 1
+        )
+    except Exception as e:
+        raise SemanticPlannerError(f"LLM call failed: {e}")
+
+    candidates = []
+    for choice in response.choices:
+        raw_output = (choice.message.content or "").strip()
+        try:
+            candidates.extend(extract_json_objects_from_text(raw_output))
+        except JSONExtractionError:
+            continue
+
+    if not candidates:
+        raise SemanticPlannerError("LLM returned no JSON candidate plans")
+
+    print(f"Planner: {len(candidates)} candidate plan(s)")
+    return candidates[:n]
+
+
+def repair_semantic_plan(
+    problem_text: str,
+    plan: Dict,
+    reason: str,
+    tier: str = DEFAULT_TIER
+) -> Dict[str, Union[str, list, dict]]:
+    """
+    One delta round-trip: the rejected plan + the validator's reason in,
+    a corrected plan out. Skips question expansion.
+    """
+    dispatch = load_dispatch_table(tier=tier)
 
     try:
-        response = client.chat.completions.create(
-            # model="qwen/qwen-2.5-7b-instruct",
-            # model="deepseek/deepseek-r1-0528:free",
-            model="openai/gpt-4o-mini",
-            # model="google/gemini-2.0-flash-exp:free",
+        response = create_chat_completion(
+            _client(),
+            "repair",
+            model=CASCADE.primary("planner"),
             messages=[
-                {"role": "system", "content": system_prompt()},
-                {"role": "user", "content": user_prompt(detailed_problem)}
+                {"role": "system", "content": system_prompt(dispatch)},
+                {"role": "user", "content": repair_prompt(problem_text, plan, reason)}
             ],
             temperature=0
         )
@@ -57,19 +183,22 @@ def generate_semantic_plan(problem_text: str) -> Dict[str, Union[str, list, dict
     raw_output = response.choices[0].message.content.strip()
 
     try:
-        parsed = extract_json_from_text(raw_output)
-        print(parsed)
-    except json.JSONDecodeError:
+        return extract_json_from_text(raw_output)
+    except JSONExtractionError:
         raise SemanticPlannerError(
             "LLM did not return valid JSON.\n"
             f"Raw output:\n{raw_output}"
         )
 
-    # Explicit not_expressible passthrough
-    if isinstance(parsed, dict) and parsed.get("error") == "not_expressible":
-        return parsed
 
-    if not isinstance(parsed, dict):
-        raise SemanticPlannerError("Semantic plan must be a JSON object")
+def _client() -> OpenAI:
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        raise SemanticPlannerError("OPENROUTER_API_KEY not set")
 
-    return parsed
+    return OpenAI(
+        base_url=base_url(),
+        api_key=api_key,
+        # Retries + backoff are done by semantic/rate_limit.py
+        max_retries=0
+    )
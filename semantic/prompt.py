@@ -6,10 +6,37 @@ This prompt is designed to produce:
 - Deterministic
 - Minimal
 semantic plans that align with the compiler + validator.
+
+The LANGUAGE DEFINITION is generated from the active dispatch table
+(semantic/dispatch.py), so the planner is only offered constructs the
+active capability tier + block catalogs can actually compile.
+
+Prompts are built once per dispatch table (memoized) and laid out
+static-first: the system prompt and the fixed part of every user prompt
+form a byte-identical prefix across calls, so provider-side prompt
+caching can serve it; the problem text always comes last.
+
+Solved examples retrieved for the problem (semantic/plan_library.py)
+go between the static prefix and the problem, so they never break the
+cached prefix.
 """
 
+import json
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+from semantic.dispatch import DispatchTable, load_dispatch_table, load_op_bindings
+
+
+def system_prompt(dispatch: Optional[DispatchTable] = None) -> str:
+    return _system_prompt(dispatch if dispatch is not None else load_dispatch_table())
+
+
+@lru_cache(maxsize=8)
+def _system_prompt(dispatch: DispatchTable) -> str:
+    caps = dispatch.capabilities()
+    extended = dispatch.tier != "core"
 
-def system_prompt() -> str:
     return (
         "You are a semantic program planner.\n\n"
 
@@ -33,20 +60,34 @@ def system_prompt() -> str:
         "   - Each input has: name, type.\n\n"
 
         "2) derived:\n"
-        "   - Used ONLY for numeric arithmetic.\n"
-        "   - Allowed operators: +  -  *  /\n"
-        "   - Derived values MUST be numeric.\n"
-        "   - Derived values MUST NOT represent comparisons or booleans.\n\n"
+        + (
+            "   - Used for numeric arithmetic and list values.\n"
+            if extended else
+            "   - Used ONLY for numeric arithmetic.\n"
+        )
+        + "   - Allowed operators (op: meaning):\n"
+        + _op_lines(caps["expressions"], "expressions")
+        + "   - Args are variable names, numbers or nested expressions, e.g.\n"
+        "     { \"op\": \"*\", \"args\": [ { \"op\": \"+\", \"args\": [\"a\", \"b\"] }, 2 ] }\n"
+        "   - Nest sub-expressions instead of adding derived variables for them.\n"
+        + (
+            "" if extended else
+            "   - Derived values MUST be numeric.\n"
+        )
+        + "   - Derived values MUST NOT represent comparisons or booleans.\n\n"
 
         "3) condition:\n"
         "   - Used ONLY for comparisons.\n"
-        "   - Allowed operators: > < >= <= == !=\n"
-        "   - Conditions may be combined using: and / or\n\n"
+        f"   - Allowed operators: {' '.join(caps['comparators'])}\n"
+        "   - left / right may also be nested expressions.\n"
+        f"   - Conditions may be combined using: {' / '.join(caps['logic'])}\n\n"
 
         "4) actions:\n"
-        "   - Only allowed action type: print\n\n"
+        + _action_lines(caps["actions"])
+        + "\n"
+        + _function_lines(caps["functions"])
 
-        "================ IMPORTANT: ================\n"
+        + "================ IMPORTANT: ================\n"
         "- Do NOT use '+' with a single argument.\n"
         "- Aggregation over a list/vector (sum, min, max) must be expressed as a dedicated operation.\n\n"
 
@@ -68,7 +109,13 @@ def system_prompt() -> str:
         "================ SCHEMA RULE (MANDATORY) ================\n"
         "- The 'condition' field must always be a condition group:\n"
         "  { \"op\": \"and\" | \"or\", \"conditions\": [ ... ] }\n"
-        "- NEVER output a bare comparison as the condition.\n\n"
+        "- NEVER output a bare comparison as the condition.\n"
+        + (
+            "- If there is no decision, set 'condition' to null:\n"
+            "  the 'then' actions always run.\n"
+            if extended else ""
+        )
+        + "\n"
 
         "================ FAILURE MODE ================\n"
         "If the problem cannot be expressed using ONLY the constructs above,\n"
@@ -80,12 +127,77 @@ def system_prompt() -> str:
 
 
 
-def user_prompt(problem_text: str) -> str:
+def _op_lines(ops: List[str], group: str) -> str:
+    bindings = load_op_bindings()[group]
+    return "".join(f"     {op}: {bindings[op].get('doc', op)}\n" for op in ops)
+
+
+def _action_lines(actions: List[str]) -> str:
+    if actions == ["print"]:
+        return "   - Only allowed action type: print\n"
+
+    bindings = load_op_bindings()["actions"]
+    lines = "   - Allowed action types (exact shapes):\n"
+    for action in actions:
+        lines += f"     {json.dumps(bindings[action].get('shape', {'type': action}))}\n"
     return (
-        "Convert the following problem into a semantic plan JSON.\n\n"
+        lines
+        + "   - \"body\" / \"then\" / \"else\" hold nested actions.\n"
+        + "   - Loop and if conditions use the same condition group shape.\n"
+    )
 
-        "PROBLEM:\n"
-        f"{problem_text}\n\n"
+
+def _function_lines(functions: List[str]) -> str:
+    if not functions:
+        return ""
+    return (
+        "5) functions (optional top-level list):\n"
+        "   - { \"name\": \"f\", \"body\": [actions], \"returns\": value or omitted }\n"
+        "   - Functions take no parameters and read/write plan variables.\n"
+        "   - Call them with the call action or the call operator.\n\n"
+    )
+
+
+def user_prompt(
+    problem_text: str,
+    dispatch: Optional[DispatchTable] = None,
+    examples: Sequence = (),
+    candidates: int = 1
+) -> str:
+    # examples: plan_library.Example (or anything with .text / .plan)
+    # candidates > 1: ask for a JSON array of that many different plans
+    dispatch = dispatch if dispatch is not None else load_dispatch_table()
+    return (
+        _user_prompt_prefix(dispatch, candidates)
+        + _examples_block(examples)
+        + "PROBLEM:\n"
+        f"{problem_text}\n"
+    )
+
+
+def _examples_block(examples: Sequence) -> str:
+    if not examples:
+        return ""
+    lines = (
+        "================ SOLVED EXAMPLES ================\n"
+        "Valid plans for similar problems. Reuse their structure where it fits;\n"
+        "the problem at the end may differ in the details.\n\n"
+    )
+    for example in examples:
+        lines += (
+            f"EXAMPLE PROBLEM:\n{example.text}\n"
+            f"EXAMPLE PLAN:\n{json.dumps(example.plan, separators=(',', ':'))}\n\n"
+        )
+    return lines
+
+
+@lru_cache(maxsize=16)
+def _user_prompt_prefix(dispatch: DispatchTable, candidates: int = 1) -> str:
+    functions = bool(dispatch.capabilities()["functions"])
+    extended = dispatch.tier != "core"
+
+    return (
+        "Convert the problem at the end of this message into a semantic plan JSON.\n\n"
 
         "================ REQUIRED OUTPUT SHAPE ================\n"
         "{\n"
@@ -110,13 +222,44 @@ def user_prompt(problem_text: str) -> str:
         "  \"actions\": {\n"
         "    \"then\": [ { \"type\": \"print\", \"value\": \"yes\" } ],\n"
         "    \"else\": [ { \"type\": \"print\", \"value\": \"no\" } ]\n"
-        "  }\n"
-        "}\n\n"
+        + ("  },\n  \"functions\": []\n" if functions else "  }\n")
+        + "}\n\n"
 
         "================ FINAL RULES ================\n"
         "- Follow the output shape EXACTLY.\n"
         "- Use ONLY the allowed operators.\n"
-        "- Derived expressions MUST be numeric.\n"
-        "- Conditions MUST contain all comparisons.\n"
-        "- Return ONLY the JSON object.\n"
+        + ("" if extended else "- Derived expressions MUST be numeric.\n")
+        + "- Conditions MUST contain all comparisons.\n"
+        + (
+            "- Return ONLY the JSON object.\n\n" if candidates == 1 else
+            f"- Return ONLY a JSON ARRAY of {candidates} DIFFERENT candidate plans,\n"
+            "  each one following the output shape above.\n\n"
+        )
+    )
+
+
+def repair_prompt(problem_text: str, plan: Dict, reason: str) -> str:
+    """
+    Compact delta prompt: the failing plan + the validator's reason,
+    nothing else. Sent after the same system prompt as the first call.
+    """
+    return (
+        _REPAIR_INSTRUCTIONS
+
+        + "VALIDATOR ERROR:\n"
+        f"{reason}\n\n"
+
+        "PLAN:\n"
+        f"{json.dumps(plan, separators=(',', ':'))}\n\n"
+
+        "PROBLEM:\n"
+        f"{problem_text}\n"
     )
+
+
+_REPAIR_INSTRUCTIONS = (
+    "Your semantic plan for the problem below was rejected.\n"
+    "Fix ONLY what the validator error points at, keep everything else unchanged.\n"
+    "Use ONLY the allowed operators.\n"
+    "Return ONLY the corrected JSON object.\n\n"
+)
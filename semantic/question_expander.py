@@ -2,6 +2,8 @@ import os
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from semantic.cascade import CASCADE
+from semantic.llm_usage import base_url, create_chat_completion
 from semantic.question_expander_prompt import system_prompt, user_prompt
 
 load_dotenv()
@@ -11,7 +13,7 @@ class QuestionExpansionError(Exception):
     pass
 
 
-def expand_problem(problem_text: str) -> str:
+def expand_problem(problem_text: str, tier: str = "core") -> str:
     if not problem_text or not isinstance(problem_text, str):
         raise QuestionExpansionError("Problem text must be a non-empty string")
 
@@ -20,27 +22,31 @@ def expand_problem(problem_text: str) -> str:
         raise QuestionExpansionError("OPENROUTER_API_KEY not set")
 
     client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key
+        base_url=base_url(),
+        api_key=api_key,
+        # Retries + backoff are done by semantic/rate_limit.py
+        max_retries=0
     )
 
-    try:
-        response = client.chat.completions.create(
-            # model="qwen/qwen-2.5-7b-instruct",
-            # model="deepseek/deepseek-r1-0528:free",
-            model="openai/gpt-4o-mini",
-            # model="google/gemini-2.0-flash-exp:free",
+    def attempt(model: str) -> str:
+        response = create_chat_completion(
+            client,
+            "expander",
+            model=model,
             messages=[
-                {"role": "system", "content": system_prompt()},
+                {"role": "system", "content": system_prompt(tier)},
                 {"role": "user", "content": user_prompt(problem_text)}
             ],
             temperature=0
         )
+        return (response.choices[0].message.content or "").strip()
+
+    # Escalates to the next model in the cascade on an empty answer
+    try:
+        expanded = CASCADE.run("expander", attempt, accept=bool)
     except Exception as e:
         raise QuestionExpansionError(f"LLM call failed: {e}")
 
-    expanded = response.choices[0].message.content.strip()
-
     if not expanded.strip():
         print("Expanded problem is empty")
         return problem_text
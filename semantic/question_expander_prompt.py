@@ -1,4 +1,11 @@
-def system_prompt() -> str:
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def system_prompt(tier: str = "core") -> str:
+    if tier != "core":
+        return extended_system_prompt()
+
     return (
         "You are a deterministic problem formalizer for a constrained semantic program planner.\n\n"
 
@@ -37,6 +44,42 @@ def system_prompt() -> str:
     )
 
 
+@lru_cache(maxsize=None)
+def extended_system_prompt() -> str:
+    # Extended capability tier: loops, lists and functions are plannable
+    return (
+        "You are a deterministic problem formalizer for a constrained semantic program planner.\n\n"
+
+        "Your task:\n"
+        "- Rewrite the given problem into a minimal, explicit, technical problem description.\n"
+        "- The rewritten problem MUST be expressible using:\n"
+        "  inputs, arithmetic, comparisons, decisions, counted or conditional loops,\n"
+        "  lists of values, and small parameterless helper functions.\n"
+        "- The goal is to enable direct translation into a semantic plan without fallback.\n\n"
+
+        "STRICT CONSTRAINTS:\n"
+        "- Do NOT introduce safety guarantees, retries, or recovery logic.\n"
+        "- Do NOT introduce files, networking, randomness, or external libraries.\n"
+        "- Loops MUST have an explicit range, list, or stopping comparison.\n\n"
+
+        "Allowed abstractions ONLY:\n"
+        "- Explicit inputs with clear types.\n"
+        "- Variables that are set and updated step by step.\n"
+        "- Loops over a numeric range, over a list, or while a comparison holds.\n"
+        "- Lists built from values, with sum / min / max / sort / membership.\n"
+        "- Decisions built from comparisons combined with AND/OR.\n"
+        "- Printing values or fixed text.\n\n"
+
+        "Rules:\n"
+        "1) Preserve the original intent.\n"
+        "2) Reduce vague terms (e.g., \"check\", \"ensure\") into explicit comparisons.\n"
+        "3) State every loop's variable, range or stopping comparison explicitly.\n"
+        "4) If the problem cannot be expressed under these constraints, rewrite it in a way that makes this limitation explicit.\n"
+        "5) Output ONLY the rewritten technical problem statement.\n"
+        "6) Do NOT output code, JSON, markdown, or explanations.\n"
+    )
+
+
 def user_prompt(problem_text: str) -> str:
     return (
         "Rewrite the following problem into a fully explicit and detailed form:\n\n"
@@ -0,0 +1,305 @@
+"""
+Adaptive rate limiting for LLM calls (shared by every stage)
+
+- AIMD concurrency limit: +1 slot per limit's worth of successful calls,
+  halved on a 429; calls beyond the limit wait for a slot
+- Optional token bucket: caps the request rate (requests / second)
+- Reads rate-limit headers: Retry-After / retry-after-ms on errors,
+  x-ratelimit-remaining* / x-ratelimit-reset* on every response
+  (OpenAI durations like "6m0s", OpenRouter epoch-millisecond resets);
+  when the provider says the window is exhausted, every caller pauses
+  until it resets
+- Retries 429 / 408 / 409 / 5xx / timeouts / connection errors with
+  exponential backoff and full jitter, honouring Retry-After, so a
+  throttled burst does not tip problems into the fallback path
+
+Provider-agnostic: errors are classified by their `status_code` /
+`response.headers` attributes (openai.APIStatusError shape), not by
+importing the SDK's exception classes.
+"""
+
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+# openai.APITimeoutError / APIConnectionError carry no status code
+RETRYABLE_ERRORS = ("APITimeoutError", "APIConnectionError", "TimeoutError", "ConnectionError")
+
+
+# -----------------------------
+# Data
+# -----------------------------
+@dataclass(frozen=True, slots=True)
+class ControllerStats:
+    calls: int
+    retries: int
+    throttled: int          # 429 responses
+    limit: int              # current concurrency limit
+    peak_inflight: int
+    waited_seconds: float   # time callers spent waiting for a slot / token / pause
+
+    def summary(self) -> str:
+        return (
+            f"{self.calls} call(s), {self.retries} retried, {self.throttled} throttled (429); "
+            f"concurrency limit {self.limit}, peak {self.peak_inflight} in flight; "
+            f"{self.waited_seconds:.2f} s waiting"
+        )
+
+
+class TokenBucket:
+    """`rate` tokens per second, up to `burst` saved up."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._clock = clock
+        self._stamp = clock()
+
+    def delay(self) -> float:
+        """Takes a token; returns how long to wait for it (0: available now)."""
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class RateLimitController:
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        rate: Optional[float] = None,
+        max_retries: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+        jitter: Callable[[], float] = random.random
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._clock = clock
+        self._jitter = jitter
+
+        self._cond = threading.Condition()
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._bucket = TokenBucket(rate, clock=clock) if rate else None
+        self._inflight = 0
+        self._paused_until = 0.0
+
+        self._calls = 0
+        self._retries = 0
+        self._throttled = 0
+        self._peak = 0
+        self._waited = 0.0
+
+    def configure(self, max_limit: Optional[int] = None, rate: Optional[float] = None):
+        with self._cond:
+            if max_limit:
+                self.max_limit = max(self.min_limit, max_limit)
+                self._limit = min(self._limit, self.max_limit)
+            if rate:
+                self._bucket = TokenBucket(rate, clock=self._clock)
+            self._cond.notify_all()
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def call(self, send: Callable[[], Tuple[T, Mapping[str, str]]]) -> T:
+        """
+        send() -> (response, headers). Retries retryable failures; the
+        last failure (or a non-retryable one) propagates.
+        """
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                response, headers = send()
+            except Exception as e:
+                self._release()
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    if _status(e) == 429:
+                        self._on_throttle(retry_after(_headers(e)))
+                    raise
+                self._sleep(self._on_failure(e, attempt))
+                attempt += 1
+                with self._cond:
+                    self._retries += 1
+                continue
+
+            self._release()
+            self._on_success(headers or {})
+            return response
+
+    def stats(self) -> ControllerStats:
+        with self._cond:
+            return ControllerStats(
+                self._calls, self._retries, self._throttled,
+                int(self._limit), self._peak, self._waited
+            )
+
+    # -----------------------------
+    # Slots
+    # -----------------------------
+    def _acquire(self):
+        start = self._clock()
+        with self._cond:
+            while True:
+                now = self._clock()
+                if now < self._paused_until:
+                    self._cond.wait(self._paused_until - now)
+                elif self._inflight >= int(self._limit):
+                    self._cond.wait(1.0)
+                else:
+                    break
+
+            self._inflight += 1
+            self._calls += 1
+            self._peak = max(self._peak, self._inflight)
+            bucket_delay = self._bucket.delay() if self._bucket else 0.0
+
+        if bucket_delay:
+            self._sleep(bucket_delay)
+
+        with self._cond:
+            self._waited += self._clock() - start
+
+    def _release(self):
+        with self._cond:
+            self._inflight -= 1
+            self._cond.notify()
+
+    # -----------------------------
+    # AIMD + headers
+    # -----------------------------
+    def _on_success(self, headers: Mapping[str, str]):
+        with self._cond:
+            # Additive increase: about +1 slot per `limit` successes
+            self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+
+            remaining = _header_number(headers, "x-ratelimit-remaining-requests", "x-ratelimit-remaining")
+            if remaining is not None and remaining <= 0:
+                reset = reset_after(headers)
+                if reset:
+                    self._paused_until = max(self._paused_until, self._clock() + reset)
+            self._cond.notify_all()
+
+    def _on_throttle(self, wait: Optional[float]):
+        with self._cond:
+            # Multiplicative decrease
+            self._throttled += 1
+            self._limit = max(float(self.min_limit), self._limit / 2)
+            if wait:
+                self._paused_until = max(self._paused_until, self._clock() + wait)
+
+    def _on_failure(self, error: Exception, attempt: int) -> float:
+        headers = _headers(error)
+        wait = retry_after(headers)
+        if _status(error) == 429:
+            self._on_throttle(wait if wait is not None else reset_after(headers))
+
+        # A server-given wait wins (plus a little jitter); else full jitter
+        if wait is not None:
+            return min(self.max_delay, wait) + self._jitter() * self.base_delay
+        return self._jitter() * min(self.max_delay, self.base_delay * (2 ** attempt))
+
+
+# -----------------------------
+# Classification / header parsing
+# -----------------------------
+def is_retryable(error: Exception) -> bool:
+    status = _status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds from Retry-After / retry-after-ms (HTTP dates are ignored)."""
+    ms = _header_number(headers, "retry-after-ms")
+    if ms is not None:
+        return max(0.0, ms / 1000)
+    seconds = _header_number(headers, "retry-after")
+    return max(0.0, seconds) if seconds is not None else None
+
+
+def reset_after(headers: Mapping[str, str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds until the rate-limit window resets, from x-ratelimit-reset*."""
+    for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset"):
+        value = _header(headers, name)
+        if value is None:
+            continue
+        number = _to_float(value)
+        if number is None:
+            return _duration(value)
+        if number > 1e12:   # epoch milliseconds (OpenRouter)
+            return max(0.0, number / 1000 - (now if now is not None else time.time()))
+        if number > 1e9:    # epoch seconds
+            return max(0.0, number - (now if now is not None else time.time()))
+        return max(0.0, number)
+    return None
+
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _duration(value: str) -> Optional[float]:
+    # OpenAI style: "1s", "6m0s", "20ms"
+    parts = _DURATION.findall(value.strip())
+    if not parts:
+        return None
+    return sum(float(n) * _UNIT_SECONDS[unit] for n, unit in parts)
+
+
+def _status(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _headers(error: Exception) -> Mapping[str, str]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    return headers if headers is not None else {}
+
+
+def _header(headers: Mapping[str, Any], name: str) -> Optional[str]:
+    # httpx.Headers is case-insensitive; plain dicts are not
+    value = headers.get(name)
+    if value is None:
+        for key, v in headers.items():
+            if key.lower() == name:
+                return str(v)
+        return None
+    return str(value)
+
+
+def _header_number(headers: Mapping[str, Any], *names: str) -> Optional[float]:
+    for name in names:
+        value = _header(headers, name)
+        if value is not None:
+            number = _to_float(value)
+            if number is not None:
+                return number
+    return None
+
+
+def _to_float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,353 @@
+"""
+Validator-guided plan repair (between Modules 2 and 3)
+
+- Reads CapabilityValidator's reason ("invalid_arity: ...",
+  "unsupported_comparator: =<", ...) and applies the matching
+  deterministic fix to the plan JSON; repeats while that makes progress
+- Only then, and a bounded number of times, sends a compact delta
+  prompt (plan + reason) back to the planner
+- Every step is timed; RepairTotals aggregates a batch (success rate,
+  local vs. LLM repairs, latency)
+
+Local fixes never change what a valid plan means: they only rewrite
+spellings the planner got wrong, and split n-ary associative ops
+(+ * min max) into the binary blocks Blockly has.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from semantic.ir import SemanticPlan
+from semantic.traversal import fold_expression
+from semantic.validator import CapabilityValidator
+
+Plan = Union[Dict, SemanticPlan]
+
+MAX_LOCAL_ROUNDS = 8
+MAX_LLM_ROUNDS = 1
+
+# -----------------------------
+# Spellings the planner uses instead of the canonical ones
+# -----------------------------
+COMPARATOR_ALIASES = {
+    "=": "==", "eq": "==", "equals": "==", "is": "==",
+    "<>": "!=", "ne": "!=", "≠": "!=", "neq": "!=",
+    "lt": "<", "le": "<=", "=<": "<=", "≤": "<=", "lte": "<=",
+    "gt": ">", "ge": ">=", "=>": ">=", "≥": ">=", "gte": ">=",
+}
+
+LOGIC_ALIASES = {
+    "&&": "and", "&": "and", "all": "and",
+    "||": "or", "|": "or", "any": "or",
+}
+
+OP_ALIASES = {
+    "add": "+", "plus": "+",
+    "sub": "-", "subtract": "-", "minus": "-",
+    "mul": "*", "multiply": "*", "times": "*", "×": "*",
+    "div": "/", "divide": "/", "÷": "/",
+    "%": "mod", "modulo": "mod",
+    "negate": "neg",
+    "minimum": "min", "maximum": "max",
+    "length": "len",
+    "str": "to_string", "number": "to_number",
+}
+
+# Binary blocks, but (a op b) op c == a op (b op c)
+ASSOCIATIVE = {"+", "*", "min", "max"}
+
+
+# -----------------------------
+# Data
+# -----------------------------
+@dataclass(frozen=True, slots=True)
+class RepairStep:
+    stage: str          # local | llm
+    reason: str         # the validator error this step addressed
+    seconds: float
+
+
+@dataclass(slots=True)
+class RepairResult:
+    plan: Plan
+    validation: Dict
+    steps: List[RepairStep] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.validation["status"] == "ok"
+
+    @property
+    def stage(self) -> Optional[str]:
+        """None: valid as generated; "llm" if any LLM round ran; else "local"."""
+        if not self.steps:
+            return None
+        return "llm" if any(s.stage == "llm" for s in self.steps) else "local"
+
+    def seconds(self, stage: Optional[str] = None) -> float:
+        return sum(s.seconds for s in self.steps if stage is None or s.stage == stage)
+
+    def summary(self) -> str:
+        if not self.steps:
+            return "valid as generated"
+        local = sum(s.stage == "local" for s in self.steps)
+        llm = len(self.steps) - local
+        outcome = "repaired" if self.ok else f"failed ({self.validation.get('reason')})"
+        return (
+            f"{outcome} after {local} local fix(es) + {llm} LLM round(s) "
+            f"in {self.seconds() * 1000:.1f} ms"
+        )
+
+
+@dataclass(slots=True)
+class RepairTotals:
+    problems: int = 0
+    valid_first_try: int = 0
+    repaired_local: int = 0
+    repaired_llm: int = 0
+    failed: int = 0
+    local_seconds: float = 0.0
+    llm_seconds: float = 0.0
+    llm_rounds: int = 0
+
+    def add(self, result: RepairResult):
+        self.problems += 1
+        if not result.steps:
+            self.valid_first_try += 1
+        elif not result.ok:
+            self.failed += 1
+        elif result.stage == "llm":
+            self.repaired_llm += 1
+        else:
+            self.repaired_local += 1
+
+        self.local_seconds += result.seconds("local")
+        self.llm_seconds += result.seconds("llm")
+        self.llm_rounds += sum(s.stage == "llm" for s in result.steps)
+
+    def summary(self) -> str:
+        failing = self.problems - self.valid_first_try
+        repaired = self.repaired_local + self.repaired_llm
+        rate = f"{repaired / failing:.0%}" if failing else "n/a"
+        return (
+            f"{failing}/{self.problems} plans invalid, {repaired} repaired ({rate}): "
+            f"{self.repaired_local} local, {self.repaired_llm} LLM; "
+            f"local {self.local_seconds * 1000:.1f} ms, "
+            f"LLM {self.llm_seconds:.2f} s over {self.llm_rounds} round(s)"
+        )
+
+
+# -----------------------------
+# Repair loop
+# -----------------------------
+class PlanRepairer:
+    def __init__(
+        self,
+        validator: CapabilityValidator,
+        llm_repair: Optional[Callable[[Dict, str], Dict]] = None,
+        max_llm_rounds: int = MAX_LLM_ROUNDS,
+        max_local_rounds: int = MAX_LOCAL_ROUNDS
+    ):
+        # llm_repair(plan_json, reason) -> plan_json; None: local fixes only
+        self.validator = validator
+        self.llm_repair = llm_repair
+        self.max_llm_rounds = max_llm_rounds
+        self.max_local_rounds = max_local_rounds
+
+    def repair(self, plan: Plan) -> RepairResult:
+        validation = self.validator.validate(plan)
+        result = RepairResult(plan, validation)
+        if result.ok:
+            return result
+
+        plan_json = plan.to_json() if isinstance(plan, SemanticPlan) else _copy(plan)
+        llm_rounds = 0
+
+        while True:
+            plan_json, validation = self._local_rounds(plan_json, validation, result.steps)
+            if validation["status"] == "ok":
+                break
+            if self.llm_repair is None or llm_rounds >= self.max_llm_rounds:
+                break
+
+            reason = validation["reason"]
+            start = time.perf_counter()
+            try:
+                plan_json = self.llm_repair(plan_json, reason)
+                validation = self.validator.validate(plan_json)
+            except Exception as e:
+                # Planner failure: keep the last plan and its reason
+                print(f"Repair LLM round failed: {e}")
+            result.steps.append(RepairStep("llm", reason, time.perf_counter() - start))
+            llm_rounds += 1
+
+        result.plan = plan_json
+        result.validation = validation
+        return result
+
+    def _local_rounds(self, plan_json: Any, validation: Dict, steps: List[RepairStep]):
+        for _ in range(self.max_local_rounds):
+            if validation["status"] == "ok":
+                break
+
+            reason = validation["reason"]
+            start = time.perf_counter()
+            fixed = local_fix(plan_json, reason)
+            if fixed is None:
+                break
+
+            plan_json = fixed
+            validation = self.validator.validate(plan_json)
+            steps.append(RepairStep("local", reason, time.perf_counter() - start))
+
+        return plan_json, validation
+
+
+# -----------------------------
+# Deterministic fixes
+# -----------------------------
+def local_fix(plan_json: Any, reason: str) -> Optional[Any]:
+    """
+    The fix for the validator's reason code, applied plan-wide.
+    None when there is no fix for it or nothing changed.
+    """
+    code, _, detail = reason.partition(":")
+    fixer = _FIXERS.get(code.strip())
+    if code.strip() == "unsupported_comparator" and _is_logic_op(detail):
+        # A group nested where a comparison goes ("unsupported_comparator: and")
+        fixer = fix_conditions
+    if fixer is None or not isinstance(plan_json, dict):
+        return None
+
+    fixed = fixer(plan_json)
+    return None if _same(fixed, plan_json) else fixed
+
+
+def fix_comparators(node: Any) -> Any:
+    def fix(d: Dict) -> Dict:
+        if _is_atom(d) and isinstance(d["op"], str):
+            d["op"] = COMPARATOR_ALIASES.get(d["op"].strip().lower(), d["op"].strip())
+        return d
+    return _rewrite(node, fix)
+
+
+def fix_operators(node: Any) -> Any:
+    def fix(d: Dict) -> Dict:
+        if _is_expression(d) and isinstance(d["op"], str):
+            op = d["op"].strip().lower()
+            d["op"] = OP_ALIASES.get(op, op)
+        return d
+    return _rewrite(node, fix)
+
+
+def fix_conditions(node: Any) -> Any:
+    """Logic spellings, a bare comparison as a group, nested same-op groups."""
+    def fix(d: Dict) -> Dict:
+        condition = d.get("condition")
+        if isinstance(condition, dict) and _is_atom(condition):
+            d["condition"] = {"op": "and", "conditions": [condition]}
+
+        if _is_group(d):
+            if isinstance(d["op"], str):
+                op = d["op"].strip().lower()
+                d["op"] = LOGIC_ALIASES.get(op, op)
+            flat = []
+            for c in d["conditions"]:
+                if isinstance(c, dict) and _is_group(c) and c["op"] == d["op"]:
+                    flat.extend(c["conditions"])
+                else:
+                    flat.append(c)
+            d["conditions"] = flat
+        return d
+    return _rewrite(node, fix)
+
+
+def fix_arity(node: Any) -> Any:
+    """
+    min(a, b, c) → min(min(a, b), c). A one-argument op is a list
+    aggregate (min(xs)), not a value: left to the LLM round.
+    """
+    def fix(d: Dict) -> Any:
+        if not (_is_expression(d) and d["op"] in ASSOCIATIVE and isinstance(d["args"], list)):
+            return d
+        args = d["args"]
+        if len(args) <= 2:
+            return d
+        folded = args[0]
+        for arg in args[1:]:
+            folded = {"op": d["op"], "args": [folded, arg]}
+        return folded
+
+    return _rewrite(node, fix)
+
+
+_FIXERS: Dict[str, Callable[[Any], Any]] = {
+    "unsupported_comparator": fix_comparators,
+    "unsupported_op": fix_operators,
+    "unsupported_logic_op": fix_conditions,
+    "invalid_condition_schema": fix_conditions,
+    "invalid_arity": fix_arity,
+}
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def _is_expression(d: Dict) -> bool:
+    return "op" in d and "args" in d
+
+
+def _is_atom(d: Dict) -> bool:
+    return "op" in d and ("left" in d or "right" in d)
+
+
+def _is_logic_op(op: str) -> bool:
+    op = op.strip().lower()
+    return LOGIC_ALIASES.get(op, op) in ("and", "or")
+
+
+def _is_group(d: Dict) -> bool:
+    return "op" in d and isinstance(d.get("conditions"), list)
+
+
+# Plans can nest deeper than the interpreter stack: JSON is walked with
+# the explicit-stack fold, dicts and lists both being nodes
+def _rewrite(node: Any, fix: Callable[[Dict], Any]) -> Any:
+    """Copy of a JSON value with `fix` applied to every dict, children first."""
+    def build(v: Any, children: List[Any]) -> Any:
+        if isinstance(v, list):
+            return children
+        return fix(dict(zip(v.keys(), children)))
+
+    return fold_expression(node, _leaf, build, children=_json_children, node_type=(dict, list))
+
+
+def _copy(node: Any) -> Any:
+    return _rewrite(node, _leaf)
+
+
+def _leaf(v: Any) -> Any:
+    return v
+
+
+def _json_children(v: Any) -> List[Any]:
+    return list(v.values()) if isinstance(v, dict) else v
+
+
+def _same(a: Any, b: Any) -> bool:
+    """a == b for JSON values, without recursion."""
+    stack = [(a, b)]
+    while stack:
+        x, y = stack.pop()
+        if isinstance(x, dict) and isinstance(y, dict):
+            if x.keys() != y.keys():
+                return False
+            stack.extend((v, y[k]) for k, v in x.items())
+        elif isinstance(x, list) and isinstance(y, list):
+            if len(x) != len(y):
+                return False
+            stack.extend(zip(x, y))
+        elif isinstance(x, (dict, list)) or isinstance(y, (dict, list)) or x != y:
+            return False
+    return True
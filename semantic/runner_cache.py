@@ -0,0 +1,179 @@
+"""
+Content-addressed cache for the CodeAsthram runner (program.xml -> Python)
+
+- Key: SHA-256 of the canonicalized XML (C14N 2.0: sorted attributes,
+  one namespace spelling; whitespace-only text between tags dropped,
+  field text kept byte for byte), so formatting never causes a miss
+- One file per entry under data/cache/runner/; a hit refreshes its
+  mtime and eviction drops the least recently used beyond max_entries
+- Verification sampling: a hit re-runs the real runner with probability
+  verify_rate and compares; a mismatch replaces the entry and is counted
+- Empty runner output is never cached (a failed browser run)
+
+max_entries=0 disables the cache: every call runs the runner.
+"""
+
+import hashlib
+import os
+import random
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from semantic.catalog import DEFAULT_CACHE_DIR
+
+DEFAULT_RUNNER_CACHE = DEFAULT_CACHE_DIR / "runner"
+MAX_ENTRIES = 500
+VERIFY_RATE = 0.05
+
+
+@dataclass(frozen=True, slots=True)
+class RunnerCacheStats:
+    hits: int
+    misses: int
+    verified: int
+    mismatches: int
+    evicted: int
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = f"{self.hits / total:.0%}" if total else "n/a"
+        return (
+            f"{self.hits}/{total} runs served from cache ({rate}), "
+            f"{self.verified} verified ({self.mismatches} mismatched), {self.evicted} evicted"
+        )
+
+
+def canonicalize(xml: str) -> str:
+    try:
+        root = ET.fromstring(xml)
+    except ET.ParseError:
+        # Not XML the runner can load either: key on the text as is
+        return xml.strip()
+
+    # Indentation only: text before a first child and every tail. A leaf's
+    # text (a <field> value, " " included) is part of the program
+    for element in root.iter():
+        if len(element) and element.text is not None and not element.text.strip():
+            element.text = None
+        if element.tail is not None and not element.tail.strip():
+            element.tail = None
+    return ET.canonicalize(ET.tostring(root, encoding="unicode"))
+
+
+def xml_key(xml: str) -> str:
+    return hashlib.sha256(canonicalize(xml).encode("utf-8")).hexdigest()
+
+
+class RunnerCache:
+    def __init__(
+        self,
+        root: Path = DEFAULT_RUNNER_CACHE,
+        max_entries: int = MAX_ENTRIES,
+        verify_rate: float = VERIFY_RATE,
+        rng: Callable[[], float] = random.random
+    ):
+        self.root = Path(root)
+        self.max_entries = max_entries
+        self.verify_rate = verify_rate
+        self._rng = rng
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._verified = 0
+        self._mismatches = 0
+        self._evicted = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def run(self, xml: str, execute: Callable[[], str]) -> str:
+        """
+        Python for `xml`: cached, or execute() (the real runner, returns
+        its Python) on a miss or when sampled for verification.
+        """
+        if not self.enabled:
+            return execute()
+
+        key = xml_key(xml)
+        cached = self.get(key)
+
+        if cached is None:
+            python = execute()
+            with self._lock:
+                self._misses += 1
+            self.put(key, python)
+            return python
+
+        with self._lock:
+            self._hits += 1
+        if self._rng() >= self.verify_rate:
+            return cached
+
+        python = execute()
+        with self._lock:
+            self._verified += 1
+            self._mismatches += python != cached
+        if python != cached:
+            print(f"Runner cache: entry {key[:12]} did not match a fresh run, replaced")
+            self.put(key, python)
+        return python
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            python = path.read_text(encoding="utf-8")
+            os.utime(path)   # LRU: a hit is a use
+            return python
+        except OSError:
+            return None
+
+    def put(self, key: str, python: str):
+        if not python.strip():
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(python, encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            # Read-only checkout etc.: just no caching
+            return
+        self._evict()
+
+    def stats(self) -> RunnerCacheStats:
+        with self._lock:
+            return RunnerCacheStats(self._hits, self._misses, self._verified, self._mismatches, self._evicted)
+
+    # -----------------------------
+    # Helpers
+    # -----------------------------
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.py"
+
+    def _evict(self):
+        entries = []
+        for path in self.root.glob("*/*.py"):
+            try:
+                entries.append((path.stat().st_mtime_ns, path))
+            except OSError:
+                continue
+        if len(entries) <= self.max_entries:
+            return
+
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            with self._lock:
+                self._evicted += 1
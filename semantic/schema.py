@@ -3,6 +3,9 @@ Semantic Planner Output Schema (Module 1)
 
 This schema defines the ONLY structure the LLM
 is allowed to output.
+
+Typed runtime form (parsed once, used by validator + compiler):
+semantic/ir.py
 """
 
 # ------------------------------
@@ -20,7 +23,7 @@ DERIVED_SCHEMA = {
     "name": str,
     "expression": {
         "op": str,      # semantic op (see SEMANTIC_OPS)
-        "args": list    # 1 or more arguments
+        "args": list    # var names, numbers or nested {"op", "args"} expressions
     }
 }
 
@@ -46,9 +49,9 @@ SEMANTIC_OPS = {
 # Atomic Condition Schema
 # ------------------------------
 CONDITION_ATOM_SCHEMA = {
-    "left": object,     # var name or number
+    "left": object,     # var name, number or nested expression
     "op": str,          # >= | <= | > | < | == | !=
-    "right": object     # var name or number
+    "right": object     # var name, number or nested expression
 }
 
 # ------------------------------
@@ -63,10 +66,25 @@ CONDITION_SCHEMA = {
 # Action Schema
 # ------------------------------
 ACTION_SCHEMA = {
-    "type": str,        # only "print"
+    "type": str,        # only "print" (core tier)
     "value": str        # string literal
 }
 
+# Extended tier (opt-in, CAPABILITY_TIER=extended) adds statement
+# actions whose exact shapes live in data/semantic_ops.json ("shape"):
+# print_value, set, change, append, if, repeat, for_range, for_each,
+# while, break, continue, call. Loops / if nest actions in "body",
+# "then" and "else".
+
+# ------------------------------
+# Function Schema (extended tier)
+# ------------------------------
+FUNCTION_SCHEMA = {
+    "name": str,
+    "body": list,       # list of ACTION_SCHEMA
+    "returns": object   # optional: var name, number or expression
+}
+
 # ------------------------------
 # Semantic Plan (FINAL)
 # ------------------------------
@@ -77,5 +95,6 @@ SEMANTIC_PLAN_SCHEMA = {
     "actions": {
         "then": list,       # list of ACTION_SCHEMA
         "else": list        # list of ACTION_SCHEMA
-    }
+    },
+    "functions": list       # optional, extended tier: list of FUNCTION_SCHEMA
 }
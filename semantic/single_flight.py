@@ -0,0 +1,81 @@
+"""
+Single-flight call deduplication
+
+- Concurrent calls with the same key share ONE execution: the first
+  caller (leader) runs it, callers arriving while it is in flight wait
+  for and receive the same result (or exception)
+- Nothing is cached: once the leader finishes the key is forgotten,
+  so a later identical call runs again
+- Counters show how many calls ran vs. were coalesced
+
+Used in front of the LLM client (semantic/llm_usage.py), keyed on
+model + messages + sampling parameters.
+"""
+
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True, slots=True)
+class FlightStats:
+    executed: int
+    coalesced: int
+
+    def summary(self) -> str:
+        total = self.executed + self.coalesced
+        rate = f"{self.coalesced / total:.0%}" if total else "n/a"
+        return f"{self.executed} executed, {self.coalesced} coalesced ({rate} of {total} requests)"
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._executed = 0
+        self._coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self._executed += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def is_inflight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._inflight
+
+    def stats(self) -> FlightStats:
+        with self._lock:
+            return FlightStats(self._executed, self._coalesced)
+
+
+def request_key(**request: Any) -> str:
+    """Stable key for an LLM request (model, messages, sampling params...)."""
+    blob = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
@@ -0,0 +1,163 @@
+"""
+Explicit-stack tree walkers
+
+- Block trees (SemanticCompiler output): value inputs, statement
+  inputs and `next` chains, in document order
+- Semantic expressions (ir.Expression args), pre-order and as a
+  bottom-up fold
+- No recursion: depth is bounded by memory, not by the interpreter
+  stack, and there is no Python frame per node
+
+Shared by the IR parser, the compiler, the validator, the Python XML
+assembler and the optimizer (see bench/bench_traversal.py).
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from semantic.ir import Expression, Value
+
+R = TypeVar("R")
+
+# -----------------------------
+# Block trees
+# -----------------------------
+ENTER = 0
+LEAVE = 1
+
+# How a block hangs off its parent: ("value", input), ("statement", input),
+# ("next", None); None for a root
+Edge = Optional[Tuple[str, Optional[str]]]
+
+BlockTree = Union[None, Dict, List[Dict]]
+
+
+def iter_block_events(tree: BlockTree) -> Iterator[Tuple[int, Edge, Dict]]:
+    """
+    Yields (ENTER, edge, block) / (LEAVE, edge, block) in document order:
+    a block's value inputs, then statement inputs, then `next` are all
+    entered and left between its ENTER and LEAVE. Empty inputs are
+    skipped. A list is walked as several roots.
+    """
+    roots = tree if isinstance(tree, list) else [tree]
+    stack: List[Tuple[int, Edge, Dict]] = [
+        (ENTER, None, root) for root in reversed(roots) if root is not None
+    ]
+
+    while stack:
+        event = stack.pop()
+        yield event
+
+        kind, _, block = event
+        if kind == LEAVE:
+            continue
+
+        stack.append((LEAVE, event[1], block))
+
+        # Pushed last-first so they pop in document order
+        if block.get("next"):
+            stack.append((ENTER, ("next", None), block["next"]))
+        for group, edge_kind in (("statement_inputs", "statement"), ("value_inputs", "value")):
+            inputs = block.get(group)
+            if inputs:
+                stack.extend(
+                    (ENTER, (edge_kind, name), child)
+                    for name, child in reversed(inputs.items())
+                    if child is not None
+                )
+
+
+def iter_blocks(tree: BlockTree) -> Iterator[Dict]:
+    """Every block of a tree (or list of roots), pre-order."""
+    roots = tree if isinstance(tree, list) else [tree]
+    stack = [root for root in reversed(roots) if root]
+
+    while stack:
+        block = stack.pop()
+        yield block
+
+        if block.get("next"):
+            stack.append(block["next"])
+        for group in ("statement_inputs", "value_inputs"):
+            inputs = block.get(group)
+            if inputs:
+                stack.extend(child for child in reversed(inputs.values()) if child)
+
+
+# -----------------------------
+# Expressions
+# -----------------------------
+def _args(expr: Expression) -> Sequence[Value]:
+    return expr.args if isinstance(expr.args, list) else ()
+
+
+def iter_expressions(
+    value: Value,
+    children: Callable[[Expression], Sequence[Value]] = _args
+) -> Iterator[Expression]:
+    """Every Expression nested in `value`, pre-order, args left to right."""
+    stack = [value]
+
+    while stack:
+        v = stack.pop()
+        if isinstance(v, Expression):
+            yield v
+            stack.extend(reversed(children(v)))
+
+
+def fold_expression(
+    value: Value,
+    leaf: Callable[[Value], R],
+    node: Callable[[Expression, List[R]], R],
+    enter: Optional[Callable[[Expression], None]] = None,
+    children: Callable[[Expression], Sequence[Value]] = _args,
+    node_type: Union[type, Tuple[type, ...]] = Expression
+) -> R:
+    """
+    Bottom-up fold: leaf(v) for every non-Expression value, then
+    node(expr, folded_children) once all of expr's children are folded.
+
+    `enter(expr)` runs pre-order, before any child is visited (checks
+    raise there, in the same order the recursive walk used to).
+    `children(expr)` picks the args to descend into. node_type=dict
+    folds plan JSON ({"op", "args"} dicts) instead of Expressions; a
+    tuple of types works as in isinstance (repair.py: dicts + lists).
+    """
+    if not isinstance(value, node_type):
+        return leaf(value)
+
+    if enter is not None:
+        enter(value)
+    args = children(value)
+    for arg in args:
+        if isinstance(arg, node_type):
+            break
+    else:
+        # Flat: the common case, no stack needed
+        return node(value, [leaf(arg) for arg in args])
+
+    # One frame per open expression: [expr, children, next index, folded]
+    # Leaf children are folded in place, never pushed
+    frames: List[list] = [[value, args, 0, []]]
+
+    while True:
+        frame = frames[-1]
+        args = frame[1]
+        folded = frame[3]
+        i = frame[2]
+
+        while i < len(args):
+            arg = args[i]
+            i += 1
+            if isinstance(arg, node_type):
+                frame[2] = i
+                if enter is not None:
+                    enter(arg)
+                frames.append([arg, children(arg), 0, []])
+                break
+            folded.append(leaf(arg))
+        else:
+            frames.pop()
+            result = node(frame[0], folded)
+            if not frames:
+                return result
+            frames[-1][3].append(result)
@@ -1,46 +1,50 @@
-import json
-from pathlib import Path
-from typing import Dict, List
+from typing import Dict, FrozenSet, List, Optional, Union
+
+from semantic.dispatch import DEFAULT_TIER, DispatchTable, load_op_bindings, load_tier_catalog
+from semantic.ir import (
+    Action, Actions, Condition, ConditionAtom, DerivedVar, Expression, Function, InputVar,
+    PlanSchemaError, SemanticPlan
+)
+from semantic.traversal import iter_expressions
 
 
 class CapabilityError(Exception):
     pass
 
 
-class CapabilityValidator:
-    def __init__(self, normalized_blocks_path: str):
-        self.blocks = self._load_blocks(normalized_blocks_path)
-        self.block_types = {b["type"] for b in self.blocks}
-
-    # ---------------------------
-    # Load schema
-    # ---------------------------
-    def _load_blocks(self, path: str) -> List[Dict]:
-        p = Path(path)
-        if not p.exists():
-            raise FileNotFoundError(f"normalized_blocks.json not found: {path}")
+NO_FUNCTIONS: FrozenSet[str] = frozenset()
 
-        data = json.loads(p.read_text(encoding='utf-8'))
 
-        if not isinstance(data, list):
-            raise TypeError("normalized_blocks.json must be a list")
+class CapabilityValidator:
+    def __init__(self, normalized_blocks_path: str, tier: str = DEFAULT_TIER):
+        # Lazy + cached: only the index is read at startup (semantic/catalog.py).
+        # Tiers above core also negotiate against their extra catalogs.
+        self.tier = tier
+        self.catalog = load_tier_catalog(str(normalized_blocks_path), tier)
+        self.block_types = self.catalog.block_types
 
-        for i, block in enumerate(data):
-            if "type" not in block:
-                raise KeyError(f"Block at index {i} missing 'type'")
+        # Same op → block table the compiler dispatches on
+        self.dispatch = DispatchTable.build(self.catalog, load_op_bindings(), tier)
 
-        return data
+    @property
+    def blocks(self) -> List[Dict]:
+        return self.catalog.blocks()
 
     # ---------------------------
     # Public API
     # ---------------------------
-    def validate(self, semantic_plan: Dict) -> Dict:
+    def validate(self, semantic_plan: Union[Dict, SemanticPlan]) -> Dict:
         try:
-            self._validate_inputs(semantic_plan.get("inputs", []))
-            self._validate_derived(semantic_plan.get("derived", []))
-            self._validate_condition(semantic_plan.get("condition"))
-            self._validate_actions(semantic_plan.get("actions", {}))
-        except CapabilityError as e:
+            # Shape checks happen once, while parsing into the IR
+            plan = SemanticPlan.from_json(semantic_plan)
+            functions = self.function_names(plan.functions)
+
+            self._validate_inputs(plan.inputs)
+            self._validate_derived(plan.derived, functions)
+            self._validate_condition(plan.condition, functions)
+            self._validate_actions(plan.actions, functions)
+            self._validate_functions(plan.functions, functions)
+        except (CapabilityError, PlanSchemaError) as e:
             return {"status": "error", "reason": str(e)}
 
         return {"status": "ok"}
@@ -55,82 +59,173 @@ class CapabilityValidator:
     # ---------------------------
     # Validators
     # ---------------------------
-    def _validate_inputs(self, inputs: List[Dict]):
+    def _validate_inputs(self, inputs: List[InputVar]):
         if not inputs:
             return
 
-        self._require("variables_set")
-
-        for inp in inputs:
-            if "name" not in inp or "type" not in inp:
-                raise CapabilityError("invalid_input_schema")
+        self.check_statement()
 
-    # -----------------------------
-    # Derived (ARITY FIX APPLIED HERE)
-    # -----------------------------
-    def _validate_derived(self, derived):
+    def _validate_derived(self, derived: List[DerivedVar], functions: FrozenSet[str] = NO_FUNCTIONS):
         if not derived:
             return
 
-        self._require("variables_set")
+        self.check_statement()
 
         for d in derived:
-            expr = d.get("expression")
-            if not expr:
-                raise CapabilityError("missing_expression")
-
-            op = expr.get("op")
-            args = expr.get("args", [])
-
-            # ---------- FIX-1: OPERATOR ARITY VALIDATION ----------
-            ARITY = {
-                "+": 2,
-                "-": 2,
-                "*": 2,
-                "/": 2,
-                "mod": 2,
-                "min": 1,
-                "max": 1,
-                "abs": 1,
-                "len": 1,
-                "to_string": 1,
-                "to_number": 1,
-            }
-
-            if op in ARITY:
-                if not isinstance(args, list):
-                    raise CapabilityError(
-                        f"invalid_args: op '{op}' expects list args"
-                    )
-
-                expected = ARITY[op]
-                if len(args) != expected:
-                    raise CapabilityError(
-                        f"invalid_arity: op '{op}' expects {expected} args, got {len(args)}"
-                    )
-            # ------------------------------------------------------
-
-
-    def _validate_condition(self, condition: Dict):
+            self._validate_value(d.expression, functions)
+
+    def _validate_condition(self, condition: Optional[Condition], functions: FrozenSet[str] = NO_FUNCTIONS):
         if not condition:
             return
 
-        if condition["op"] not in {"and", "or"}:
+        self.check_condition(condition)
+
+        for c in condition.conditions:
+            self.check_compare(c)
+            self._validate_value(c.left, functions)
+            self._validate_value(c.right, functions)
+
+    def _validate_actions(self, actions: Actions, functions: FrozenSet[str] = NO_FUNCTIONS):
+        for branch in [actions.then, actions.else_]:
+            self._validate_action_list(branch, functions)
+
+    def _validate_action_list(self, actions: List[Action], functions: FrozenSet[str]):
+        # Same order the compiler visits them: action, operands, condition, body, else
+        for action in actions:
+            self.check_action(action, functions)
+
+            spec = self.dispatch.actions[action.type]
+            for key in spec.args:
+                self._validate_value(action.operand(key), functions)
+
+            if action.condition is not None:
+                self._validate_condition(action.condition, functions)
+
+            self._validate_action_list(action.body, functions)
+            self._validate_action_list(action.else_, functions)
+
+    def _validate_functions(self, fns: List[Function], functions: FrozenSet[str]):
+        for fn in fns:
+            self.check_function(fn)
+            self._validate_action_list(fn.body, functions)
+            self._validate_value(fn.returns, functions)
+
+    def _validate_value(self, value, functions: FrozenSet[str] = NO_FUNCTIONS):
+        # Pre-order, args left to right: the order the compiler emits blocks
+        for expr in iter_expressions(value):
+            self.check_expression(expr, functions)
+
+    def function_names(self, fns: List[Function]) -> FrozenSet[str]:
+        names = set()
+        for fn in fns:
+            if fn.name in names:
+                raise CapabilityError(f"duplicate_function: {fn.name}")
+            names.add(fn.name)
+        return frozenset(names)
+
+    # ---------------------------
+    # Per-node checks
+    # (shared with the fused validate+compile pass, semantic/fused.py)
+    # ---------------------------
+    def check_statement(self):
+        self._require("variables_set")
+
+    # -----------------------------
+    # Derived (arity comes from the dispatch table)
+    # -----------------------------
+    def check_expression(self, expr: Expression, functions: FrozenSet[str] = NO_FUNCTIONS):
+        op = expr.op
+        args = expr.args
+
+        spec = self.dispatch.expressions.get(op)
+        if spec is None:
+            raise CapabilityError(f"unsupported_op: {op}")
+
+        self._require(spec.block_type)
+
+        if not isinstance(args, list):
+            raise CapabilityError(
+                f"invalid_args: op '{op}' expects list args"
+            )
+
+        if spec.form == "variadic":
+            return
+
+        if spec.form == "call":
+            if len(args) != 1:
+                raise CapabilityError(
+                    f"invalid_arity: op '{op}' expects 1 args, got {len(args)}"
+                )
+            self._check_call(args[0], functions)
+            return
+
+        if len(args) != spec.arity:
+            raise CapabilityError(
+                f"invalid_arity: op '{op}' expects {spec.arity} args, got {len(args)}"
+            )
+
+    def check_condition(self, condition: Condition):
+        spec = self.dispatch.logic.get(condition.op)
+        if spec is None:
             raise CapabilityError("unsupported_logic_op")
 
-        self._require("logic_compare")
-        self._require("logic_operation")
+        self._require(spec.block_type)
         self._require("controls_if")
 
-        for c in condition.get("conditions", []):
-            if c["op"] not in {">", "<", ">=", "<=", "==", "!="}:
-                raise CapabilityError(f"unsupported_comparator: {c['op']}")
-
-    def _validate_actions(self, actions: Dict):
-        for branch in ["then", "else"]:
-            for action in actions.get(branch, []):
-                if action["type"] == "print":
-                    self._require("text_print")
-                    self._require("text")
-                else:
-                    raise CapabilityError(f"unsupported_action: {action['type']}")
+    def check_compare(self, c: ConditionAtom):
+        spec = self.dispatch.comparators.get(c.op)
+        if spec is None:
+            raise CapabilityError(f"unsupported_comparator: {c.op}")
+
+        self._require(spec.block_type)
+
+    def check_action(self, action: Action, functions: FrozenSet[str] = NO_FUNCTIONS):
+        spec = self.dispatch.actions.get(action.type)
+        if spec is None:
+            raise CapabilityError(f"unsupported_action: {action.type}")
+
+        for block_type in spec.required_blocks:
+            self._require(block_type)
+
+        # Extended-tier statements: required operands
+        if spec.var_key and not isinstance(action.operand(spec.var_key), str):
+            raise CapabilityError(
+                f"invalid_action_schema: '{action.type}' needs '{spec.var_key}'"
+            )
+
+        for key in spec.args:
+            if action.operand(key) is None:
+                raise CapabilityError(
+                    f"invalid_action_schema: '{action.type}' needs '{key}'"
+                )
+
+        # Nested actions only where the compiler emits them: an if has
+        # then + else, a loop a body, nothing else has either
+        if action.else_ and spec.form != "if":
+            raise CapabilityError(
+                f"invalid_action_schema: '{action.type}' has no else branch"
+            )
+        if action.body and spec.form != "if" and not spec.statements:
+            raise CapabilityError(
+                f"invalid_action_schema: '{action.type}' has no body"
+            )
+
+        if spec.form in ("if", "while"):
+            if not (action.condition and action.condition.conditions):
+                raise CapabilityError(
+                    f"invalid_action_schema: '{action.type}' needs a non-empty condition"
+                )
+        elif spec.form == "call":
+            self._check_call(action.operand("name"), functions)
+
+    def check_function(self, fn: Function):
+        kind = "procedure" if fn.returns is None else "function"
+        spec = self.dispatch.functions.get(kind)
+        if spec is None:
+            raise CapabilityError(f"unsupported_construct: {kind}")
+
+        self._require(spec.block_type)
+
+    def _check_call(self, name, functions: FrozenSet[str]):
+        if not isinstance(name, str) or name not in functions:
+            raise CapabilityError(f"unknown_function: {name}")